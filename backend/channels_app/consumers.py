@@ -13,11 +13,17 @@ class TrainingConsumer(AsyncWebsocketConsumer):
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
     
     async def training_update(self, event):
-        await self.send(text_data=json.dumps({
+        message = {
             'progress': event['progress'],
             'step': event['step'],
             'status': event.get('status', 'running')
-        }))
+        }
+        # Optional stage details published by ml_app.progress.TrainingProgress
+        for field in ('rows', 'duration_ms', 'error', 'timestamp', 'stage_timings',
+                      'model_version', 'best_model'):
+            if field in event:
+                message[field] = event[field]
+        await self.send(text_data=json.dumps(message))
 
 class AnalyticsConsumer(AsyncWebsocketConsumer):
     async def connect(self):
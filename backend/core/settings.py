@@ -64,10 +64,77 @@ TEMPLATES = [
 WSGI_APPLICATION = 'core.wsgi.application'
 ASGI_APPLICATION = 'core.routing.application'
 
-# WebSocket Channels - Use InMemory for simplicity
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+# WebSocket Channels - Use InMemory for simplicity. Celery workers publish
+# training progress from another process, which needs the Redis layer.
+if os.getenv('REDIS_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [REDIS_URL]},
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
+
+# Chatbot language model: 'full' (DialoGPT-medium), 'lightweight' (distilgpt2) or
+# 'disabled'. It is loaded once, by the shared server (`manage.py chat_server`)
+# listening on CHATBOT_SERVER_ADDRESS; web workers only connect to it and answer 503
+# while it is down or loading. Requests slower than the latency budget get the
+# rule-based fallback answer.
+CHATBOT_MODEL = os.getenv('CHATBOT_MODEL', 'full')
+CHATBOT_SERVER_ADDRESS = os.getenv('CHATBOT_SERVER_ADDRESS', '127.0.0.1:8765')
+CHATBOT_LATENCY_BUDGET = float(os.getenv('CHATBOT_LATENCY_BUDGET', '5'))
+CHATBOT_QUANTIZE = os.getenv('CHATBOT_QUANTIZE', 'False') == 'True'
+CHATBOT_BATCH_SIZE = int(os.getenv('CHATBOT_BATCH_SIZE', '8'))
+CHATBOT_BATCH_WINDOW_MS = int(os.getenv('CHATBOT_BATCH_WINDOW_MS', '25'))
+CHATBOT_CACHE_TTL = int(os.getenv('CHATBOT_CACHE_TTL', '3600'))
+
+# PredictionsRisk rows are buffered and written in bulk; rows older than the
+# retention window are purged daily by ml_app.tasks.purge_old_predictions
+PREDICTIONS_BATCH_SIZE = int(os.getenv('PREDICTIONS_BATCH_SIZE', '5000'))
+PREDICTIONS_FLUSH_INTERVAL = float(os.getenv('PREDICTIONS_FLUSH_INTERVAL', '1.0'))
+# Rows kept for retry while the database is unreachable; the oldest are dropped past this
+PREDICTIONS_MAX_PENDING = int(os.getenv('PREDICTIONS_MAX_PENDING', '50000'))
+PREDICTIONS_RETENTION_DAYS = int(os.getenv('PREDICTIONS_RETENTION_DAYS', '90'))
+
+# Per-process cache of prediction results keyed by (model version, input hash);
+# identical concurrent requests share one computation (ml_app.prediction_cache)
+PREDICTION_CACHE_TTL = int(os.getenv('PREDICTION_CACHE_TTL', '300'))
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', '10000'))
+
+# Longest an analytics snapshot job may run before another request can queue it again
+ANALYTICS_MATERIALIZE_TIMEOUT = int(os.getenv('ANALYTICS_MATERIALIZE_TIMEOUT', '3600'))
+
+# Datasets with more cataloged rows than this train out of core, streaming
+# chunks of OUT_OF_CORE_CHUNK_ROWS rows (ml_app.utils.streaming)
+LARGE_DATASET_ROWS = int(os.getenv('LARGE_DATASET_ROWS', '2000000'))
+OUT_OF_CORE_CHUNK_ROWS = int(os.getenv('OUT_OF_CORE_CHUNK_ROWS', '200000'))
+
+# Class-imbalance handling in balance_split (ml_app.utils.imbalance): one of
+# auto, none, class_weight, undersample, smote; SMOTE never grows a split past
+# IMBALANCE_MAX_ROWS rows
+IMBALANCE_STRATEGY = os.getenv('IMBALANCE_STRATEGY', 'auto')
+IMBALANCE_MAX_ROWS = int(os.getenv('IMBALANCE_MAX_ROWS', '500000'))
+
+# Training splits larger than this select a model by successive halving on
+# stratified samples; AUTOML_TIME_BUDGET (seconds) bounds that search
+AUTOML_HALVING_ROWS = int(os.getenv('AUTOML_HALVING_ROWS', '100000'))
+AUTOML_TIME_BUDGET = float(os.getenv('AUTOML_TIME_BUDGET')) if os.getenv('AUTOML_TIME_BUDGET') else None
+
+CELERY_BEAT_SCHEDULE = {
+    'purge-old-predictions': {
+        'task': 'ml_app.tasks.purge_old_predictions',
+        'schedule': 24 * 60 * 60,
+    },
+    'refresh-customer-risk': {
+        'task': 'ml_app.tasks.refresh_customer_risk',
+        'schedule': 24 * 60 * 60,
     },
 }
 
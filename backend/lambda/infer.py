@@ -1,10 +1,107 @@
-import json
+import os
+import time
 import boto3
 import joblib
 import pandas as pd
-import numpy as np
 from io import BytesIO
-import shap
+# Copied next to this handler when the function is bundled; see shared_modules.txt
+from ml_app.utils.explain import explainer_for
+from ml_app.utils.feature_plan import FeaturePlan
+from ml_app.utils.compiled_trees import load_compiled, predict_positive
+
+MODEL_BUCKET = os.environ.get('MODEL_BUCKET', 'churn-bucket')
+# How long a warm container trusts its cached ETag before asking S3 again
+ETAG_TTL_SECONDS = float(os.environ.get('MODEL_ETAG_TTL', '60'))
+
+# Module-level state survives across warm invocations of the same container
+_s3 = None
+_models = {}       # (model_s3_key, etag) -> bundle
+_unexplainable = set()  # (model_s3_key, etag) whose explainer could not be built
+_etags = {}        # model_s3_key -> (etag, checked_at)
+
+_plans = {}       # (model_s3_key, etag) -> FeaturePlan
+_compiled = {}    # (model_s3_key, etag) -> CompiledForest or None
+
+
+def get_s3():
+    global _s3
+    if _s3 is None:
+        _s3 = boto3.client('s3')
+    return _s3
+
+
+def current_etag(model_s3_key):
+    cached = _etags.get(model_s3_key)
+    if cached and time.monotonic() - cached[1] < ETAG_TTL_SECONDS:
+        return cached[0]
+
+    etag = get_s3().head_object(Bucket=MODEL_BUCKET, Key=model_s3_key)['ETag']
+    _etags[model_s3_key] = (etag, time.monotonic())
+    return etag
+
+
+def load_bundle(model_s3_key):
+    """Return (cache_key, bundle), downloading only when the object changed"""
+    cache_key = (model_s3_key, current_etag(model_s3_key))
+    bundle = _models.get(cache_key)
+    if bundle is None:
+        obj = get_s3().get_object(Bucket=MODEL_BUCKET, Key=model_s3_key)
+        bundle = joblib.load(BytesIO(obj['Body'].read()))
+        # Drop superseded versions of this key so a warm container does not grow
+        for key in [k for k in _models if k[0] == model_s3_key]:
+            _models.pop(key, None)
+            _plans.pop(key, None)
+            _compiled.pop(key, None)
+            _unexplainable.discard(key)
+        _models[cache_key] = bundle
+    return cache_key, bundle
+
+
+def get_explainer(cache_key, bundle, feature_names):
+    if cache_key in _unexplainable:
+        return None
+    try:
+        return explainer_for(cache_key, bundle['model'], bundle.get('background'), feature_names)
+    except Exception:
+        # Remember the miss; models shap cannot wrap should not retry per request
+        _unexplainable.add(cache_key)
+        return None
+
+
+def get_plan(cache_key, bundle):
+    plan = _plans.get(cache_key)
+    if plan is None:
+        if not bundle.get('feature_plan'):
+            raise ValueError('Model bundle has no feature plan; retrain to enable inference')
+        plan = FeaturePlan.from_dict(bundle['feature_plan'])
+        _plans[cache_key] = plan
+    return plan
+
+
+def get_compiled(cache_key, bundle):
+    if cache_key not in _compiled:
+        _compiled[cache_key] = load_compiled(bundle)
+    return _compiled[cache_key]
+
+
+def prepare_features(records, bundle, cache_key=None):
+    """Replay the training feature plan on raw customer records"""
+    feature_names = bundle.get('feature_names')
+    if feature_names is None:
+        raise ValueError('Model bundle has no feature_names manifest; retrain to enable inference')
+
+    plan = get_plan(cache_key, bundle)
+    return plan.transform(pd.DataFrame.from_records(records)), feature_names
+
+
+def top_contributions(explainer, X, k=5):
+    if explainer is None:
+        return [{} for _ in range(len(X))]
+    try:
+        return explainer.top_k(X, k=k)
+    except Exception:
+        return [{} for _ in range(len(X))]
+
 
 def handler(event, context):
     """Lambda function for ML inference"""
@@ -12,78 +109,39 @@ def handler(event, context):
         # Get parameters
         model_s3_key = event['model_s3_key']
         customer_data = event['customer_data']
-        
-        # Load model from S3
-        s3 = boto3.client('s3')
-        bucket = 'churn-bucket'
-        
-        obj = s3.get_object(Bucket=bucket, Key=model_s3_key)
-        model_data = joblib.load(BytesIO(obj['Body'].read()))
-        
-        model = model_data['model']
-        scaler = model_data['scaler']
-        
-        # Prepare input data
-        df = pd.DataFrame([customer_data])
-        
-        # Feature engineering (simplified)
-        if 'tenure' in df.columns:
-            df['tenure_group'] = pd.cut(df['tenure'], bins=5, labels=[0, 1, 2, 3, 4])
-        
-        # One-hot encoding for categorical variables
-        categorical_cols = ['Contract', 'InternetService', 'PaymentMethod']
-        for col in categorical_cols:
-            if col in df.columns:
-                dummies = pd.get_dummies(df[col], prefix=col)
-                df = pd.concat([df, dummies], axis=1)
-                df.drop(col, axis=1, inplace=True)
-        
-        # Binary encoding
-        binary_cols = ['gender', 'Partner', 'Dependents', 'PhoneService', 'PaperlessBilling']
-        for col in binary_cols:
-            if col in df.columns:
-                df[col] = df[col].map({'Yes': 1, 'No': 0, 'Male': 1, 'Female': 0})
-        
-        # Handle missing columns (align with training data)
-        # This is simplified - in production, you'd save the feature columns
-        expected_features = 20  # Approximate number of features after preprocessing
-        current_features = len(df.columns)
-        
-        if current_features < expected_features:
-            for i in range(expected_features - current_features):
-                df[f'missing_feature_{i}'] = 0
-        
-        # Scale features
-        X = scaler.transform(df.select_dtypes(include=[np.number]))
-        
-        # Make prediction
-        probability = model.predict_proba(X)[0][1]
-        prediction = model.predict(X)[0]
-        
-        # SHAP explanation (simplified)
-        try:
-            explainer = shap.Explainer(model)
-            shap_values = explainer(X)
-            top_features = {
-                f'feature_{i}': float(shap_values.values[0][i]) 
-                for i in range(min(5, len(shap_values.values[0])))
-            }
-        except:
-            top_features = {}
-        
-        return {
-            'statusCode': 200,
-            'body': {
+        batched = isinstance(customer_data, list)
+        records = customer_data if batched else [customer_data]
+
+        cache_key, bundle = load_bundle(model_s3_key)
+        model = bundle['model']
+
+        X, feature_names = prepare_features(records, bundle, cache_key)
+        X = bundle['scaler'].transform(X)
+
+        # Small batches go through the compiled trees when the bundle has them
+        probabilities = predict_positive(model, X, get_compiled(cache_key, bundle))
+        predictions = (probabilities > 0.5).astype(int)
+
+        explanations = top_contributions(get_explainer(cache_key, bundle, feature_names), X)
+
+        results = [
+            {
                 'prediction': int(prediction),
                 'probability': float(probability),
-                'shap_values': top_features
+                'shap_values': shap_values
             }
+            for prediction, probability, shap_values in zip(predictions, probabilities, explanations)
+        ]
+
+        return {
+            'statusCode': 200,
+            'body': {'predictions': results} if batched else results[0]
         }
-        
+
     except Exception as e:
         return {
             'statusCode': 500,
             'body': {
                 'error': str(e)
             }
-        }
\ No newline at end of file
+        }
@@ -3,6 +3,8 @@ import redis
 import uuid
 import random
 import os
+# Copied next to this handler when the function is bundled; see shared_modules.txt
+from ml_app.utils.stream_keys import STREAM_KEY, STREAM_MAXLEN
 
 def handler(event, context):
     """Generate simulated telecom events"""
@@ -43,9 +45,8 @@ def handler(event, context):
         event['timestamp'] = context.aws_request_id if context else str(uuid.uuid4())
         event['event_id'] = str(uuid.uuid4())
         
-        # Push to Redis stream
-        r.lpush('telecom_events', json.dumps(event))
-        r.expire('telecom_events', 300)  # 5 minute TTL
+        # Append to the Redis stream; consumers in the churn-scorers group ack each entry
+        r.xadd(STREAM_KEY, {'payload': json.dumps(event)}, maxlen=STREAM_MAXLEN, approximate=True)
         
         return {
             'statusCode': 200,
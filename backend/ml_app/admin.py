@@ -14,8 +14,9 @@ class ModelVersionAdmin(admin.ModelAdmin):
 
 @admin.register(TrainingLog)
 class TrainingLogAdmin(admin.ModelAdmin):
-    list_display = ['step', 'status', 'timestamp', 'model']
-    list_filter = ['status', 'timestamp']
+    list_display = ['step', 'status', 'duration_ms', 'rows', 'job_id', 'timestamp', 'model']
+    list_filter = ['status', 'step', 'timestamp']
+    search_fields = ['job_id']
 
 @admin.register(PredictionsRisk)
 class PredictionsRiskAdmin(admin.ModelAdmin):
@@ -4,14 +4,21 @@ import json
 import os
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.ensemble import RandomForestClassifier, VotingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
-import joblib
 from datetime import datetime
 from django.conf import settings
+from .dataset_dtypes import read_dataset
+from .progress import TrainingProgress
+from .training_summary import save_training_summary
+from .utils.importance import compute_feature_importance
+from .utils.model_selection import parse_time_budget, successive_halving
+from .utils.artifacts import save_artifact
+from .utils.compiled_trees import try_compile
+from .utils.early_stopping import fit_with_early_stopping, fit_boosting, grow_forest, validation_split
 import time
 import warnings
 warnings.filterwarnings('ignore')
@@ -40,10 +47,16 @@ def advanced_train_models(request):
             data = json.loads(request.body)
             dataset_id = data.get('dataset_id')
             selected_models = data.get('models', ['random_forest', 'logistic'])
+            job_id = data.get('job_id')
             use_hyperopt = data.get('hyperparameter_optimization', False)
             use_ensemble = data.get('ensemble_methods', False)
             use_neural_network = data.get('neural_network', False)
             
+            try:
+                time_budget = parse_time_budget(data.get('time_budget'), getattr(settings, 'AUTOML_TIME_BUDGET', None))
+            except ValueError as e:
+                return JsonResponse({'error': str(e)}, status=400)
+            
             # Load dataset
             metadata_dir = os.path.join(settings.BASE_DIR, 'dataset_metadata')
             metadata_path = os.path.join(metadata_dir, f'{dataset_id}.json')
@@ -54,14 +67,18 @@ def advanced_train_models(request):
             with open(metadata_path, 'r') as f:
                 metadata = json.load(f)
             
+            progress = TrainingProgress(job_id, total_stages=4 + len(selected_models))
+            
             file_path = metadata['file_path']
             try:
-                if file_path.endswith('.csv'):
-                    df = pd.read_csv(file_path)
-                elif file_path.endswith(('.xlsx', '.xls')):
-                    df = pd.read_excel(file_path)
-                else:
-                    return JsonResponse({'error': 'Unsupported file format'}, status=400)
+                with progress.stage('data_loading') as stage:
+                    if file_path.endswith('.csv'):
+                        df = read_dataset(file_path, dataset_id)
+                    elif file_path.endswith(('.xlsx', '.xls')):
+                        df = pd.read_excel(file_path)
+                    else:
+                        return JsonResponse({'error': 'Unsupported file format'}, status=400)
+                    stage['rows'] = len(df)
             except:
                 return JsonResponse({'error': 'Failed to read dataset'}, status=400)
             
@@ -80,19 +97,22 @@ def advanced_train_models(request):
             
             # Data preprocessing
             original_rows = len(df)
-            df = df.dropna(how='all').drop_duplicates()
-            
-            for col in df.columns:
-                if df[col].dtype in ['int64', 'float64']:
-                    df[col] = df[col].fillna(df[col].median())
-                else:
-                    mode_val = df[col].mode()[0] if len(df[col].mode()) > 0 else 'Unknown'
-                    df[col] = df[col].fillna(mode_val)
+            with progress.stage('data_cleaning', rows=original_rows) as stage:
+                df = df.dropna(how='all').drop_duplicates()
+                
+                for col in df.columns:
+                    if pd.api.types.is_numeric_dtype(df[col]):
+                        df[col] = df[col].fillna(df[col].median())
+                    else:
+                        mode_val = df[col].mode()[0] if len(df[col].mode()) > 0 else 'Unknown'
+                        df[col] = df[col].fillna(mode_val)
+                stage['rows'] = len(df)
             
             results['training_steps'].append({
                 'step': 'data_cleaning',
                 'status': 'completed',
-                'details': f'Processed {original_rows} → {len(df)} rows'
+                'details': f'Processed {original_rows} → {len(df)} rows',
+                'duration_ms': stage['duration_ms']
             })
             
             # Feature engineering
@@ -103,7 +123,7 @@ def advanced_train_models(request):
                 col_lower = col.lower().replace(' ', '').replace('_', '')
                 if any(pattern in col_lower for pattern in id_patterns):
                     columns_to_drop.append(col)
-                elif df[col].dtype == 'object' and df[col].nunique() > len(df) * 0.7:
+                elif not pd.api.types.is_numeric_dtype(df[col]) and df[col].nunique() > len(df) * 0.7:
                     columns_to_drop.append(col)
             
             df = df.drop(columns=columns_to_drop)
@@ -129,30 +149,35 @@ def advanced_train_models(request):
             y = df[target_column]
             
             # Encode categorical features
-            label_encoders = {}
-            for col in X.select_dtypes(include=['object']).columns:
-                le = LabelEncoder()
-                X[col] = le.fit_transform(X[col].astype(str))
-                label_encoders[col] = le
+            with progress.stage('feature_engineering', rows=len(X)) as stage:
+                label_encoders = {}
+                for col in X.select_dtypes(include=['object', 'category']).columns:
+                    le = LabelEncoder()
+                    X[col] = le.fit_transform(X[col].astype(str))
+                    label_encoders[col] = le
             
             results['training_steps'].append({
                 'step': 'feature_engineering',
                 'status': 'completed',
-                'details': f'Processed {X.shape[1]} features'
+                'details': f'Processed {X.shape[1]} features',
+                'duration_ms': stage['duration_ms']
             })
             
             # Train-test split
-            test_size = 0.3 if len(df) < 50 else 0.2
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=test_size, random_state=42, stratify=y
-            )
-            
-            # Feature scaling
-            scaler = StandardScaler()
-            X_train_scaled = scaler.fit_transform(X_train)
-            X_test_scaled = scaler.transform(X_test)
+            with progress.stage('split_and_scale', rows=len(X)) as stage:
+                test_size = 0.3 if len(df) < 50 else 0.2
+                X_train, X_test, y_train, y_test = train_test_split(
+                    X, y, test_size=test_size, random_state=42, stratify=y
+                )
+                
+                # Feature scaling
+                scaler = StandardScaler()
+                X_train_scaled = scaler.fit_transform(X_train)
+                X_test_scaled = scaler.transform(X_test)
+                stage['rows'] = len(X_train)
             
             trained_models = []
+            fitted = {}
             
             # Basic models
             basic_models = {
@@ -167,6 +192,20 @@ def advanced_train_models(request):
                 basic_models['lightgbm'] = LGBMClassifier(random_state=42, verbose=-1)
                 basic_models['catboost'] = CatBoostClassifier(random_state=42, verbose=False)
             
+            # Large splits pick a winner on stratified samples; only it is tuned and refit on all rows
+            halving = None
+            candidates = {name: basic_models[name] for name in selected_models if name in basic_models}
+            selection = data.get('selection') or (
+                'successive_halving' if len(X_train) > getattr(settings, 'AUTOML_HALVING_ROWS', 100000) else 'full'
+            )
+            if selection == 'successive_halving' and len(candidates) > 1:
+                halving = successive_halving(
+                    candidates, X_train_scaled, y_train, metric='accuracy',
+                    time_budget=time_budget,
+                    progress=progress
+                )
+                selected_models = [halving['winner']]
+            
             # Train basic models
             for model_name in selected_models:
                 if model_name not in basic_models:
@@ -176,11 +215,13 @@ def advanced_train_models(request):
                     start_time = time.time()
                     model = basic_models[model_name]
                     
-                    if use_hyperopt and ADVANCED_ML_AVAILABLE:
-                        # Hyperparameter optimization with Optuna
-                        model = optimize_hyperparameters(model, model_name, X_train_scaled, y_train)
-                    
-                    model.fit(X_train_scaled, y_train)
+                    with progress.stage(f'fit_{model_name}', rows=len(X_train)):
+                        if use_hyperopt and ADVANCED_ML_AVAILABLE:
+                            # Hyperparameter optimization with Optuna
+                            model = optimize_hyperparameters(model, model_name, X_train_scaled, y_train)
+                        
+                        # Ensembles grow only until validation (or out-of-bag) score stops improving
+                        model, n_estimators = fit_with_early_stopping(model, X_train_scaled, y_train)
                     y_pred = model.predict(X_test_scaled)
                     
                     accuracy = accuracy_score(y_test, y_pred)
@@ -203,29 +244,33 @@ def advanced_train_models(request):
                         'f1_score': float(f1),
                         'auc_score': float(auc),
                         'training_time': float(training_time),
+                        'n_estimators': n_estimators,
                         'hyperopt_used': use_hyperopt
                     }
                     
                     trained_models.append(model_result)
+                    fitted[model_name] = model
                     
                     # Save model
                     models_dir = os.path.join(settings.BASE_DIR, 'trained_models')
                     os.makedirs(models_dir, exist_ok=True)
-                    model_path = os.path.join(models_dir, f'{dataset_id}_{model_name}.joblib')
+                    model_path = os.path.join(models_dir, f'{dataset_id}_{model_name}')
                     
-                    joblib.dump({
+                    save_artifact(model_path, {
                         'model': model,
                         'scaler': scaler,
                         'label_encoders': label_encoders,
                         'feature_names': list(X.columns),
-                        'target_column': target_column
-                    }, model_path)
+                        'target_column': target_column,
+                        'compiled': try_compile(model)
+                    }, metrics=model_result)
                     
                 except Exception as e:
                     print(f"Error training {model_name}: {str(e)}")
                     continue
             
             if not trained_models:
+                progress.fail('All models failed to train')
                 return JsonResponse({'error': 'All models failed to train'}, status=400)
             
             results['training_steps'].append({
@@ -236,6 +281,29 @@ def advanced_train_models(request):
             
             # Sort by accuracy
             trained_models.sort(key=lambda x: x['accuracy'], reverse=True)
+            
+            # Eliminated candidates keep their sample scores, listed after the refitted winner
+            if halving:
+                eliminated = [name for name in halving['leaderboard'] if name != halving['winner']]
+                for name in sorted(eliminated, key=lambda n: halving['leaderboard'][n]['accuracy'], reverse=True):
+                    entry = halving['leaderboard'][name]
+                    trained_models.append({
+                        'name': name,
+                        'accuracy': entry['accuracy'],
+                        'f1_score': entry['f1_score'],
+                        'auc_score': entry['auc_score'],
+                        'training_time': entry['fit_seconds'],
+                        'hyperopt_used': False,
+                        'selection_rows': entry['rows']
+                    })
+                results['model_selection'] = {
+                    'mode': selection,
+                    'rungs': halving['rungs'],
+                    'seconds': halving['seconds'],
+                    # The budget bounds the search only; the winner's tuning and refit run after it
+                    'time_budget': time_budget,
+                    'refit_in_budget': False
+                }
             results['models'] = trained_models
             results['best_model'] = trained_models[0]['name']
             
@@ -245,14 +313,28 @@ def advanced_train_models(request):
                 'details': f'Best: {results["best_model"]} ({trained_models[0]["accuracy"]:.3f})'
             })
             
+            # Global importance of the best model, stored with the training results
+            progress.total_stages += 1
+            with progress.stage('feature_importance', rows=len(X_test)):
+                results['feature_importance'] = compute_feature_importance(
+                    fitted[results['best_model']], X_test_scaled, np.asarray(y_test),
+                    list(X.columns), background=X_train_scaled
+                )
+            save_training_summary(dataset_id, trained_models, results['best_model'],
+                                  results['feature_importance'], target_column)
+            
             # Update metadata
             metadata['training_status'] = 'completed'
             metadata['training_results'] = results
             metadata['trained_at'] = datetime.now().isoformat()
             
+            results['stage_timings'] = progress.timings
+            
             with open(metadata_path, 'w') as f:
                 json.dump(metadata, f, indent=2)
             
+            progress.complete(best_model=results['best_model'])
+            
             return JsonResponse({
                 'success': True,
                 'results': results
@@ -269,19 +351,27 @@ def advanced_train_models(request):
     })
 
 def optimize_hyperparameters(model, model_name, X_train, y_train):
-    """Optimize hyperparameters using Optuna"""
+    """
+    Optimize hyperparameters using Optuna.
+    
+    Ensemble size is not searched: each trial grows its forest by warm start
+    (scored out of bag) or early-stops its booster on one validation split,
+    and the final fit does the same.
+    """
+    X_fit, X_val, y_fit, y_val = validation_split(X_train, y_train)
+    
     def objective(trial):
         if model_name == 'random_forest':
             params = {
-                'n_estimators': trial.suggest_int('n_estimators', 50, 200),
                 'max_depth': trial.suggest_int('max_depth', 3, 20),
                 'min_samples_split': trial.suggest_int('min_samples_split', 2, 20),
                 'min_samples_leaf': trial.suggest_int('min_samples_leaf', 1, 10)
             }
             model_trial = RandomForestClassifier(random_state=42, **params)
+            trial.set_user_attr('n_estimators', grow_forest(model_trial, X_train, y_train))
+            return model_trial.oob_score_
         elif model_name == 'xgboost' and XGBOOST_AVAILABLE:
             params = {
-                'n_estimators': trial.suggest_int('n_estimators', 50, 200),
                 'max_depth': trial.suggest_int('max_depth', 3, 10),
                 'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3),
                 'subsample': trial.suggest_float('subsample', 0.6, 1.0)
@@ -289,7 +379,6 @@ def optimize_hyperparameters(model, model_name, X_train, y_train):
             model_trial = XGBClassifier(random_state=42, eval_metric='logloss', **params)
         elif model_name == 'lightgbm':
             params = {
-                'n_estimators': trial.suggest_int('n_estimators', 50, 200),
                 'max_depth': trial.suggest_int('max_depth', 3, 10),
                 'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3),
                 'num_leaves': trial.suggest_int('num_leaves', 10, 100)
@@ -298,9 +387,9 @@ def optimize_hyperparameters(model, model_name, X_train, y_train):
         else:
             return 0.0
         
-        # Cross-validation score
-        scores = cross_val_score(model_trial, X_train, y_train, cv=3, scoring='accuracy')
-        return scores.mean()
+        # Validation score of the early-stopped booster
+        trial.set_user_attr('n_estimators', fit_boosting(model_trial, X_fit, y_fit, X_val, y_val))
+        return accuracy_score(y_val, model_trial.predict(X_val))
     
     try:
         study = optuna.create_study(direction='maximize')
@@ -1,6 +1,7 @@
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
+from .training_summary import stored_feature_importance
 
 @csrf_exempt
 def get_analytics(request, dataset_id):
@@ -34,6 +35,8 @@ def get_analytics(request, dataset_id):
                     'Fiber optic customers show higher churn tendency',
                     'Longer tenure customers are more likely to stay'
                 ],
+                # Stored at training time; empty until the dataset has been trained
+                'feature_importance': stored_feature_importance(dataset_id),
                 'customer_segments': [
                     {'segment': 'High Risk', 'count': 1869, 'churn_rate': 100, 'avg_charges': 74.44},
                     {'segment': 'Medium Risk', 'count': 2587, 'churn_rate': 15.2, 'avg_charges': 61.27},
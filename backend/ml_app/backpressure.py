@@ -0,0 +1,169 @@
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from itertools import count
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+logger = logging.getLogger(__name__)
+
+# Live per-connection metrics, keyed by channel name
+CONNECTION_METRICS = {}
+
+
+class BoundedOutbox:
+    """
+    Bounded FIFO of outgoing frames for a single websocket connection.
+
+    Keyed frames are latest-wins: a newer frame with the same key replaces the
+    queued one instead of growing the queue. When the outbox is full the oldest
+    non-critical frame is dropped, so a slow client never grows server memory
+    and alerts survive; critical frames are only dropped once nothing else is
+    left to evict.
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._frames = OrderedDict()
+        self._ready = asyncio.Event()
+        self._seq = count()
+        self._critical = set()
+        self.stats = {
+            'enqueued': 0,
+            'sent': 0,
+            'dropped': 0,
+            'coalesced': 0,
+            'max_depth': 0,
+            'last_lag_ms': 0.0,
+            'max_lag_ms': 0.0,
+            'total_lag_ms': 0.0,
+        }
+
+    def __len__(self):
+        return len(self._frames)
+
+    def put(self, text, key=None, critical=False):
+        """Queue a frame without ever blocking the producer"""
+        self.stats['enqueued'] += 1
+
+        if key is not None and key in self._frames:
+            # Latest wins: keep only the newest snapshot for this key
+            del self._frames[key]
+            self._critical.discard(key)
+            self.stats['coalesced'] += 1
+        elif len(self._frames) >= self.maxsize:
+            victim = next((k for k in self._frames if k not in self._critical), next(iter(self._frames)))
+            del self._frames[victim]
+            self._critical.discard(victim)
+            self.stats['dropped'] += 1
+
+        if key is None:
+            key = ('_frame', next(self._seq))
+        if critical:
+            self._critical.add(key)
+
+        self._frames[key] = (text, time.monotonic())
+        self.stats['max_depth'] = max(self.stats['max_depth'], len(self._frames))
+        self._ready.set()
+
+    async def get(self):
+        """Wait for the oldest queued frame and return its text"""
+        while not self._frames:
+            self._ready.clear()
+            await self._ready.wait()
+
+        key, (text, queued_at) = self._frames.popitem(last=False)
+        self._critical.discard(key)
+        lag_ms = (time.monotonic() - queued_at) * 1000
+        self.stats['last_lag_ms'] = lag_ms
+        self.stats['max_lag_ms'] = max(self.stats['max_lag_ms'], lag_ms)
+        self.stats['total_lag_ms'] += lag_ms
+        return text
+
+    def metrics(self):
+        sent = self.stats['sent']
+        return {
+            'depth': len(self._frames),
+            'enqueued': self.stats['enqueued'],
+            'sent': sent,
+            'dropped': self.stats['dropped'],
+            'coalesced': self.stats['coalesced'],
+            'max_depth': self.stats['max_depth'],
+            'last_lag_ms': round(self.stats['last_lag_ms'], 2),
+            'max_lag_ms': round(self.stats['max_lag_ms'], 2),
+            'avg_lag_ms': round(self.stats['total_lag_ms'] / sent, 2) if sent else 0.0,
+        }
+
+
+class BackpressureConsumer(AsyncWebsocketConsumer):
+    """
+    Base consumer that decouples producers from the socket.
+
+    Producers call ``queue_json`` and never await the client; a single writer
+    task drains the bounded outbox. Background loops started with
+    ``start_task`` are cancelled when the client disconnects.
+    """
+
+    outbox_size = 32
+    send_timeout = 5.0
+    max_slow_sends = 3
+
+    async def websocket_connect(self, message):
+        self.outbox = BoundedOutbox(self.outbox_size)
+        self._tasks = []
+        self._slow_sends = 0
+        self._writer_task = asyncio.create_task(self._drain_outbox())
+        await super().websocket_connect(message)
+
+    async def websocket_disconnect(self, message):
+        await self.cancel_tasks()
+        await super().websocket_disconnect(message)
+
+    def start_task(self, coro):
+        """Run a producer loop for the lifetime of this connection"""
+        task = asyncio.create_task(coro)
+        self._tasks.append(task)
+        return task
+
+    def queue_json(self, payload, key=None, critical=False):
+        """Serialize a payload into the outbox; ``key`` enables latest-wins, ``critical`` survives overflow"""
+        self.outbox.put(json.dumps(payload), key=key, critical=critical)
+
+    def connection_metrics(self):
+        return self.outbox.metrics()
+
+    async def cancel_tasks(self):
+        tasks = list(getattr(self, '_tasks', []))
+        writer = getattr(self, '_writer_task', None)
+        if writer is not None:
+            tasks.append(writer)
+
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._writer_task = None
+
+        if hasattr(self, 'outbox'):
+            logger.info("Websocket %s closed: %s", self.channel_name, self.outbox.metrics())
+        CONNECTION_METRICS.pop(self.channel_name, None)
+
+    async def _drain_outbox(self):
+        while True:
+            text = await self.outbox.get()
+            try:
+                await asyncio.wait_for(self.send(text_data=text), self.send_timeout)
+            except asyncio.TimeoutError:
+                self.outbox.stats['dropped'] += 1
+                self._slow_sends += 1
+                if self._slow_sends >= self.max_slow_sends:
+                    logger.warning("Closing slow websocket consumer %s", self.channel_name)
+                    await self.close(code=1013)
+                    return
+                continue
+
+            self._slow_sends = 0
+            self.outbox.stats['sent'] += 1
+            CONNECTION_METRICS[self.channel_name] = self.outbox.metrics()
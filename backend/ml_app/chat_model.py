@@ -0,0 +1,320 @@
+import time
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from multiprocessing.connection import Listener, Client
+
+# Nothing in this module imports transformers/torch at import time: the model is
+# only loaded inside the inference server (`manage.py chat_server`). Web workers
+# just connect to it. Kept free of Django imports.
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of every linear projection for CPU inference"""
+    import torch
+    from transformers.pytorch_utils import Conv1D
+
+    # GPT-2 style models implement their projections as Conv1D, which
+    # quantize_dynamic does not recognise; swap them for equivalent Linear layers
+    for parent in list(model.modules()):
+        for name, child in list(parent.named_children()):
+            if isinstance(child, Conv1D):
+                in_features, out_features = child.weight.shape
+                linear = torch.nn.Linear(in_features, out_features)
+                linear.weight.data = child.weight.data.t().contiguous()
+                linear.bias.data = child.bias.data
+                setattr(parent, name, linear)
+
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_pipeline(model_name, quantize, **generate_kwargs):
+    from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForCausalLM.from_pretrained(model_name)
+
+    # Add padding token if not present; decoder-only models pad on the left for batching
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = 'left'
+
+    if quantize:
+        model = quantize_int8(model)
+
+    return pipeline(
+        "text-generation",
+        model=model,
+        tokenizer=tokenizer,
+        do_sample=True,
+        pad_token_id=tokenizer.eos_token_id,
+        **generate_kwargs
+    )
+
+
+def initialize_full_model(quantize=False):
+    """DialoGPT-medium, better conversations but slower and ~1.5 GB in RAM"""
+    return _load_pipeline("microsoft/DialoGPT-medium", quantize, max_length=200, temperature=0.7)
+
+
+def initialize_lightweight_model(quantize=False):
+    """DistilGPT-2 for faster responses"""
+    return _load_pipeline("distilgpt2", quantize, max_length=150, temperature=0.8)
+
+
+MODEL_VARIANTS = {
+    'full': initialize_full_model,
+    'lightweight': initialize_lightweight_model,
+}
+
+
+class ResponseCache:
+    """Small LRU with per-entry expiry for generated responses"""
+
+    def __init__(self, max_size=1024, ttl=3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            text, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return text
+
+    def set(self, key, text):
+        with self._lock:
+            self._entries[key] = (text, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+class ChatModelUnavailable(RuntimeError):
+    """The inference server is not running, or its model is still loading or failed to load"""
+
+
+class ModelHost:
+    """
+    Owns the generation pipeline inside the inference server; loads it on first use.
+
+    Concurrent requests are queued and a single batching thread runs them
+    through the pipeline together: it waits up to ``batch_window_ms`` after
+    the first request for up to ``max_batch_size`` prompts. Requests whose
+    latency budget ran out while queued are dropped before generation, and
+    results are cached by the caller-supplied key, including results that
+    arrive after the caller stopped waiting.
+    """
+
+    def __init__(self, variant, quantize=False, max_batch_size=8, batch_window_ms=25,
+                 cache_size=1024, cache_ttl=3600):
+        if variant not in MODEL_VARIANTS:
+            raise ValueError(f"Unknown chatbot model variant '{variant}'")
+        self.variant = variant
+        self.quantize = quantize
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window_ms / 1000
+        self.cache = ResponseCache(cache_size, cache_ttl)
+        self.stats = {'requests': 0, 'cache_hits': 0, 'batches': 0, 'expired': 0}
+        self._generator = None
+        self._load_error = None
+        self._load_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._batcher = threading.Thread(target=self._batch_loop, name='chat-batcher', daemon=True)
+        self._batcher.start()
+
+    @property
+    def ready(self):
+        return self._generator is not None
+
+    @property
+    def load_error(self):
+        return self._load_error
+
+    def generator(self):
+        with self._load_lock:
+            if self._load_error is not None:
+                raise RuntimeError(self._load_error)
+            if self._generator is None:
+                started = time.perf_counter()
+                try:
+                    self._generator = MODEL_VARIANTS[self.variant](quantize=self.quantize)
+                except Exception as e:
+                    # Remember the failure; retrying a multi-second load per request helps nobody
+                    self._load_error = f"Error loading {self.variant} chatbot model: {e}"
+                    print(self._load_error)
+                    raise RuntimeError(self._load_error)
+                print(f"Loaded {self.variant} chatbot model in {time.perf_counter() - started:.1f}s")
+        return self._generator
+
+    def generate(self, prompt, max_new_tokens=100, cache_key=None, budget=None):
+        self.stats['requests'] += 1
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.stats['cache_hits'] += 1
+                return cached
+
+        deadline = time.monotonic() + budget if budget is not None else None
+        future = Future()
+        self._queue.put((prompt, max_new_tokens, cache_key, deadline, future))
+        return future.result()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        closes_at = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            remaining = closes_at - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _batch_loop(self):
+        while True:
+            batch = self._next_batch()
+
+            now = time.monotonic()
+            live = []
+            for item in batch:
+                deadline, future = item[3], item[4]
+                if deadline is not None and deadline < now:
+                    self.stats['expired'] += 1
+                    future.set_exception(TimeoutError('Latency budget exceeded while queued'))
+                else:
+                    live.append(item)
+            if not live:
+                continue
+
+            try:
+                generator = self.generator()
+                outputs = generator(
+                    [item[0] for item in live],
+                    max_new_tokens=max(item[1] for item in live),
+                    num_return_sequences=1,
+                    batch_size=len(live)
+                )
+            except Exception as e:
+                for item in live:
+                    item[4].set_exception(e)
+                continue
+
+            self.stats['batches'] += 1
+            for item, output in zip(live, outputs):
+                text = output[0]['generated_text'] if isinstance(output, list) else output['generated_text']
+                if item[2] is not None:
+                    self.cache.set(item[2], text)
+                item[4].set_result(text)
+
+
+def _handle(host, conn):
+    try:
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except EOFError:
+                    return
+                if not host.ready:
+                    # Never queue behind a load in progress; the caller answers without the model
+                    conn.send({'unavailable': host.load_error or f'{host.variant} chatbot model is still loading'})
+                    continue
+                try:
+                    reply = {'text': host.generate(**request)}
+                except Exception as e:
+                    reply = {'error': str(e)}
+                conn.send(reply)
+    except (OSError, EOFError):
+        # Client gave up (latency budget) and closed its end
+        pass
+
+
+def _warm_up(host):
+    try:
+        host.generator()
+    except RuntimeError:
+        # Already logged; requests will get the same error back
+        pass
+
+
+def serve(address, variant, authkey, ready=None, **host_options):
+    """Run the inference server until the process exits"""
+    host = ModelHost(variant, **host_options)
+    with Listener(address, authkey=authkey) as listener:
+        if ready is not None:
+            ready.set()
+        # Start loading right away; requests arriving meanwhile wait on the load lock
+        threading.Thread(target=_warm_up, args=(host,), daemon=True).start()
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_handle, args=(host, conn), daemon=True).start()
+
+
+def parse_address(address):
+    """'host:port' for TCP, anything else is a socket/pipe path"""
+    if not address:
+        return None
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and not address.startswith('\\\\'):
+        return (host or '127.0.0.1', int(port))
+    return address
+
+
+class ChatModelClient:
+    """
+    Talks to the shared chat inference server (``manage.py chat_server``) over
+    multiprocessing.connection.
+
+    Web workers only connect; the model is never loaded in their process. If
+    the server is down, still loading or failed to load the model,
+    ``generate`` raises ChatModelUnavailable at once instead of waiting. The
+    caller never waits longer than ``latency_budget`` seconds.
+    """
+
+    def __init__(self, variant='full', address='127.0.0.1:8765', authkey=b'churnguard', latency_budget=5.0):
+        self.variant = variant
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self.latency_budget = latency_budget
+
+    @property
+    def enabled(self):
+        return self.variant in MODEL_VARIANTS
+
+    def generate(self, prompt, max_new_tokens=100, cache_key=None):
+        if not self.enabled:
+            raise RuntimeError('Chatbot model is disabled')
+        if self.address is None:
+            raise ChatModelUnavailable('No chatbot server address configured')
+
+        started = time.monotonic()
+        try:
+            conn = Client(self.address, authkey=self.authkey)
+        except OSError as e:
+            raise ChatModelUnavailable(f'Chatbot server at {self.address} is not reachable: {e}')
+        try:
+            remaining = max(self.latency_budget - (time.monotonic() - started), 0)
+            conn.send({'prompt': prompt, 'max_new_tokens': max_new_tokens,
+                       'cache_key': cache_key, 'budget': remaining})
+            if not conn.poll(remaining):
+                raise TimeoutError(f'No chatbot response within {self.latency_budget}s')
+            reply = conn.recv()
+        finally:
+            conn.close()
+
+        if 'unavailable' in reply:
+            raise ChatModelUnavailable(reply['unavailable'])
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+        return reply['text']
@@ -2,34 +2,39 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
 import os
-from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
-import torch
+import re
+import hashlib
+from django.conf import settings
+from .chat_model import ChatModelClient, ChatModelUnavailable
+from .training_summary import stored_feature_importance
 
-# Initialize the model (using a lightweight model suitable for analytics)
-try:
-    # Use DialoGPT for conversational AI or CodeT5 for technical discussions
-    model_name = "microsoft/DialoGPT-medium"  # Good for conversations
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForCausalLM.from_pretrained(model_name)
-    
-    # Add padding token if not present
-    if tokenizer.pad_token is None:
-        tokenizer.pad_token = tokenizer.eos_token
-    
-    chatbot = pipeline(
-        "text-generation",
-        model=model,
-        tokenizer=tokenizer,
-        max_length=200,
-        do_sample=True,
-        temperature=0.7,
-        pad_token_id=tokenizer.eos_token_id
-    )
-    
-    MODEL_LOADED = True
-except Exception as e:
-    print(f"Error loading Hugging Face model: {e}")
-    MODEL_LOADED = False
+_chat_client = None
+
+def chat_host_options():
+    return {
+        'quantize': getattr(settings, 'CHATBOT_QUANTIZE', False),
+        'max_batch_size': getattr(settings, 'CHATBOT_BATCH_SIZE', 8),
+        'batch_window_ms': getattr(settings, 'CHATBOT_BATCH_WINDOW_MS', 25),
+        'cache_ttl': getattr(settings, 'CHATBOT_CACHE_TTL', 3600),
+    }
+
+def get_chat_client():
+    """Create the chat model client on first use; it only connects to the chat_server process"""
+    global _chat_client
+    if _chat_client is None:
+        _chat_client = ChatModelClient(
+            variant=getattr(settings, 'CHATBOT_MODEL', 'full'),
+            address=getattr(settings, 'CHATBOT_SERVER_ADDRESS', '127.0.0.1:8765'),
+            authkey=settings.SECRET_KEY.encode(),
+            latency_budget=getattr(settings, 'CHATBOT_LATENCY_BUDGET', 5.0)
+        )
+    return _chat_client
+
+def response_cache_key(user_message, context):
+    """Same question about the same results maps to the same cached answer"""
+    question = re.sub(r'\s+', ' ', user_message.lower()).strip().rstrip('?!. ')
+    context_hash = hashlib.sha256(json.dumps(context, sort_keys=True, default=str).encode()).hexdigest()
+    return hashlib.sha256(f'{question}|{context_hash}'.encode()).hexdigest()
 
 @csrf_exempt
 def chat_with_ai(request):
@@ -42,18 +47,34 @@ def chat_with_ai(request):
             if not user_message:
                 return JsonResponse({'error': 'Message is required'}, status=400)
             
+            # Fall back to the importance stored at training time for this dataset
+            if not context.get('feature_importance') and context.get('dataset_id'):
+                context['feature_importance'] = stored_feature_importance(context['dataset_id'])
+            
             # Create context-aware prompt
             prompt = create_analytics_prompt(user_message, context)
             
-            if MODEL_LOADED:
+            client = get_chat_client()
+            model_used = 'fallback'
+            if client.enabled:
                 try:
-                    # Generate response using Hugging Face model
-                    response = chatbot(prompt, max_new_tokens=100, num_return_sequences=1)
-                    ai_response = response[0]['generated_text']
+                    # Generate response in the shared chat_server process
+                    ai_response = client.generate(
+                        prompt, max_new_tokens=100,
+                        cache_key=response_cache_key(user_message, context)
+                    )
                     
                     # Clean up the response
                     ai_response = clean_response(ai_response, prompt)
+                    model_used = 'huggingface'
                     
+                except ChatModelUnavailable as e:
+                    # The model host is down or still loading; say so rather than wait for it
+                    return JsonResponse({
+                        'error': f'Chatbot model unavailable: {e}',
+                        'response': generate_fallback_response(user_message, context),
+                        'model_used': 'fallback'
+                    }, status=503)
                 except Exception as e:
                     print(f"Model generation error: {e}")
                     ai_response = generate_fallback_response(user_message, context)
@@ -62,7 +83,7 @@ def chat_with_ai(request):
             
             return JsonResponse({
                 'response': ai_response,
-                'model_used': 'huggingface' if MODEL_LOADED else 'fallback'
+                'model_used': model_used
             })
             
         except Exception as e:
@@ -216,27 +237,3 @@ def generate_fallback_response(user_message, context):
         return "I can see your model training results! Ask me about model performance, feature importance, algorithm comparisons, or business recommendations based on your results."
     
     return "I'm here to help with your churn prediction analysis! I can discuss data quality, model performance, feature importance, and business insights. What would you like to explore?"
-
-# Alternative: Use a smaller, faster model for production
-def initialize_lightweight_model():
-    """Initialize a lightweight model for faster responses"""
-    try:
-        # Use DistilGPT-2 for faster inference
-        model_name = "distilgpt2"
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        model = AutoModelForCausalLM.from_pretrained(model_name)
-        
-        if tokenizer.pad_token is None:
-            tokenizer.pad_token = tokenizer.eos_token
-            
-        return pipeline(
-            "text-generation",
-            model=model,
-            tokenizer=tokenizer,
-            max_length=150,
-            do_sample=True,
-            temperature=0.8
-        )
-    except Exception as e:
-        print(f"Error loading lightweight model: {e}")
-        return None
\ No newline at end of file
@@ -1,32 +1,49 @@
-import json
 import asyncio
-from channels.generic.websocket import AsyncWebsocketConsumer
 from django.db import models
 from datetime import datetime, timedelta
 import random
+from .backpressure import BackpressureConsumer
 
-class CustomerMonitoringConsumer(AsyncWebsocketConsumer):
+class CustomerMonitoringConsumer(BackpressureConsumer):
     async def connect(self):
         await self.channel_layer.group_add("customer_monitoring", self.channel_name)
         await self.accept()
         
         # Start sending real-time data
-        asyncio.create_task(self.send_realtime_data())
+        self.start_task(self.send_realtime_data())
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard("customer_monitoring", self.channel_name)
 
+    async def live_metrics(self, event):
+        # Published by live_streamer.LiveDataStreamer on every polling tick
+        self.queue_json({
+            'type': 'live_metrics',
+            'data': event['data'],
+        }, key='live_metrics')
+
+    async def churn_alert(self, event):
+        # Published by event_stream.TelecomEventConsumer once per scored batch;
+        # alerts are never coalesced so each batch gets its own frame
+        self.queue_json({
+            'type': 'churn_alert',
+            'alerts': event['alerts'],
+        })
+
     async def send_realtime_data(self):
         while True:
             try:
                 # Get live customer metrics
                 data = await self.get_customer_metrics()
-                await self.send(text_data=json.dumps({
+                # Only the newest snapshot matters to a lagging client
+                self.queue_json({
                     'type': 'customer_data',
                     'data': data,
                     'timestamp': datetime.now().isoformat()
-                }))
+                }, key='customer_data')
                 await asyncio.sleep(3)  # Update every 3 seconds
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 print(f"Error sending data: {e}")
                 break
@@ -4,8 +4,11 @@ import json
 import os
 import pandas as pd
 import numpy as np
-from django.conf import settings
 from datetime import datetime
+from .dataset_catalog import get_dataset_file, absolute_path, save_cleaned, delete_dataset_files
+from .models import DatasetFile
+from .dataset_dtypes import read_dataset, load_dtype_plan
+from .utils.dtypes import memory_report
 import re
 
 # AI-powered dataset naming
@@ -63,14 +66,13 @@ def clean_dataset(request):
                 return JsonResponse({'error': 'dataset_id required'}, status=400)
             
             # Load dataset
-            uploaded_dir = os.path.join(settings.BASE_DIR, 'uploaded_datasets')
-            dataset_files = [f for f in os.listdir(uploaded_dir) if dataset_id in f]
+            record = get_dataset_file(dataset_id)
             
-            if not dataset_files:
+            if record is None:
                 return JsonResponse({'error': 'Dataset not found'}, status=404)
             
-            file_path = os.path.join(uploaded_dir, dataset_files[0])
-            df = pd.read_csv(file_path)
+            file_path = absolute_path(record.raw_path)
+            df = read_dataset(file_path, dataset_id)
             
             original_rows = len(df)
             
@@ -89,7 +91,12 @@ def clean_dataset(request):
                 if missing_count > 0:
                     cleaning_results['missing_values'][col] = int(missing_count)
                     
-                    if df[col].dtype == 'object':
+                    if isinstance(df[col].dtype, pd.CategoricalDtype):
+                        # The column may already hold real 'Unknown' values
+                        if 'Unknown' not in df[col].cat.categories:
+                            df[col] = df[col].cat.add_categories(['Unknown'])
+                        df[col] = df[col].fillna('Unknown')
+                    elif df[col].dtype == 'object':
                         df[col].fillna('Unknown', inplace=True)
                     else:
                         df[col].fillna(df[col].median(), inplace=True)
@@ -119,11 +126,8 @@ def clean_dataset(request):
             cleaning_results['cleaned_rows'] = len(df)
             cleaning_results['cleaning_summary'] = f"Dataset cleaned successfully. {sum(cleaning_results['missing_values'].values())} missing values filled, {duplicates} duplicates removed."
             
-            # Save cleaned dataset
-            cleaned_dir = os.path.join(settings.BASE_DIR, 'cleaned_datasets')
-            os.makedirs(cleaned_dir, exist_ok=True)
-            cleaned_file_path = os.path.join(cleaned_dir, f'cleaned_{dataset_files[0]}')
-            df.to_csv(cleaned_file_path, index=False)
+            # Save cleaned dataset and record it, with its listing metadata, in the catalog
+            cleaned_file_path = save_cleaned(record, df, generate_smart_dataset_name(df, record.original_name))
             
             return JsonResponse({
                 'success': True,
@@ -147,14 +151,13 @@ def perform_eda(request):
                 return JsonResponse({'error': 'dataset_id required'}, status=400)
             
             # Load dataset
-            uploaded_dir = os.path.join(settings.BASE_DIR, 'uploaded_datasets')
-            dataset_files = [f for f in os.listdir(uploaded_dir) if dataset_id in f]
+            record = get_dataset_file(dataset_id)
             
-            if not dataset_files:
+            if record is None:
                 return JsonResponse({'error': 'Dataset not found'}, status=404)
             
-            file_path = os.path.join(uploaded_dir, dataset_files[0])
-            df = pd.read_csv(file_path)
+            file_path = absolute_path(record.raw_path)
+            df = read_dataset(file_path, dataset_id)
             
             # Handle TotalCharges conversion
             if 'TotalCharges' in df.columns:
@@ -165,7 +168,8 @@ def perform_eda(request):
                 'dataset_info': {
                     'rows': len(df),
                     'columns': len(df.columns),
-                    'memory_usage': f"{df.memory_usage(deep=True).sum() / 1024 / 1024:.2f} MB"
+                    # memory_usage reflects the dtype plan the dataset was read with
+                    **memory_report(df, load_dtype_plan(dataset_id))
                 },
                 'numerical_stats': {},
                 'categorical_distribution': {},
@@ -186,7 +190,7 @@ def perform_eda(request):
                 }
             
             # Categorical distributions
-            categorical_cols = df.select_dtypes(include=['object']).columns
+            categorical_cols = df.select_dtypes(include=['object', 'category']).columns
             for col in categorical_cols:
                 if col != 'customerID':  # Skip ID columns
                     value_counts = df[col].value_counts().head(10)  # Top 10 values
@@ -195,7 +199,7 @@ def perform_eda(request):
             # Correlations with target variable (if exists)
             if 'Churn' in df.columns:
                 # Convert Churn to binary
-                df['Churn_Binary'] = df['Churn'].map({'Yes': 1, 'No': 0})
+                df['Churn_Binary'] = df['Churn'].astype(object).map({'Yes': 1, 'No': 0})
                 
                 correlations = {}
                 for col in numerical_cols:
@@ -230,37 +234,25 @@ def perform_eda(request):
 def get_cleaned_datasets(request):
     if request.method == 'GET':
         try:
-            cleaned_dir = os.path.join(settings.BASE_DIR, 'cleaned_datasets')
-            
-            if not os.path.exists(cleaned_dir):
-                return JsonResponse([], safe=False)
-            
-            datasets = []
-            for filename in os.listdir(cleaned_dir):
-                if filename.endswith('.csv'):
-                    file_path = os.path.join(cleaned_dir, filename)
-                    try:
-                        df = pd.read_csv(file_path)
-                        # Generate smart metadata
-                        smart_metadata = generate_smart_dataset_name(df, filename)
-                        
-                        # Extract dataset ID from filename
-                        dataset_id = filename.replace('cleaned_', '').replace('.csv', '')
-                        datasets.append({
-                            'id': dataset_id,
-                            'name': filename,
-                            'display_name': smart_metadata['display_name'],
-                            'dataset_type': smart_metadata['dataset_type'],
-                            'domain': smart_metadata['domain'],
-                            'rows': len(df),
-                            'columns': len(df.columns),
-                            'size': f"{os.path.getsize(file_path) / 1024 / 1024:.2f} MB",
-                            'cleaned_at': datetime.now().strftime('%Y-%m-%d'),
-                            'created_at': datetime.now().isoformat()
-                        })
-                    except Exception as e:
-                        print(f"Error reading {filename}: {str(e)}")
-                        continue
+            # Listed from the catalog alone; files from before it are cataloged
+            # once by the backfill_datasets management command
+            records = DatasetFile.objects.exclude(cleaned_path='').exclude(cleaned_at=None).order_by('-cleaned_at')
+            datasets = [
+                {
+                    'id': record.dataset_id,
+                    'name': os.path.basename(record.cleaned_path),
+                    'display_name': record.display_name or record.original_name,
+                    'dataset_type': record.dataset_type,
+                    'domain': record.domain,
+                    'rows': record.rows,
+                    'columns': record.columns,
+                    'size': f"{(record.cleaned_size or 0) / 1024 / 1024:.2f} MB",
+                    'version': record.version,
+                    'cleaned_at': record.cleaned_at.strftime('%Y-%m-%d'),
+                    'created_at': record.uploaded_at.isoformat()
+                }
+                for record in records
+            ]
             
             return JsonResponse(datasets, safe=False)
             
@@ -274,15 +266,13 @@ def get_cleaned_datasets(request):
 def get_dataset_details(request, dataset_id):
     if request.method == 'GET':
         try:
-            # Check uploaded datasets first
-            uploaded_dir = os.path.join(settings.BASE_DIR, 'uploaded_datasets')
-            dataset_files = [f for f in os.listdir(uploaded_dir) if dataset_id in f]
+            record = get_dataset_file(dataset_id)
             
-            if not dataset_files:
+            if record is None:
                 return JsonResponse({'error': 'Dataset not found'}, status=404)
             
-            file_path = os.path.join(uploaded_dir, dataset_files[0])
-            df = pd.read_csv(file_path)
+            file_path = absolute_path(record.raw_path)
+            df = read_dataset(file_path, dataset_id)
             
             # Handle TotalCharges conversion for telco data
             if 'TotalCharges' in df.columns:
@@ -290,7 +280,7 @@ def get_dataset_details(request, dataset_id):
             
             dataset_info = {
                 'id': dataset_id,
-                'name': dataset_files[0],
+                'name': os.path.basename(record.raw_path),
                 'rows': len(df),
                 'columns': len(df.columns),
                 'size': f"{os.path.getsize(file_path) / 1024 / 1024:.2f} MB",
@@ -311,23 +301,9 @@ def get_dataset_details(request, dataset_id):
 def delete_dataset(request, dataset_id):
     if request.method == 'DELETE':
         try:
-            # Delete from uploaded datasets
-            uploaded_dir = os.path.join(settings.BASE_DIR, 'uploaded_datasets')
-            dataset_files = [f for f in os.listdir(uploaded_dir) if dataset_id in f]
-            
-            for file in dataset_files:
-                file_path = os.path.join(uploaded_dir, file)
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-            
-            # Delete from cleaned datasets
-            cleaned_dir = os.path.join(settings.BASE_DIR, 'cleaned_datasets')
-            if os.path.exists(cleaned_dir):
-                cleaned_files = [f for f in os.listdir(cleaned_dir) if dataset_id in f]
-                for file in cleaned_files:
-                    file_path = os.path.join(cleaned_dir, file)
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
+            # Uploaded, cleaned and columnar copies plus the catalog entry
+            if not delete_dataset_files(dataset_id):
+                return JsonResponse({'error': 'Dataset not found'}, status=404)
             
             return JsonResponse({'success': True, 'message': 'Dataset deleted successfully'})
             
@@ -0,0 +1,162 @@
+import os
+import hashlib
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .dataset_dtypes import dtype_plan_path
+from .models import DatasetFile
+
+UPLOADED_DIR = 'uploaded_datasets'
+CLEANED_DIR = 'cleaned_datasets'
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+def absolute_path(relative_path):
+    return os.path.join(settings.BASE_DIR, relative_path) if relative_path else ''
+
+
+def file_checksum(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_upload(dataset_id, uploaded_file):
+    """
+    Write an uploaded CSV into uploaded_datasets/ and catalog it.
+
+    Size, checksum and row count are taken from the chunks while they are
+    written, so the file is never read back.
+    """
+    relative_path = os.path.join(UPLOADED_DIR, f"{dataset_id}_{uploaded_file.name}")
+    path = absolute_path(relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = newlines = 0
+    last = b''
+    with open(path, 'wb+') as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+            digest.update(chunk)
+            size += len(chunk)
+            newlines += chunk.count(b'\n')
+            last = chunk[-1:] or last
+
+    # Lines minus the header; a last line without a trailing newline still counts
+    rows = max(newlines - 1 + (1 if last and last != b'\n' else 0), 0)
+
+    return DatasetFile.objects.create(
+        dataset_id=dataset_id,
+        original_name=uploaded_file.name,
+        raw_path=relative_path,
+        raw_size=size,
+        raw_checksum=digest.hexdigest(),
+        rows=rows
+    )
+
+
+def register_legacy_uploads():
+    """
+    Catalog files uploaded before the catalog existed.
+
+    The id is the filename up to its first underscore, as save_upload
+    writes it. Run once by the backfill_datasets command; lookups only
+    read the catalog. Returns the number of records created.
+    """
+    uploaded_dir = absolute_path(UPLOADED_DIR)
+    if not os.path.isdir(uploaded_dir):
+        return 0
+    known = set(DatasetFile.objects.values_list('dataset_id', flat=True))
+
+    created = 0
+    for filename in sorted(os.listdir(uploaded_dir)):
+        dataset_id, _, original_name = filename.partition('_')
+        if not original_name or dataset_id in known:
+            continue
+        raw_path = os.path.join(UPLOADED_DIR, filename)
+        cleaned_path = os.path.join(CLEANED_DIR, f"cleaned_{filename}")
+        has_cleaned = os.path.exists(absolute_path(cleaned_path))
+        with transaction.atomic():
+            _, was_created = DatasetFile.objects.get_or_create(
+                dataset_id=dataset_id,
+                defaults={
+                    'original_name': original_name,
+                    'raw_path': raw_path,
+                    'raw_size': os.path.getsize(absolute_path(raw_path)),
+                    'cleaned_path': cleaned_path if has_cleaned else '',
+                    'cleaned_size': os.path.getsize(absolute_path(cleaned_path)) if has_cleaned else None,
+                }
+            )
+        known.add(dataset_id)
+        created += was_created
+    return created
+
+
+def get_dataset_file(dataset_id):
+    """Catalog entry for a dataset id, or None; ids must match exactly"""
+    if not dataset_id:
+        return None
+    return DatasetFile.objects.filter(dataset_id=dataset_id).first()
+
+
+def dataset_path(dataset_id, prefer_cleaned=False):
+    """Absolute path of a dataset's raw file, or of its cleaned copy when asked and available"""
+    record = get_dataset_file(dataset_id)
+    if record is None:
+        return None
+    if prefer_cleaned and record.cleaned_path:
+        return absolute_path(record.cleaned_path)
+    return absolute_path(record.raw_path)
+
+
+def save_cleaned(record, df, smart_metadata=None):
+    """
+    Write the cleaned frame (CSV plus a Parquet copy when pyarrow is installed),
+    bump the version and store the listing metadata alongside it.
+    """
+    filename = os.path.basename(record.raw_path)
+    cleaned_path = os.path.join(CLEANED_DIR, f"cleaned_{filename}")
+    path = absolute_path(cleaned_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_csv(path, index=False)
+
+    columnar_path = ''
+    if PARQUET_AVAILABLE:
+        columnar_path = os.path.splitext(cleaned_path)[0] + '.parquet'
+        df.to_parquet(absolute_path(columnar_path), index=False)
+
+    record.cleaned_path = cleaned_path
+    record.cleaned_size = os.path.getsize(path)
+    record.cleaned_checksum = file_checksum(path)
+    record.columnar_path = columnar_path
+    record.rows = len(df)
+    record.columns = len(df.columns)
+    record.version += 1
+    record.cleaned_at = timezone.now()
+    if smart_metadata:
+        record.display_name = smart_metadata.get('display_name', '')
+        record.dataset_type = smart_metadata.get('dataset_type', '')
+        record.domain = smart_metadata.get('domain', '')
+    record.save()
+    return path
+
+
+def delete_dataset_files(dataset_id):
+    """Remove every file of a dataset and its catalog entry; returns False if unknown"""
+    record = get_dataset_file(dataset_id)
+    if record is None:
+        return False
+    paths = [absolute_path(p) for p in (record.raw_path, record.cleaned_path, record.columnar_path)]
+    for path in paths + [dtype_plan_path(dataset_id)]:
+        if path and os.path.exists(path):
+            os.remove(path)
+    record.delete()
+    return True
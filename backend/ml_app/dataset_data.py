@@ -4,6 +4,7 @@ import json
 import os
 import pandas as pd
 from django.conf import settings
+from .dataset_dtypes import read_dataset
 
 @csrf_exempt
 def get_dataset_data(request, dataset_id):
@@ -22,12 +23,9 @@ def get_dataset_data(request, dataset_id):
         # Load dataset
         file_path = metadata['file_path']
         try:
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            elif file_path.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file_path)
-            else:
+            if not file_path.endswith(('.csv', '.xlsx', '.xls')):
                 return JsonResponse({'error': 'Unsupported file format'}, status=400)
+            df = read_dataset(file_path, dataset_id)
         except Exception as e:
             return JsonResponse({'error': f'Failed to load dataset: {str(e)}'}, status=400)
         
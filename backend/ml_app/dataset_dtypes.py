@@ -0,0 +1,55 @@
+import os
+import json
+import pandas as pd
+from django.conf import settings
+from .utils.dtypes import SAMPLE_ROWS, plan_dtypes, apply_dtype_plan, read_csv_planned, infer_csv_plan
+
+
+def dtype_plan_path(dataset_id):
+    return os.path.join(settings.BASE_DIR, 'dataset_dtypes', f'{dataset_id}.json')
+
+
+def save_dtype_plan(dataset_id, plan):
+    path = dtype_plan_path(dataset_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(plan, f, indent=2)
+    return plan
+
+
+def load_dtype_plan(dataset_id):
+    """Return the stored dtype plan for a dataset, or None if it has none yet"""
+    if not dataset_id:
+        return None
+    try:
+        with open(dtype_plan_path(dataset_id), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_dataset(file_path, dataset_id=None):
+    """
+    Read an uploaded or cleaned dataset with its dtype plan applied.
+
+    Datasets uploaded before plans existed get one inferred from a sample on
+    their first read, which is stored for every later read.
+    """
+    plan = load_dtype_plan(dataset_id)
+
+    if file_path.endswith('.csv'):
+        if plan is None:
+            plan = infer_csv_plan(file_path)
+            if dataset_id:
+                save_dtype_plan(dataset_id, plan)
+        return read_csv_planned(file_path, plan)
+
+    if file_path.endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(file_path)
+        if plan is None:
+            plan = plan_dtypes(df.head(SAMPLE_ROWS))
+            if dataset_id:
+                save_dtype_plan(dataset_id, plan)
+        return apply_dtype_plan(df, plan)
+
+    raise ValueError('Unsupported file format')
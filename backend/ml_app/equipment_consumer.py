@@ -1,21 +1,18 @@
-import json
 import asyncio
 import random
-from channels.generic.websocket import AsyncWebsocketConsumer
 from datetime import datetime
+from .backpressure import BackpressureConsumer
 
-class EquipmentMonitoringConsumer(AsyncWebsocketConsumer):
+class EquipmentMonitoringConsumer(BackpressureConsumer):
     async def connect(self):
         await self.channel_layer.group_add("equipment_monitoring", self.channel_name)
         await self.accept()
         
         # Start sending real-time data
-        self.monitoring_task = asyncio.create_task(self.send_equipment_data())
+        self.start_task(self.send_equipment_data())
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard("equipment_monitoring", self.channel_name)
-        if hasattr(self, 'monitoring_task'):
-            self.monitoring_task.cancel()
 
     async def send_equipment_data(self):
         equipment_base = [
@@ -71,12 +68,16 @@ class EquipmentMonitoringConsumer(AsyncWebsocketConsumer):
                         'baseTemp': eq['baseTemp']
                     })
                 
-                await self.send(text_data=json.dumps({
+                # Alerts go out once, as critical frames that overflow never evicts;
+                # the snapshot is latest-wins and carries only the readings
+                for alert in alerts:
+                    self.queue_json({'type': 'equipment_alert', 'alert': alert}, critical=True)
+                
+                self.queue_json({
                     'type': 'equipment_data',
                     'equipment': equipment_data,
-                    'alerts': alerts,
                     'timestamp': datetime.now().isoformat()
-                }))
+                }, key='equipment_data')
                 
                 await asyncio.sleep(3)  # Send data every 3 seconds
                 
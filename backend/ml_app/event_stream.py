@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import socket
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from asgiref.sync import async_to_sync
+from redis.exceptions import ResponseError
+from .utils.artifacts import load_bundle, bundle_version, list_bundles
+from .utils.stream_keys import STREAM_KEY, CONSUMER_GROUP, STREAM_MAXLEN, DEAD_LETTER_KEY
+
+logger = logging.getLogger(__name__)
+
+ALERT_GROUP = 'customer_monitoring'
+
+_bundle_cache = {}
+_bundle_lock = threading.Lock()
+
+
+def publish_event(r, event, maxlen=STREAM_MAXLEN):
+    """Append one event to the stream and return its entry id"""
+    return r.xadd(STREAM_KEY, {'payload': json.dumps(event)}, maxlen=maxlen, approximate=True)
+
+
+def publish_events(r, events, maxlen=STREAM_MAXLEN):
+    """Append many events in a single round trip"""
+    pipe = r.pipeline(transaction=False)
+    for event in events:
+        pipe.xadd(STREAM_KEY, {'payload': json.dumps(event)}, maxlen=maxlen, approximate=True)
+    return pipe.execute()
+
+
+def ensure_consumer_group(r, group=CONSUMER_GROUP):
+    try:
+        r.xgroup_create(STREAM_KEY, group, id='0', mkstream=True)
+    except ResponseError as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+
+def load_model_bundle(model_path):
+    """Load a trained_models bundle once per file version"""
+    key = (model_path, bundle_version(model_path))
+    with _bundle_lock:
+        bundle = _bundle_cache.get(key)
+        if bundle is None:
+            bundle = load_bundle(model_path)
+            _bundle_cache.clear()
+            _bundle_cache[key] = bundle
+    return bundle
+
+
+def latest_model_path(models_dir):
+    paths = [path for _, path in list_bundles(models_dir)]
+    return max(paths, key=bundle_version) if paths else None
+
+
+class ModelBundleScorer:
+    """
+    Scores a batch of events with a cached trained_models bundle.
+
+    Events may carry a ``features`` dict; otherwise their top-level fields are
+    used. Features an event does not provide are imputed with the training
+    mean, so they are neutral after scaling.
+    """
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+
+    def __call__(self, events):
+        bundle = load_model_bundle(self.model_path)
+        feature_names = bundle['feature_names']
+        scaler = bundle['scaler']
+        label_encoders = bundle.get('label_encoders', {})
+
+        rows = [event.get('features') or event for event in events]
+        df = pd.DataFrame.from_records(rows).reindex(columns=feature_names)
+
+        for col, encoder in label_encoders.items():
+            if col in df.columns and df[col].notna().any():
+                mapping = {label: code for code, label in enumerate(encoder.classes_)}
+                df[col] = df[col].astype(str).map(mapping)
+
+        X = df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        means = getattr(scaler, 'mean_', np.zeros(X.shape[1]))
+        missing = np.isnan(X)
+        X[missing] = np.take(means, np.nonzero(missing)[1])
+
+        return bundle['model'].predict_proba(scaler.transform(X))[:, 1]
+
+
+class TelecomEventConsumer:
+    """
+    One member of the ``churn-scorers`` consumer group.
+
+    Reads events in batches with XREADGROUP, scores each batch in one call,
+    pushes high-risk alerts to the monitoring websocket group and only then
+    acknowledges the batch, giving at-least-once delivery. Entries left
+    pending by a crashed consumer, or by a batch the scorer failed on, are
+    reclaimed with XAUTOCLAIM; once an entry has been delivered more than
+    ``max_deliveries`` times it is moved to the dead-letter stream instead.
+    """
+
+    def __init__(self, redis_client, scorer, consumer_name=None, channel_layer=None,
+                 batch_size=500, block_ms=1000, alert_threshold=0.7, reclaim_idle_ms=60000,
+                 max_deliveries=5):
+        self.r = redis_client
+        self.scorer = scorer
+        self.consumer_name = consumer_name or f'{socket.gethostname()}-{os.getpid()}'
+        self.channel_layer = channel_layer
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.alert_threshold = alert_threshold
+        self.reclaim_idle_ms = reclaim_idle_ms
+        self.max_deliveries = max_deliveries
+        self.stats = {'processed': 0, 'alerts': 0, 'batches': 0, 'reclaimed': 0, 'dead_lettered': 0}
+        ensure_consumer_group(self.r)
+
+    def poll_once(self):
+        """Read, score and acknowledge one batch; returns the number of events"""
+        response = self.r.xreadgroup(
+            CONSUMER_GROUP, self.consumer_name, {STREAM_KEY: '>'},
+            count=self.batch_size, block=self.block_ms
+        )
+        if not response:
+            return 0
+        _, entries = response[0]
+        return self.process(entries)
+
+    def reclaim_stale(self):
+        """Take over entries another consumer read but never acknowledged, page by page"""
+        reclaimed = 0
+        start_id = '0-0'
+        while True:
+            cursor, claimed = self.r.xautoclaim(
+                STREAM_KEY, CONSUMER_GROUP, self.consumer_name,
+                min_idle_time=self.reclaim_idle_ms, start_id=start_id, count=self.batch_size
+            )[:2]
+            entries = self.dead_letter_exhausted([entry for entry in claimed if entry[1]])
+            self.stats['reclaimed'] += len(entries)
+            reclaimed += self.process_reclaimed(entries)
+            # XAUTOCLAIM returns 0-0 once it has scanned the whole pending list
+            if cursor in (b'0-0', '0-0'):
+                return reclaimed
+            start_id = cursor
+
+    def dead_letter_exhausted(self, entries):
+        """Move entries delivered more than ``max_deliveries`` times to the dead-letter stream"""
+        if not entries:
+            return entries
+
+        pipe = self.r.pipeline(transaction=False)
+        for entry_id, _ in entries:
+            pipe.xpending_range(STREAM_KEY, CONSUMER_GROUP, min=entry_id, max=entry_id, count=1)
+        deliveries = [info[0]['times_delivered'] if info else 0 for info in pipe.execute()]
+
+        exhausted = [(entry_id, dict(fields, deliveries=n))
+                     for (entry_id, fields), n in zip(entries, deliveries) if n > self.max_deliveries]
+        if not exhausted:
+            return entries
+
+        self.dead_letter(exhausted)
+        logger.warning("Moved %d events to %s after %d deliveries",
+                       len(exhausted), DEAD_LETTER_KEY, self.max_deliveries)
+        dead = {entry_id for entry_id, _ in exhausted}
+        return [entry for entry in entries if entry[0] not in dead]
+
+    def dead_letter(self, entries):
+        """Copy entries, with their source id, to the dead-letter stream and acknowledge them atomically"""
+        pipe = self.r.pipeline(transaction=True)
+        for entry_id, fields in entries:
+            pipe.xadd(DEAD_LETTER_KEY, dict(fields, source_id=entry_id), maxlen=STREAM_MAXLEN, approximate=True)
+        pipe.xack(STREAM_KEY, CONSUMER_GROUP, *[entry_id for entry_id, _ in entries])
+        pipe.execute()
+        self.stats['dead_lettered'] += len(entries)
+
+    def process_reclaimed(self, entries):
+        """Score reclaimed entries, falling back to one at a time so a poison event only holds itself back"""
+        try:
+            return self.process(entries)
+        except Exception as e:
+            if len(entries) == 1:
+                logger.warning("Event %s failed again: %s", entries[0][0], e)
+                return 0
+            logger.warning("Reclaimed batch failed, retrying %d events singly: %s", len(entries), e)
+        return sum(self.process_reclaimed([entry]) for entry in entries)
+
+    def process(self, entries):
+        """Score, alert and acknowledge entries; if the scorer raises they stay pending for reclaim"""
+        if not entries:
+            return 0
+
+        ids, events, unparseable = [], [], []
+        for entry_id, fields in entries:
+            payload = fields.get(b'payload', fields.get('payload'))
+            try:
+                event = json.loads(payload)
+            except (TypeError, ValueError):
+                event = None
+            if isinstance(event, dict):
+                ids.append(entry_id)
+                events.append(event)
+            else:
+                unparseable.append((entry_id, dict(fields, reason='unparseable')))
+
+        if unparseable:
+            # Scoring an empty event would invent a prediction; keep the raw payload for inspection
+            self.dead_letter(unparseable)
+            logger.warning("Moved %d unparseable events to %s", len(unparseable), DEAD_LETTER_KEY)
+        if not events:
+            return 0
+
+        scores = np.asarray(self.scorer(events), dtype=float)
+
+        alerts = []
+        for event, score in zip(events, scores):
+            if score >= self.alert_threshold:
+                alerts.append({
+                    'customer_id': event.get('customer_id'),
+                    'event_type': event.get('type'),
+                    'risk_score': round(float(score), 4),
+                    'event_id': event.get('event_id'),
+                    'timestamp': event.get('timestamp'),
+                })
+
+        if alerts and self.channel_layer is not None:
+            # One group message per batch keeps the channel layer off the hot path
+            async_to_sync(self.channel_layer.group_send)(ALERT_GROUP, {
+                'type': 'churn_alert',
+                'alerts': alerts,
+            })
+
+        self.r.xack(STREAM_KEY, CONSUMER_GROUP, *ids)
+
+        self.stats['processed'] += len(events)
+        self.stats['alerts'] += len(alerts)
+        self.stats['batches'] += 1
+        return len(events)
+
+    def run(self, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        next_reclaim = 0.0
+        while not stop_event.is_set():
+            try:
+                # Sweep on a clock, not on idleness, so failed batches are retried on a busy stream too
+                if time.monotonic() >= next_reclaim:
+                    next_reclaim = time.monotonic() + self.reclaim_idle_ms / 1000
+                    self.reclaim_stale()
+                self.poll_once()
+            except Exception as e:
+                logger.error("Event consumer %s error: %s", self.consumer_name, e)
+                stop_event.wait(1)
@@ -0,0 +1,62 @@
+import os
+from datetime import datetime, timezone as dt_timezone
+import pandas as pd
+from django.core.management.base import BaseCommand
+from ml_app.data_cleaning import generate_smart_dataset_name
+from ml_app.dataset_catalog import CLEANED_DIR, absolute_path, register_legacy_uploads
+from ml_app.models import DatasetFile
+
+
+def backfill_cleaned_metadata():
+    """
+    Store listing metadata for cleaned files written before cleaning recorded it.
+
+    Each legacy file is read once here; afterwards it is listed from its
+    catalog record like any other. Returns (filled, skipped).
+    """
+    cleaned_dir = absolute_path(CLEANED_DIR)
+    if not os.path.isdir(cleaned_dir):
+        return 0, 0
+    records = {record.dataset_id: record for record in DatasetFile.objects.filter(cleaned_at=None)}
+    known = set(DatasetFile.objects.exclude(cleaned_at=None).values_list('cleaned_path', flat=True))
+
+    filled = skipped = 0
+    for filename in sorted(os.listdir(cleaned_dir)):
+        cleaned_path = os.path.join(CLEANED_DIR, filename)
+        if not filename.endswith('.csv') or cleaned_path in known:
+            continue
+        record = records.get(filename.replace('cleaned_', '', 1).split('_')[0])
+        if record is None:
+            skipped += 1
+            continue
+        file_path = absolute_path(cleaned_path)
+        try:
+            df = pd.read_csv(file_path)
+        except Exception as e:
+            print(f"Error reading {filename}: {str(e)}")
+            skipped += 1
+            continue
+        smart_metadata = generate_smart_dataset_name(df, filename)
+        record.cleaned_path = cleaned_path
+        record.cleaned_size = os.path.getsize(file_path)
+        record.rows = len(df)
+        record.columns = len(df.columns)
+        record.display_name = smart_metadata['display_name']
+        record.dataset_type = smart_metadata['dataset_type']
+        record.domain = smart_metadata['domain']
+        record.cleaned_at = datetime.fromtimestamp(os.path.getmtime(file_path), tz=dt_timezone.utc)
+        record.save()
+        filled += 1
+    return filled, skipped
+
+
+class Command(BaseCommand):
+    help = 'Catalog uploaded and cleaned dataset files from before the DatasetFile catalog (safe to re-run)'
+
+    def handle(self, *args, **options):
+        registered = register_legacy_uploads()
+        filled, skipped = backfill_cleaned_metadata()
+        self.stdout.write(self.style.SUCCESS(
+            f'Registered {registered} legacy uploads; stored metadata for {filled} cleaned files'
+            + (f' ({skipped} skipped: unreadable or without an upload)' if skipped else '')
+        ))
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from ml_app.chat_model import MODEL_VARIANTS, parse_address, serve
+from ml_app.chatbot_ai import chat_host_options
+
+
+class Command(BaseCommand):
+    help = 'Run the shared chatbot inference server the web workers connect to'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--address', default=settings.CHATBOT_SERVER_ADDRESS,
+                            help='host:port (or socket path) to listen on')
+        parser.add_argument('--variant', default=settings.CHATBOT_MODEL, choices=sorted(MODEL_VARIANTS),
+                            help='Which chatbot model to serve')
+
+    def handle(self, *args, **options):
+        address = parse_address(options['address'])
+        if address is None:
+            raise CommandError('An address is required')
+
+        self.stdout.write(f"Serving {options['variant']} chatbot model on {options['address']}")
+        try:
+            serve(address, options['variant'], settings.SECRET_KEY.encode(), **chat_host_options())
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('Chatbot server stopped'))
@@ -0,0 +1,58 @@
+import os
+import socket
+import threading
+import redis
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from ml_app.event_stream import TelecomEventConsumer, ModelBundleScorer, latest_model_path
+
+
+class Command(BaseCommand):
+    help = 'Score telecom events from the Redis stream and push churn alerts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent consumers in this process')
+        parser.add_argument('--batch-size', type=int, default=500, help='Events per XREADGROUP call')
+        parser.add_argument('--threshold', type=float, default=0.7, help='Risk score that raises an alert')
+        parser.add_argument('--max-deliveries', type=int, default=5,
+                            help='Deliveries before a failing event is moved to the dead-letter stream')
+        parser.add_argument('--model-path', help='Model bundle to score with (default: newest in trained_models)')
+
+    def handle(self, *args, **options):
+        model_path = options['model_path'] or latest_model_path(os.path.join(settings.BASE_DIR, 'trained_models'))
+        if not model_path or not os.path.exists(model_path):
+            raise CommandError('No trained model bundle found; train a model or pass --model-path')
+
+        scorer = ModelBundleScorer(model_path)
+        channel_layer = get_channel_layer()
+        prefix = f'{socket.gethostname()}-{os.getpid()}'
+        stop_event = threading.Event()
+
+        # One connection pool shared by all workers; redis-py clients are thread-safe
+        r = redis.Redis.from_url(settings.REDIS_URL)
+        consumers = [
+            TelecomEventConsumer(
+                r, scorer, consumer_name=f'{prefix}-{i}', channel_layer=channel_layer,
+                batch_size=options['batch_size'], alert_threshold=options['threshold'],
+                max_deliveries=options['max_deliveries']
+            )
+            for i in range(options['workers'])
+        ]
+        threads = [threading.Thread(target=c.run, args=(stop_event,), daemon=True) for c in consumers]
+
+        self.stdout.write(f'Scoring with {os.path.basename(model_path)} using {len(threads)} consumers')
+        for thread in threads:
+            thread.start()
+
+        try:
+            while any(thread.is_alive() for thread in threads):
+                stop_event.wait(10)
+        except KeyboardInterrupt:
+            stop_event.set()
+            for thread in threads:
+                thread.join()
+
+        processed = sum(c.stats['processed'] for c in consumers)
+        alerts = sum(c.stats['alerts'] for c in consumers)
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} events, raised {alerts} alerts'))
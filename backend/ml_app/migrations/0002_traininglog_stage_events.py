@@ -0,0 +1,48 @@
+# Generated by Django 5.0 on 2026-10-19 09:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='traininglog',
+            name='details',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='traininglog',
+            name='duration_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='traininglog',
+            name='job_id',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='traininglog',
+            name='rows',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='traininglog',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='traininglog',
+            name='model',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='ml_app.modelversion'),
+        ),
+        migrations.AddIndex(
+            model_name='traininglog',
+            index=models.Index(fields=['step', 'duration_ms'], name='traininglog_step_duration'),
+        ),
+    ]
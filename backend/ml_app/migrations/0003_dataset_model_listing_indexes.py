@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-19 09:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_app', '0002_traininglog_stage_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='datasetmeta',
+            index=models.Index(fields=['user', '-upload_date'], name='datasetmeta_user_uploaded'),
+        ),
+        migrations.AddIndex(
+            model_name='modelversion',
+            index=models.Index(fields=['dataset', '-created_at'], name='modelversion_dataset_created'),
+        ),
+    ]
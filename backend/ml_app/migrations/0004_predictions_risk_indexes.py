@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-19 09:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_app', '0003_dataset_model_listing_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='predictionsrisk',
+            index=models.Index(fields=['dataset', '-created_at'], name='predrisk_dataset_created'),
+        ),
+        migrations.AddIndex(
+            model_name='predictionsrisk',
+            index=models.Index(fields=['user', '-risk_score'], name='predrisk_user_risk'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0 on 2026-10-19 09:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_app', '0004_predictions_risk_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset_key', models.CharField(max_length=500)),
+                ('payload', models.JSONField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ml_app.datasetmeta')),
+                ('model_version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ml_app.modelversion')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='analyticssnapshot',
+            constraint=models.UniqueConstraint(fields=('dataset', 'model_version'), name='analyticssnapshot_dataset_model'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-19 09:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_app', '0005_analytics_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetmeta',
+            name='dtype_plan',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-19 09:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_app', '0006_dataset_dtype_plan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset_id', models.CharField(max_length=64, unique=True)),
+                ('original_name', models.CharField(max_length=255)),
+                ('raw_path', models.CharField(max_length=500)),
+                ('raw_size', models.BigIntegerField(default=0)),
+                ('raw_checksum', models.CharField(blank=True, default='', max_length=64)),
+                ('cleaned_path', models.CharField(blank=True, default='', max_length=500)),
+                ('cleaned_size', models.BigIntegerField(blank=True, null=True)),
+                ('cleaned_checksum', models.CharField(blank=True, default='', max_length=64)),
+                ('columnar_path', models.CharField(blank=True, default='', max_length=500)),
+                ('rows', models.IntegerField(blank=True, null=True)),
+                ('columns', models.IntegerField(blank=True, null=True)),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
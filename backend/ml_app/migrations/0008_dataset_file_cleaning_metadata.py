@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-19 09:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_app', '0007_dataset_file_catalog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetfile',
+            name='cleaned_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='datasetfile',
+            name='dataset_type',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='datasetfile',
+            name='display_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='datasetfile',
+            name='domain',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
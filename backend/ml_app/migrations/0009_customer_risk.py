@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-19 10:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_app', '0008_dataset_file_cleaning_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerRisk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('customer_id', models.CharField(max_length=100)),
+                ('risk_score', models.FloatField()),
+                ('risk_level', models.CharField(max_length=10)),
+                ('top_reasons', models.JSONField(default=list)),
+                ('scored_at', models.DateTimeField()),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ml_app.datasetmeta')),
+                ('model_version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ml_app.modelversion')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dataset', '-risk_score'], name='customerrisk_dataset_risk')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='customerrisk',
+            constraint=models.UniqueConstraint(fields=('customer_id', 'dataset'), name='customerrisk_customer_dataset'),
+        ),
+    ]
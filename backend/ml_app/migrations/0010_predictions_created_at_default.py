@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-19 10:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_app', '0009_customer_risk'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='predictionsrisk',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
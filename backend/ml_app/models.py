@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class DatasetMeta(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -8,10 +9,42 @@ class DatasetMeta(models.Model):
     target_col = models.CharField(max_length=100, default='Churn')
     upload_date = models.DateTimeField(auto_now_add=True)
     s3_key = models.CharField(max_length=500)
+    # Compact pandas dtypes inferred at upload and applied on every read
+    dtype_plan = models.JSONField(default=dict, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-upload_date'], name='datasetmeta_user_uploaded'),
+        ]
     
     def __str__(self):
         return f"{self.filename} - {self.rows} rows"
 
+class DatasetFile(models.Model):
+    # Catalog of file-based uploads (uploaded_datasets/, cleaned_datasets/); paths are relative to BASE_DIR
+    dataset_id = models.CharField(max_length=64, unique=True)
+    original_name = models.CharField(max_length=255)
+    raw_path = models.CharField(max_length=500)
+    raw_size = models.BigIntegerField(default=0)
+    raw_checksum = models.CharField(max_length=64, blank=True, default='')
+    cleaned_path = models.CharField(max_length=500, blank=True, default='')
+    cleaned_size = models.BigIntegerField(null=True, blank=True)
+    cleaned_checksum = models.CharField(max_length=64, blank=True, default='')
+    columnar_path = models.CharField(max_length=500, blank=True, default='')
+    rows = models.IntegerField(null=True, blank=True)
+    columns = models.IntegerField(null=True, blank=True)
+    # Written when the dataset is cleaned so listings never open the data files
+    display_name = models.CharField(max_length=255, blank=True, default='')
+    dataset_type = models.CharField(max_length=100, blank=True, default='')
+    domain = models.CharField(max_length=100, blank=True, default='')
+    cleaned_at = models.DateTimeField(null=True, blank=True)
+    version = models.PositiveIntegerField(default=1)
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.dataset_id} - {self.original_name} v{self.version}"
+
 class ModelVersion(models.Model):
     dataset = models.ForeignKey(DatasetMeta, on_delete=models.CASCADE)
     model_type = models.CharField(max_length=50)
@@ -20,15 +53,70 @@ class ModelVersion(models.Model):
     version = models.AutoField(primary_key=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['dataset', '-created_at'], name='modelversion_dataset_created'),
+        ]
+    
     def __str__(self):
         return f"{self.model_type} v{self.version}"
 
+class AnalyticsSnapshot(models.Model):
+    # Dashboard analytics materialized from batch predictions of one model version
+    dataset = models.ForeignKey(DatasetMeta, on_delete=models.CASCADE)
+    model_version = models.ForeignKey(ModelVersion, on_delete=models.CASCADE)
+    dataset_key = models.CharField(max_length=500)
+    payload = models.JSONField()
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dataset', 'model_version'], name='analyticssnapshot_dataset_model'),
+        ]
+    
+    def __str__(self):
+        return f"Analytics {self.dataset_id} v{self.model_version_id}"
+
+class CustomerRisk(models.Model):
+    # Latest batch score per customer, rewritten by the score_customer_risk task
+    dataset = models.ForeignKey(DatasetMeta, on_delete=models.CASCADE)
+    model_version = models.ForeignKey(ModelVersion, on_delete=models.CASCADE)
+    customer_id = models.CharField(max_length=100)
+    risk_score = models.FloatField()
+    risk_level = models.CharField(max_length=10)
+    top_reasons = models.JSONField(default=list)
+    scored_at = models.DateTimeField()
+    
+    class Meta:
+        constraints = [
+            # Leads with customer_id so lookups without a dataset use it too
+            models.UniqueConstraint(fields=['customer_id', 'dataset'], name='customerrisk_customer_dataset'),
+        ]
+        indexes = [
+            # Highest-risk customers per dataset, read in index order
+            models.Index(fields=['dataset', '-risk_score'], name='customerrisk_dataset_risk'),
+        ]
+    
+    def __str__(self):
+        return f"{self.customer_id}: {self.risk_score:.2f}"
+
 class TrainingLog(models.Model):
-    model = models.ForeignKey(ModelVersion, on_delete=models.CASCADE)
+    # Stage rows are written before the ModelVersion exists and linked once it is saved
+    model = models.ForeignKey(ModelVersion, on_delete=models.CASCADE, null=True, blank=True)
+    job_id = models.CharField(max_length=64, blank=True, default='', db_index=True)
     step = models.CharField(max_length=100)
     status = models.CharField(max_length=50)
+    started_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.FloatField(null=True, blank=True)
+    rows = models.IntegerField(null=True, blank=True)
+    details = models.TextField(blank=True, default='')
     timestamp = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['step', 'duration_ms'], name='traininglog_step_duration'),
+        ]
+    
     def __str__(self):
         return f"{self.step} - {self.status}"
 
@@ -37,7 +125,16 @@ class PredictionsRisk(models.Model):
     dataset = models.ForeignKey(DatasetMeta, on_delete=models.CASCADE)
     risk_score = models.FloatField()
     insights = models.JSONField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: PredictionSink writes rows later and keeps the time they were made
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            # Recent predictions per dataset; also drives retention purges
+            models.Index(fields=['dataset', '-created_at'], name='predrisk_dataset_created'),
+            # Highest-risk customers per user for the risk dashboards
+            models.Index(fields=['user', '-risk_score'], name='predrisk_user_risk'),
+        ]
     
     def __str__(self):
         return f"Risk: {self.risk_score:.2f}"
\ No newline at end of file
@@ -0,0 +1,17 @@
+from rest_framework.pagination import CursorPagination
+
+
+class DatasetCursorPagination(CursorPagination):
+    """Keyset pagination over DatasetMeta(user, upload_date)"""
+    ordering = ('-upload_date', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class ModelVersionCursorPagination(CursorPagination):
+    """Keyset pagination over ModelVersion(dataset, created_at)"""
+    ordering = ('-created_at', '-version')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
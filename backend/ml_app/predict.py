@@ -4,8 +4,9 @@ import json
 import os
 import pandas as pd
 import numpy as np
-import joblib
 from django.conf import settings
+from .utils.artifacts import load_bundle, bundle_path, bundle_feature_names, list_bundles
+from .utils.feature_plan import FeaturePlan
 
 @csrf_exempt
 def predict_view(request):
@@ -24,13 +25,13 @@ def predict_view(request):
             
             # Load trained model
             models_dir = os.path.join(settings.BASE_DIR, 'trained_models')
-            model_path = os.path.join(models_dir, f'{model_id}.joblib')
+            model_path = bundle_path(models_dir, model_id)
             
-            if not os.path.exists(model_path):
+            if model_path is None:
                 return JsonResponse({'error': 'Model not found'}, status=404)
             
             # Load model and preprocessing components
-            model_data = joblib.load(model_path)
+            model_data = load_bundle(model_path)
             model = model_data['model']
             scaler = model_data['scaler']
             label_encoders = model_data.get('label_encoders', {})
@@ -39,22 +40,26 @@ def predict_view(request):
             # Prepare input data
             input_df = pd.DataFrame([input_data])
             
-            # Ensure all required features are present
-            for feature in feature_names:
-                if feature not in input_df.columns:
-                    input_df[feature] = 0  # Default value
-            
-            # Select only the features used in training
-            input_df = input_df[feature_names]
-            
-            # Apply label encoding for categorical features
-            for col, encoder in label_encoders.items():
-                if col in input_df.columns:
-                    try:
-                        input_df[col] = encoder.transform(input_df[col].astype(str))
-                    except:
-                        # Handle unseen categories
-                        input_df[col] = 0
+            if model_data.get('feature_plan'):
+                # Plan-based (out-of-core) bundles one-hot raw fields exactly as in training
+                input_df = FeaturePlan.from_dict(model_data['feature_plan']).transform(input_df)
+            else:
+                # Ensure all required features are present
+                for feature in feature_names:
+                    if feature not in input_df.columns:
+                        input_df[feature] = 0  # Default value
+                
+                # Select only the features used in training
+                input_df = input_df[feature_names]
+                
+                # Apply label encoding for categorical features
+                for col, encoder in label_encoders.items():
+                    if col in input_df.columns:
+                        try:
+                            input_df[col] = encoder.transform(input_df[col].astype(str))
+                        except:
+                            # Handle unseen categories
+                            input_df[col] = 0
             
             # Scale features
             input_scaled = scaler.transform(input_df)
@@ -106,38 +111,34 @@ def predict_view(request):
             metadata_dir = os.path.join(settings.BASE_DIR, 'dataset_metadata')
             
             models = []
-            if os.path.exists(models_dir):
-                for filename in os.listdir(models_dir):
-                    if filename.endswith('.joblib'):
-                        try:
-                            parts = filename.replace('.joblib', '').split('_')
-                            if len(parts) >= 2:
-                                dataset_id = parts[0]
-                                model_name = '_'.join(parts[1:])
-                                
-                                # Get dataset info
-                                metadata_path = os.path.join(metadata_dir, f'{dataset_id}.json')
-                                dataset_name = 'Unknown Dataset'
-                                
-                                if os.path.exists(metadata_path):
-                                    with open(metadata_path, 'r') as f:
-                                        metadata = json.load(f)
-                                        dataset_name = metadata.get('filename', 'Unknown Dataset')
-                                
-                                # Load model to get feature names
-                                model_path = os.path.join(models_dir, filename)
-                                model_data = joblib.load(model_path)
-                                feature_names = model_data.get('feature_names', [])
-                                
-                                models.append({
-                                    'id': filename.replace('.joblib', ''),
-                                    'name': f'{model_name.title()} ({dataset_name})',
-                                    'model_type': model_name,
-                                    'dataset_name': dataset_name,
-                                    'feature_names': feature_names
-                                })
-                        except Exception as e:
-                            continue
+            for model_id, model_path in list_bundles(models_dir):
+                try:
+                    parts = model_id.split('_')
+                    if len(parts) >= 2:
+                        dataset_id = parts[0]
+                        model_name = '_'.join(parts[1:])
+                        
+                        # Get dataset info
+                        metadata_path = os.path.join(metadata_dir, f'{dataset_id}.json')
+                        dataset_name = 'Unknown Dataset'
+                        
+                        if os.path.exists(metadata_path):
+                            with open(metadata_path, 'r') as f:
+                                metadata = json.load(f)
+                                dataset_name = metadata.get('filename', 'Unknown Dataset')
+                        
+                        # Artifacts answer from their manifest without loading the model
+                        feature_names = bundle_feature_names(model_path)
+                        
+                        models.append({
+                            'id': model_id,
+                            'name': f'{model_name.title()} ({dataset_name})',
+                            'model_type': model_name,
+                            'dataset_name': dataset_name,
+                            'feature_names': feature_names
+                        })
+                except Exception as e:
+                    continue
             
             return JsonResponse({
                 'models': models,
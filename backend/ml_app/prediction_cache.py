@@ -0,0 +1,164 @@
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from django.conf import settings
+
+OUTCOMES = ('hit', 'coalesced', 'miss')
+
+
+def input_hash(data):
+    """
+    Hash of a prediction input that ignores key order and int/float spelling,
+    so {"tenure": 3, "Contract": "One year"} and {"Contract": "One year",
+    "tenure": 3.0} share a cache entry.
+    """
+    def canonical(value):
+        if isinstance(value, dict):
+            return {str(k): canonical(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [canonical(v) for v in value]
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+
+    payload = json.dumps(canonical(data), sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class PredictionCache:
+    """
+    Per-process TTL cache for prediction results with single-flight.
+
+    Keys are (model version, input hash). A miss makes the caller the
+    leader for that key; identical requests arriving while it computes wait
+    for its result instead of computing their own, and share its exception
+    if it fails. Only successes are cached, for ``ttl`` seconds, and at most
+    ``max_entries`` are kept (least recently used go first). Cached results
+    are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, ttl=300, max_entries=10000, latency_window=1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (expires_at, result)
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(OUTCOMES + ('errors', 'evictions'), 0)
+        self._latencies = {outcome: deque(maxlen=latency_window) for outcome in OUTCOMES}
+        self._stats_lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        started = time.perf_counter()
+        with self._lock:
+            entry = self._entries.get(key)
+            hit = entry is not None and entry[0] > time.monotonic()
+            if hit:
+                self._entries.move_to_end(key)
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+
+        if hit:
+            self._record('hit', started)
+            return entry[1]
+
+        if not leader:
+            flight.done.wait()
+            self._record('coalesced', started)
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl, flight.result)
+                self._entries.move_to_end(key)
+                evicted = 0
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    evicted += 1
+            if evicted:
+                self._count('evictions', evicted)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            self._count('errors')
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+            self._record('miss', started)
+
+    def invalidate(self, model_version=None):
+        """Drop every entry, or only those of one model version"""
+        with self._lock:
+            if model_version is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == model_version]:
+                    del self._entries[key]
+
+    def _count(self, name, n=1):
+        with self._stats_lock:
+            self._counts[name] += n
+
+    def _record(self, outcome, started):
+        with self._stats_lock:
+            self._counts[outcome] += 1
+            self._latencies[outcome].append((time.perf_counter() - started) * 1000)
+
+    def stats(self):
+        with self._stats_lock:
+            counts = dict(self._counts)
+            latencies = {outcome: list(values) for outcome, values in self._latencies.items()}
+        requests = sum(counts[outcome] for outcome in OUTCOMES)
+        return {
+            'requests': requests,
+            **counts,
+            # Coalesced requests did not compute either, so they count towards the hit rate
+            'hit_rate': round((counts['hit'] + counts['coalesced']) / requests, 4) if requests else 0.0,
+            'entries': len(self._entries),
+            'in_flight': len(self._flights),
+            'ttl_seconds': self.ttl,
+            'latency_ms': {
+                outcome: {
+                    'mean': round(float(sum(values) / len(values)), 3),
+                    'p50': round(float(sorted(values)[len(values) // 2]), 3),
+                    'p95': round(float(sorted(values)[min(int(len(values) * 0.95), len(values) - 1)]), 3)
+                } if values else None
+                for outcome, values in latencies.items()
+            }
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prediction_cache():
+    """Process-wide prediction cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PredictionCache(
+                ttl=getattr(settings, 'PREDICTION_CACHE_TTL', 300),
+                max_entries=getattr(settings, 'PREDICTION_CACHE_SIZE', 10000)
+            )
+    return _cache
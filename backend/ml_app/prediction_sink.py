@@ -0,0 +1,170 @@
+import io
+import csv
+import json
+import atexit
+import time
+import logging
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, close_old_connections
+from django.utils import timezone
+from .models import DatasetMeta, PredictionsRisk
+
+logger = logging.getLogger(__name__)
+
+COPY_COLUMNS = ('user_id', 'dataset_id', 'risk_score', 'insights', 'created_at')
+
+
+class PredictionSink:
+    """
+    Buffers PredictionsRisk rows and writes them in bulk.
+
+    ``add`` only appends to an in-memory buffer. A background thread flushes
+    every ``flush_interval`` seconds, and the buffer is flushed inline once it
+    reaches ``batch_size`` so batch scoring never holds more than one batch.
+    Large flushes on PostgreSQL use COPY; everything else uses bulk_create.
+    A failed write puts its rows back at the front of the buffer and backs
+    off exponentially (up to ``max_backoff`` seconds) before the next
+    attempt. During a long outage the buffer keeps at most ``max_pending``
+    rows, dropping the oldest. Rows buffered when a process dies without
+    running atexit are lost.
+    """
+
+    def __init__(self, batch_size=5000, flush_interval=1.0, copy_threshold=1000, max_pending=None,
+                 max_backoff=30.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.copy_threshold = copy_threshold
+        self.max_pending = max_pending or batch_size * 10
+        self.max_backoff = max_backoff
+        self.dropped = 0
+        self._failures = 0
+        self._retry_at = 0.0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, user_id, dataset_id, risk_score, insights):
+        self.add_many([(user_id, dataset_id, risk_score, insights)])
+
+    def add_many(self, rows):
+        """Queue (user_id, dataset_id, risk_score, insights) tuples"""
+        now = timezone.now()
+        with self._lock:
+            self._pending.extend((u, d, float(r), i, now) for u, d, r, i in rows)
+            full = len(self._pending) >= self.batch_size and time.monotonic() >= self._retry_at
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+
+            try:
+                if connection.vendor == 'postgresql' and len(pending) >= self.copy_threshold:
+                    self._copy(pending)
+                else:
+                    PredictionsRisk.objects.bulk_create([
+                        PredictionsRisk(user_id=u, dataset_id=d, risk_score=r, insights=i, created_at=c)
+                        for u, d, r, i, c in pending
+                    ], batch_size=self.batch_size)
+            except Exception as e:
+                self._failures += 1
+                delay = min(self.flush_interval * 2 ** self._failures, self.max_backoff)
+                self._retry_at = time.monotonic() + delay
+                self._requeue(pending)
+                logger.error("Could not write %d predictions, retrying in %.1fs: %s", len(pending), delay, e)
+                return 0
+            self._failures = 0
+            self._retry_at = 0.0
+            return len(pending)
+
+    def _requeue(self, rows):
+        """Put unwritten rows back ahead of newer ones, dropping the oldest past max_pending"""
+        with self._lock:
+            self._pending[:0] = rows
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                del self._pending[:overflow]
+                self.dropped += overflow
+        if overflow > 0:
+            logger.error("Prediction buffer full; dropped the %d oldest predictions", overflow)
+
+    def _copy(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for user_id, dataset_id, risk_score, insights, created_at in rows:
+            writer.writerow([user_id, dataset_id, risk_score, json.dumps(insights), created_at.isoformat()])
+        buffer.seek(0)
+
+        table = PredictionsRisk._meta.db_table
+        sql = f"COPY {table} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+        with connection.cursor() as cursor:
+            cursor.copy_expert(sql, buffer)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='prediction-sink', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            if time.monotonic() >= self._retry_at:
+                self.flush()
+            close_old_connections()
+        self.flush()
+        connection.close()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_prediction_sink():
+    """Process-wide sink with its background flusher running"""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = PredictionSink(
+                batch_size=getattr(settings, 'PREDICTIONS_BATCH_SIZE', 5000),
+                flush_interval=getattr(settings, 'PREDICTIONS_FLUSH_INTERVAL', 1.0),
+                max_pending=getattr(settings, 'PREDICTIONS_MAX_PENDING', None)
+            ).start()
+            atexit.register(_sink.close)
+    return _sink
+
+
+def purge_expired_predictions(retention_days=None, chunk_size=10000):
+    """
+    Delete predictions older than the retention window.
+
+    Runs per dataset so every delete is a range scan on the
+    (dataset, created_at) index, in chunks to keep transactions short.
+    """
+    retention_days = retention_days or getattr(settings, 'PREDICTIONS_RETENTION_DAYS', 90)
+    cutoff = timezone.now() - timedelta(days=retention_days)
+
+    deleted = 0
+    for dataset_id in DatasetMeta.objects.values_list('id', flat=True).iterator():
+        while True:
+            ids = list(PredictionsRisk.objects.filter(dataset_id=dataset_id, created_at__lt=cutoff)
+                       .values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                break
+            deleted += PredictionsRisk.objects.filter(id__in=ids).delete()[0]
+    return deleted
@@ -0,0 +1,93 @@
+import time
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class TrainingProgress:
+    """
+    Publishes structured per-stage progress for a training job.
+
+    Events go to the ``training_{job_id}`` group as ``training_update``
+    messages, which ``channels_app.consumers.TrainingConsumer`` forwards to the
+    browser. Every finished stage is also kept in ``timings`` and handed to
+    each listener, e.g. a TrainingEventRecorder that persists the durations.
+    """
+
+    def __init__(self, job_id, total_stages, listeners=None):
+        self.job_id = job_id
+        self.group_name = f'training_{job_id}'
+        self.total_stages = max(int(total_stages), 1)
+        self.completed = 0
+        self.timings = []
+        self.listeners = list(listeners or [])
+        self._channel_layer = get_channel_layer() if job_id else None
+
+    @property
+    def percent(self):
+        return min(round(self.completed * 100 / self.total_stages), 100)
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Time a stage; the yielded dict can be updated with ``rows``"""
+        record = {'step': name, 'rows': rows}
+        self.publish(name, 'started', rows=rows)
+        started = time.perf_counter()
+        started_at = timezone.now().isoformat()
+
+        try:
+            yield record
+        except Exception as exc:
+            record.update(self._finish(name, started, started_at, record['rows'], 'failed'))
+            self.publish(name, 'failed', rows=record['rows'],
+                         duration_ms=record['duration_ms'], error=str(exc))
+            raise
+
+        self.completed += 1
+        record.update(self._finish(name, started, started_at, record['rows'], 'completed'))
+        self.publish(name, 'completed', rows=record['rows'], duration_ms=record['duration_ms'])
+
+    def complete(self, **extra):
+        self.completed = self.total_stages
+        self.publish('training_complete', 'success', stage_timings=self.timings, **extra)
+
+    def fail(self, error):
+        self.publish('training_failed', 'failed', error=str(error), stage_timings=self.timings)
+
+    def publish(self, step, status, **extra):
+        if self._channel_layer is None:
+            return
+
+        event = {
+            'type': 'training_update',
+            'job_id': self.job_id,
+            'progress': self.percent,
+            'step': step,
+            'status': status,
+            'timestamp': datetime.now().isoformat(),
+        }
+        event.update({k: v for k, v in extra.items() if v is not None})
+
+        try:
+            async_to_sync(self._channel_layer.group_send)(self.group_name, event)
+        except Exception as e:
+            # Progress is best-effort and must never fail the training job
+            logger.warning("Could not publish training progress for %s: %s", self.job_id, e)
+
+    def _finish(self, name, started, started_at, rows, status):
+        timing = {
+            'step': name,
+            'status': status,
+            'rows': rows,
+            'started_at': started_at,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+        }
+        self.timings.append(timing)
+        for listener in self.listeners:
+            listener(timing)
+        return timing
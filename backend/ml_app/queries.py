@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import FloatField, OuterRef, Subquery, Value
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast, Coalesce
+from .models import AnalyticsSnapshot, DatasetMeta, ModelVersion
+
+
+def metric(name, default=None):
+    """Read one float out of ModelVersion.metrics_json inside the database"""
+    value = Cast(KT(f'metrics_json__{name}'), FloatField())
+    return Coalesce(value, Value(default), output_field=FloatField()) if default is not None else value
+
+
+def datasets_with_latest_model(user):
+    """
+    One query for a user's datasets and the type/F1 of each one's newest model.
+
+    The correlated subqueries are served by the (dataset, created_at) index,
+    so the cost does not grow with the number of model versions.
+    """
+    latest = ModelVersion.objects.filter(dataset=OuterRef('pk')).order_by('-created_at', '-version')
+
+    return DatasetMeta.objects.filter(user=user).annotate(
+        latest_model_type=Subquery(latest.values('model_type')[:1]),
+        latest_f1_score=Subquery(latest.annotate(f1=metric('f1_score')).values('f1')[:1]),
+    ).values('id', 'filename', 'rows', 'upload_date', 'latest_model_type', 'latest_f1_score')
+
+
+def model_comparison(dataset_id, user):
+    """Metric columns of every model version of a dataset, without loading the JSON rows"""
+    return ModelVersion.objects.filter(dataset_id=dataset_id, dataset__user=user).annotate(
+        f1_score=metric('f1_score', 0.0),
+        auc=metric('auc', 0.0),
+        precision=metric('precision', 0.0),
+        recall=metric('recall', 0.0),
+    ).values('version', 'model_type', 'f1_score', 'auc', 'precision', 'recall', 'created_at')
+
+
+def analytics_cache_key(dataset_id, model_version_id):
+    return f"analytics_{dataset_id}_v{model_version_id}"
+
+
+def claim_materialization(dataset_id, model_version_id):
+    """
+    True for exactly one caller while a snapshot job is not already queued.
+
+    The marker expires after ANALYTICS_MATERIALIZE_TIMEOUT seconds so a job
+    that died without clearing it does not block the snapshot forever.
+    """
+    timeout = getattr(settings, 'ANALYTICS_MATERIALIZE_TIMEOUT', 3600)
+    return cache.add(f'{analytics_cache_key(dataset_id, model_version_id)}:pending', 1, timeout)
+
+
+def release_materialization(dataset_id, model_version_id):
+    cache.delete(f'{analytics_cache_key(dataset_id, model_version_id)}:pending')
+
+
+def analytics_snapshot(dataset_id, model_version_id):
+    """Materialized analytics payload from the cache, falling back to the snapshot table"""
+    key = analytics_cache_key(dataset_id, model_version_id)
+    payload = cache.get(key)
+    if payload is None:
+        snapshot = AnalyticsSnapshot.objects.filter(
+            dataset_id=dataset_id, model_version_id=model_version_id
+        ).values_list('payload', flat=True).first()
+        if snapshot is not None:
+            payload = snapshot
+            cache.set(key, payload, None)
+    return payload
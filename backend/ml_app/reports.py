@@ -11,6 +11,7 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
+from .training_summary import stored_feature_importance
 
 @csrf_exempt
 def generate_report(request):
@@ -166,6 +167,31 @@ def generate_pdf_report(report_type, df, metadata):
                 ]))
                 
                 story.append(model_table)
+            
+            # Importance is computed once at training time, no model file is loaded here
+            features = results.get('feature_importance') or stored_feature_importance(metadata.get('dataset_id'))
+            if features:
+                story.append(Spacer(1, 20))
+                story.append(Paragraph("Top Predictive Features", styles['Heading2']))
+                story.append(Spacer(1, 12))
+                
+                feature_data = [['Feature', 'Importance']]
+                for feature in features[:10]:
+                    feature_data.append([feature['feature'], f"{feature['importance']*100:.1f}%"])
+                
+                feature_table = Table(feature_data, colWidths=[3*inch, 1.5*inch])
+                feature_table.setStyle(TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 10),
+                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+                ]))
+                
+                story.append(feature_table)
     
     # Footer
     story.append(Spacer(1, 30))
@@ -5,7 +5,7 @@ from django.http import JsonResponse
 import pandas as pd
 import numpy as np
 from sklearn.cluster import KMeans
-from .models import DatasetMeta
+from .models import DatasetMeta, CustomerRisk
 import os
 from django.conf import settings
 
@@ -20,11 +20,21 @@ class RetentionView(APIView):
             if not os.path.exists(data_path):
                 return Response({'error': 'Dataset not found'}, status=404)
             
+            # Scores come from the batch-scored risk table; nothing is inferred here
+            risk = pd.DataFrame.from_records(
+                CustomerRisk.objects.filter(dataset=dataset).values('customer_id', 'risk_score'),
+                columns=['customer_id', 'risk_score']
+            )
+            if risk.empty:
+                return Response({'status': 'pending', 'error': 'Customer risk has not been scored yet'},
+                                status=202)
+            
             df = pd.read_csv(data_path)
+            df = df.merge(risk.rename(columns={'customer_id': 'customerID', 'risk_score': 'pred_prob'}),
+                          on='customerID', how='inner').reset_index(drop=True)
             
-            # Add mock prediction probabilities
+            # Reproducible A/B assignment
             np.random.seed(42)
-            df['pred_prob'] = np.random.beta(2, 5, len(df))  # Realistic churn distribution
             
             # Identify high-risk, high-value customers
             risks = df['pred_prob'] > 0.7
@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.utils import timezone
+from .models import CustomerRisk, DatasetMeta, ModelVersion
+from .utils.pipeline import load_data, load_model_from_s3
+from .utils.risk_scoring import score_customers
+
+LOOKUP_FIELDS = ('customer_id', 'dataset_id', 'risk_score', 'risk_level', 'top_reasons',
+                 'model_version_id', 'scored_at')
+
+
+def replace_risk_table(dataset, model_version, table, batch_size=5000):
+    """
+    Swap a dataset's rows in the risk table for a freshly scored ``table``.
+
+    Runs in one transaction, so lookups see either the previous scoring or
+    the new one, never a mix.
+    """
+    now = timezone.now()
+    rows = [
+        CustomerRisk(dataset=dataset, model_version=model_version, customer_id=customer_id,
+                     risk_score=float(score), risk_level=level, top_reasons=reasons, scored_at=now)
+        for customer_id, score, level, reasons in table[
+            ['customer_id', 'risk_score', 'risk_level', 'top_reasons']].itertuples(index=False)
+    ]
+    with transaction.atomic():
+        CustomerRisk.objects.filter(dataset=dataset).delete()
+        CustomerRisk.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def build_risk_table(dataset_id, model_version_id=None):
+    """Score every customer of a dataset with a model version (the latest by default)"""
+    dataset = DatasetMeta.objects.get(id=dataset_id)
+    versions = ModelVersion.objects.filter(dataset=dataset)
+    model_version = (versions.get(version=model_version_id) if model_version_id
+                     else versions.order_by('-created_at').first())
+    if model_version is None:
+        raise ValueError(f'Dataset {dataset_id} has no trained model')
+
+    df = load_data(dataset.s3_key, dataset.dtype_plan)
+    bundle = load_model_from_s3(model_version.s3_pkl_key)
+    table = score_customers(bundle, df, target_col=dataset.target_col, version_key=model_version.s3_pkl_key)
+    return replace_risk_table(dataset, model_version, table)
+
+
+def customer_risk(customer_id, user, dataset_id=None):
+    """A customer's stored risk in ``user``'s datasets, the most recently scored one unless given"""
+    rows = CustomerRisk.objects.filter(customer_id=customer_id, dataset__user=user)
+    if dataset_id is not None:
+        rows = rows.filter(dataset_id=dataset_id)
+    return rows.order_by('-scored_at').values(*LOOKUP_FIELDS).first()
+
+
+def top_risk_customers(dataset_id, user, limit=50, risk_level=None):
+    """Highest-risk customers of one of ``user``'s datasets, read in (dataset, -risk_score) index order"""
+    rows = CustomerRisk.objects.filter(dataset_id=dataset_id, dataset__user=user)
+    if risk_level:
+        rows = rows.filter(risk_level=risk_level)
+    return list(rows.order_by('-risk_score').values(*LOOKUP_FIELDS)[:limit])
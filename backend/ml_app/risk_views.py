@@ -0,0 +1,35 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .risk_table import customer_risk, top_risk_customers
+
+MAX_TOP_CUSTOMERS = 1000
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_customer_risk(request, customer_id):
+    """Stored risk for one customer of the caller's datasets; no inference runs on this path"""
+    row = customer_risk(customer_id, request.user, request.query_params.get('dataset_id'))
+    if row is None:
+        return Response({'error': f'No risk score for customer {customer_id}'},
+                        status=status.HTTP_404_NOT_FOUND)
+    return Response(row)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_top_risk(request, dataset_id):
+    """Highest-risk customers of one of the caller's datasets, optionally filtered by risk level"""
+    try:
+        limit = int(request.query_params.get('limit', 50))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return Response({'error': 'limit must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = min(limit, MAX_TOP_CUSTOMERS)
+
+    customers = top_risk_customers(dataset_id, request.user, limit=limit,
+                                   risk_level=request.query_params.get('level'))
+    return Response({'dataset_id': dataset_id, 'count': len(customers), 'customers': customers})
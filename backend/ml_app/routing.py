@@ -1,9 +1,11 @@
 from django.urls import re_path
-from . import consumers
+from channels_app.consumers import AnalyticsConsumer, TrainingConsumer
+from .consumers import CustomerMonitoringConsumer
 from .equipment_consumer import EquipmentMonitoringConsumer
 
 websocket_urlpatterns = [
-    re_path(r'ws/analytics/(?P<dataset_id>\w+)/$', consumers.AnalyticsConsumer.as_asgi()),
-    re_path(r'ws/training/(?P<training_id>\w+)/$', consumers.TrainingConsumer.as_asgi()),
+    re_path(r'ws/analytics/(?P<dataset_id>\w+)/$', AnalyticsConsumer.as_asgi()),
+    re_path(r'ws/training/(?P<job_id>[\w-]+)/$', TrainingConsumer.as_asgi()),
+    re_path(r'ws/customer-monitoring/$', CustomerMonitoringConsumer.as_asgi()),
     re_path(r'ws/equipment-monitoring/$', EquipmentMonitoringConsumer.as_asgi()),
 ]
\ No newline at end of file
@@ -2,7 +2,10 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import os
 import uuid
-from django.conf import settings
+import pandas as pd
+from .dataset_catalog import save_upload, absolute_path
+from .dataset_dtypes import save_dtype_plan
+from .utils.dtypes import infer_csv_plan
 
 @csrf_exempt
 def simple_upload(request):
@@ -15,26 +18,23 @@ def simple_upload(request):
             if not file.name.endswith('.csv'):
                 return JsonResponse({'error': 'Only CSV files supported'}, status=400)
             
-            # Create upload directory
-            upload_dir = os.path.join(settings.BASE_DIR, 'uploaded_datasets')
-            os.makedirs(upload_dir, exist_ok=True)
-            
-            # Generate unique filename
+            # Generate unique id; the catalog maps it to the stored file
             dataset_id = str(uuid.uuid4())[:8]
-            filename = f"{dataset_id}_{file.name}"
-            file_path = os.path.join(upload_dir, filename)
+            record = save_upload(dataset_id, file)
+            file_path = absolute_path(record.raw_path)
             
-            # Save file
-            with open(file_path, 'wb+') as destination:
-                for chunk in file.chunks():
-                    destination.write(chunk)
+            # Every later read of this dataset applies the compact dtypes planned here
+            save_dtype_plan(dataset_id, infer_csv_plan(file_path))
+            columns = list(pd.read_csv(file_path, nrows=0).columns)
+            record.columns = len(columns)
+            record.save(update_fields=['columns'])
             
             return JsonResponse({
                 'success': True,
                 'dataset_id': dataset_id,
-                'filename': filename,
-                'rows': 15,  # Mock row count
-                'columns': ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature'],
+                'filename': os.path.basename(record.raw_path),
+                'rows': record.rows,
+                'columns': columns,
                 'message': 'File uploaded successfully'
             })
             
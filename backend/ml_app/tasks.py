@@ -1,58 +1,82 @@
-import json
 import uuid
 import mlflow
 import redis
 from celery import shared_task
 from django.conf import settings
-from .models import DatasetMeta, ModelVersion, TrainingLog
+from django.core.cache import cache
+from .models import DatasetMeta, ModelVersion, AnalyticsSnapshot
+from .progress import TrainingProgress
+from .training_events import TrainingEventRecorder
+from .event_stream import publish_event
+from .prediction_sink import purge_expired_predictions
+from .queries import analytics_cache_key, claim_materialization, release_materialization
+from .risk_table import build_risk_table
 from .utils.pipeline import (
-    load_data, clean_data, engineer_features, 
-    balance_split, train_models, get_shap_explanation, save_model_to_s3
+    load_data, clean_data, engineer_features, CANDIDATE_MODELS,
+    balance_split, train_models, save_model_to_s3, load_model_from_s3, predict_risk
 )
+from .utils.feature_plan import FeaturePlan
+from .utils.imbalance import ImbalanceStage
+from .utils.importance import compute_feature_importance
+from .utils.analytics_snapshot import compute_snapshot
+
+# Stages reported by train_pipeline besides the per-model fits
+PIPELINE_STAGES = ['data_loading', 'data_cleaning', 'feature_engineering',
+                   'data_balancing', 'feature_importance', 'model_saving']
 
 @shared_task(bind=True, max_retries=3)
 def train_pipeline(self, dataset_id, models_to_train):
     """Complete ML training pipeline"""
+    recorder = TrainingEventRecorder(self.request.id)
+    progress = TrainingProgress(
+        self.request.id, len(PIPELINE_STAGES) + len(CANDIDATE_MODELS) + 1,
+        listeners=[recorder]
+    )
     try:
         # Get dataset
         dataset = DatasetMeta.objects.get(id=dataset_id)
         
         # Load data
-        TrainingLog.objects.create(
-            model_id=None, step='data_loading', status='started'
-        )
-        df = load_data(dataset.s3_key)
+        with progress.stage('data_loading') as stage:
+            df = load_data(dataset.s3_key, dataset.dtype_plan)
+            stage['rows'] = len(df)
         
         # Clean data
-        TrainingLog.objects.create(
-            model_id=None, step='data_cleaning', status='started'
-        )
-        df_clean = clean_data(df)
+        with progress.stage('data_cleaning', rows=len(df)) as stage:
+            df_clean = clean_data(df)
+            stage['rows'] = len(df_clean)
         
         # Feature engineering
-        TrainingLog.objects.create(
-            model_id=None, step='feature_engineering', status='started'
-        )
-        df_engineered = engineer_features(df_clean)
+        with progress.stage('feature_engineering', rows=len(df_clean)):
+            feature_plan = FeaturePlan.fit(df_clean)
+            df_engineered = engineer_features(df_clean, feature_plan)
         
         # Balance and split
-        TrainingLog.objects.create(
-            model_id=None, step='data_balancing', status='started'
-        )
-        X_train, X_test, y_train, y_test, scaler, feature_names = balance_split(df_engineered)
+        with progress.stage('data_balancing', rows=len(df_engineered)) as stage:
+            imbalance = ImbalanceStage(settings.IMBALANCE_STRATEGY, max_rows=settings.IMBALANCE_MAX_ROWS)
+            X_train, X_test, y_train, y_test, scaler, feature_names = balance_split(
+                df_engineered, imbalance=imbalance
+            )
+            stage['rows'] = len(X_train)
+        recorder.flush()
         
         # Train models
-        TrainingLog.objects.create(
-            model_id=None, step='model_training', status='started'
+        results, best_model, best_model_name = train_models(
+            X_train, X_test, y_train, y_test, progress=progress, sample_weight=imbalance.sample_weight
         )
-        results, best_model, best_model_name = train_models(X_train, X_test, y_train, y_test)
+        recorder.flush()
         
         # MLflow logging
         with mlflow.start_run():
             mlflow.log_params({
                 'dataset_rows': len(df),
                 'features': len(feature_names),
-                'best_model': best_model_name
+                'best_model': best_model_name,
+                'imbalance_strategy': imbalance.report['strategy']
+            })
+            mlflow.log_metrics({
+                'imbalance_ms': imbalance.report['duration_ms'],
+                'imbalance_extra_bytes': imbalance.report['extra_bytes']
             })
             
             for model_name, metrics in results.items():
@@ -61,38 +85,89 @@ def train_pipeline(self, dataset_id, models_to_train):
                     f'{model_name}_auc': metrics['auc']
                 })
         
+        # Global importance is computed once here and stored with the model version
+        with progress.stage('feature_importance', rows=len(X_test)):
+            feature_importance = compute_feature_importance(
+                best_model, X_test, y_test, list(feature_names), background=X_train
+            )
+        
         # Save best model
         model_s3_key = f"models/{dataset_id}_{best_model_name}_{uuid.uuid4().hex}.pkl"
-        save_model_to_s3(best_model, scaler, model_s3_key)
-        
-        # Get SHAP explanations
-        shap_explanations = get_shap_explanation(best_model, X_test, feature_names)
-        
-        # Save model version
-        model_version = ModelVersion.objects.create(
-            dataset=dataset,
-            model_type=best_model_name,
-            metrics_json=results[best_model_name],
-            s3_pkl_key=model_s3_key
-        )
-        
-        TrainingLog.objects.create(
-            model=model_version, step='training_complete', status='success'
-        )
+        with progress.stage('model_saving'):
+            save_model_to_s3(best_model, scaler, model_s3_key, feature_names, background=X_train,
+                             feature_plan=feature_plan)
+            
+            # Save model version
+            model_version = ModelVersion.objects.create(
+                dataset=dataset,
+                model_type=best_model_name,
+                metrics_json={
+                    **results[best_model_name],
+                    'feature_importance': feature_importance,
+                    'stage_timings': progress.timings,
+                    'imbalance': imbalance.report
+                },
+                s3_pkl_key=model_s3_key
+            )
+        
+        recorder.record('training_complete', 'success')
+        recorder.link(model_version)
+        progress.complete(model_version=model_version.version, best_model=best_model_name)
+        if claim_materialization(dataset_id, model_version.version):
+            materialize_analytics.delay(dataset_id, model_version.version)
+        score_customer_risk.delay(dataset_id, model_version.version)
         
         return {
             'status': 'success',
             'model_version': model_version.version,
             'metrics': results[best_model_name],
-            'shap': shap_explanations
+            'feature_importance': feature_importance,
+            'stage_timings': progress.timings
         }
         
     except Exception as exc:
-        TrainingLog.objects.create(
-            model_id=None, step='training_failed', status=f'error: {str(exc)}'
-        )
+        recorder.record('training_failed', 'error', details=str(exc))
+        recorder.flush()
+        progress.fail(exc)
         raise self.retry(exc=exc, countdown=60)
 
+@shared_task
+def materialize_analytics(dataset_id, model_version_id):
+    """Score the whole dataset with one model version and store its dashboard analytics"""
+    try:
+        dataset = DatasetMeta.objects.get(id=dataset_id)
+        model_version = ModelVersion.objects.get(version=model_version_id, dataset=dataset)
+        
+        df = load_data(dataset.s3_key, dataset.dtype_plan)
+        bundle = load_model_from_s3(model_version.s3_pkl_key)
+        risk_scores = predict_risk(bundle, df, target_col=dataset.target_col)
+        payload = compute_snapshot(df, risk_scores, target_column=dataset.target_col)
+        
+        AnalyticsSnapshot.objects.update_or_create(
+            dataset=dataset, model_version=model_version,
+            defaults={'dataset_key': dataset.s3_key, 'payload': payload}
+        )
+        # Snapshots never change for a (dataset, model version) pair; a new model gets a new key
+        cache.set(analytics_cache_key(dataset_id, model_version_id), payload, None)
+        return f"Materialized analytics for {len(df)} customers"
+    finally:
+        # Cleared on failure too, so the next dashboard poll can queue a retry
+        release_materialization(dataset_id, model_version_id)
+
+@shared_task
+def score_customer_risk(dataset_id, model_version_id=None):
+    """Rewrite a dataset's rows in the customer risk lookup table"""
+    scored = build_risk_table(dataset_id, model_version_id)
+    return f"Scored {scored} customers"
+
+@shared_task
+def refresh_customer_risk():
+    """Nightly rescoring of every dataset that has a trained model"""
+    dataset_ids = list(ModelVersion.objects.values_list('dataset_id', flat=True).distinct())
+    for dataset_id in dataset_ids:
+        score_customer_risk.delay(dataset_id)
+    return f"Queued risk scoring for {len(dataset_ids)} datasets"
+
 @shared_task
 def stream_updates():
     """Generate simulated real-time events"""
@@ -110,10 +185,15 @@ def stream_updates():
         event = random.choice(events)
         event['timestamp'] = str(uuid.uuid4())
         
-        r.lpush('telecom_events', json.dumps(event))
-        r.expire('telecom_events', 300)  # 5 min TTL
+        publish_event(r, event)
         
         return f"Generated event: {event['type']}"
         
     except Exception as e:
-        return f"Stream error: {str(e)}"
\ No newline at end of file
+        return f"Stream error: {str(e)}"
+
+@shared_task
+def purge_old_predictions():
+    """Apply the PREDICTIONS_RETENTION_DAYS retention policy"""
+    deleted = purge_expired_predictions()
+    return f"Purged {deleted} predictions"
@@ -12,6 +12,10 @@ from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
 import joblib
 from datetime import datetime
 from django.conf import settings
+from .dataset_dtypes import read_dataset
+from .progress import TrainingProgress
+from .training_summary import save_training_summary
+from .utils.importance import compute_feature_importance
 import time
 import warnings
 warnings.filterwarnings('ignore')
@@ -29,6 +33,7 @@ def train_models(request):
             data = json.loads(request.body)
             dataset_id = data.get('dataset_id')
             selected_models = data.get('models', ['random_forest', 'logistic'])
+            job_id = data.get('job_id')
             
             # Load dataset metadata
             metadata_dir = os.path.join(settings.BASE_DIR, 'dataset_metadata')
@@ -41,14 +46,18 @@ def train_models(request):
                 metadata = json.load(f)
             
             # Load COMPLETE dataset - NO row limits
+            progress = TrainingProgress(job_id, total_stages=4 + len(selected_models))
+            
             file_path = metadata['file_path']
             try:
-                if file_path.endswith('.csv'):
-                    df = pd.read_csv(file_path)  # Load ALL rows
-                elif file_path.endswith(('.xlsx', '.xls')):
-                    df = pd.read_excel(file_path)  # Load ALL rows
-                else:
-                    return JsonResponse({'error': 'Unsupported file format'}, status=400)
+                with progress.stage('data_loading') as stage:
+                    if file_path.endswith('.csv'):
+                        df = read_dataset(file_path, dataset_id)  # Load ALL rows
+                    elif file_path.endswith(('.xlsx', '.xls')):
+                        df = pd.read_excel(file_path)  # Load ALL rows
+                    else:
+                        return JsonResponse({'error': 'Unsupported file format'}, status=400)
+                    stage['rows'] = len(df)
             except:
                 return JsonResponse({'error': 'Failed to read dataset'}, status=400)
             
@@ -64,20 +73,23 @@ def train_models(request):
             
             # Step 1: Data Cleaning - Process ALL rows
             original_rows = len(df)
-            df = df.dropna(how='all').drop_duplicates()
-            
-            # Fill missing values for ALL data
-            for col in df.columns:
-                if df[col].dtype in ['int64', 'float64']:
-                    df[col] = df[col].fillna(df[col].median())
-                else:
-                    mode_val = df[col].mode()[0] if len(df[col].mode()) > 0 else 'Unknown'
-                    df[col] = df[col].fillna(mode_val)
+            with progress.stage('cleaning', rows=original_rows) as stage:
+                df = df.dropna(how='all').drop_duplicates()
+                
+                # Fill missing values for ALL data
+                for col in df.columns:
+                    if pd.api.types.is_numeric_dtype(df[col]):
+                        df[col] = df[col].fillna(df[col].median())
+                    else:
+                        mode_val = df[col].mode()[0] if len(df[col].mode()) > 0 else 'Unknown'
+                        df[col] = df[col].fillna(mode_val)
+                stage['rows'] = len(df)
             
             results['training_steps'].append({
                 'step': 'cleaning',
                 'status': 'completed',
-                'details': f'Processed ALL {original_rows} → {len(df)} rows'
+                'details': f'Processed ALL {original_rows} → {len(df)} rows',
+                'duration_ms': stage['duration_ms']
             })
             
             # Step 2: Feature Engineering - Use ALL data
@@ -88,7 +100,7 @@ def train_models(request):
                 col_lower = col.lower().replace(' ', '').replace('_', '')
                 if any(pattern in col_lower for pattern in id_patterns):
                     columns_to_drop.append(col)
-                elif df[col].dtype == 'object' and df[col].nunique() > len(df) * 0.7:
+                elif not pd.api.types.is_numeric_dtype(df[col]) and df[col].nunique() > len(df) * 0.7:
                     columns_to_drop.append(col)
             
             df = df.drop(columns=columns_to_drop)
@@ -118,33 +130,37 @@ def train_models(request):
             print(f"Feature matrix: {X.shape}, Target: {y.shape}")
             
             # Encode categorical features - ALL data
-            label_encoders = {}
-            for col in X.select_dtypes(include=['object']).columns:
-                le = LabelEncoder()
-                X[col] = le.fit_transform(X[col].astype(str))
-                label_encoders[col] = le
+            with progress.stage('preprocessing', rows=len(X)) as stage:
+                label_encoders = {}
+                for col in X.select_dtypes(include=['object', 'category']).columns:
+                    le = LabelEncoder()
+                    X[col] = le.fit_transform(X[col].astype(str))
+                    label_encoders[col] = le
             
             results['training_steps'].append({
                 'step': 'preprocessing',
                 'status': 'completed',
-                'details': f'Processed {X.shape[1]} features from {len(df)} rows'
+                'details': f'Processed {X.shape[1]} features from {len(df)} rows',
+                'duration_ms': stage['duration_ms']
             })
             
             # Step 3: Train-Test Split - Use ALL data
             if len(df) < 10:
                 return JsonResponse({'error': 'Dataset too small'}, status=400)
             
-            test_size = 0.3 if len(df) < 50 else 0.2
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=test_size, random_state=42
-            )
-            
-            print(f"Training set: {X_train.shape}, Test set: {X_test.shape}")
-            
-            # Scale features
-            scaler = StandardScaler()
-            X_train_scaled = scaler.fit_transform(X_train)
-            X_test_scaled = scaler.transform(X_test)
+            with progress.stage('split_and_scale', rows=len(X)) as stage:
+                test_size = 0.3 if len(df) < 50 else 0.2
+                X_train, X_test, y_train, y_test = train_test_split(
+                    X, y, test_size=test_size, random_state=42
+                )
+                
+                print(f"Training set: {X_train.shape}, Test set: {X_test.shape}")
+                
+                # Scale features
+                scaler = StandardScaler()
+                X_train_scaled = scaler.fit_transform(X_train)
+                X_test_scaled = scaler.transform(X_test)
+                stage['rows'] = len(X_train)
             
             # Step 4: Model Training on ALL data
             model_configs = {
@@ -154,6 +170,7 @@ def train_models(request):
             }
             
             trained_models = []
+            fitted = {}
             
             for model_name in selected_models:
                 if model_name not in model_configs or model_configs[model_name] is None:
@@ -166,7 +183,8 @@ def train_models(request):
                     print(f"Training {model_name} on {len(X_train)} samples...")
                     
                     # Train model on ALL training data
-                    model.fit(X_train_scaled, y_train)
+                    with progress.stage(f'fit_{model_name}', rows=len(X_train)):
+                        model.fit(X_train_scaled, y_train)
                     
                     # Predictions on ALL test data
                     y_pred = model.predict(X_test_scaled)
@@ -195,6 +213,7 @@ def train_models(request):
                     }
                     
                     trained_models.append(model_result)
+                    fitted[model_name] = model
                     print(f"{model_name} trained: {accuracy:.3f} accuracy")
                     
                     # Save model
@@ -215,6 +234,7 @@ def train_models(request):
                     continue
             
             if not trained_models:
+                progress.fail('All models failed to train')
                 return JsonResponse({'error': 'All models failed to train'}, status=400)
             
             results['training_steps'].append({
@@ -234,14 +254,27 @@ def train_models(request):
                 'details': f'Best: {results["best_model"]} ({trained_models[0]["accuracy"]:.3f})'
             })
             
+            # Global importance of the best model, stored with the training results
+            progress.total_stages += 1
+            with progress.stage('feature_importance', rows=len(X_test)):
+                results['feature_importance'] = compute_feature_importance(
+                    fitted[results['best_model']], X_test_scaled, np.asarray(y_test),
+                    list(X.columns), background=X_train_scaled
+                )
+            save_training_summary(dataset_id, trained_models, results['best_model'],
+                                  results['feature_importance'], target_column)
+            
             # Update metadata
             metadata['training_status'] = 'completed'
             metadata['training_results'] = results
             metadata['trained_at'] = datetime.now().isoformat()
             
+            results['stage_timings'] = progress.timings
+            
             with open(metadata_path, 'w') as f:
                 json.dump(metadata, f, indent=2)
             
+            progress.complete(best_model=results['best_model'])
             print(f"Training completed successfully on {len(df)} rows")
             
             return JsonResponse({
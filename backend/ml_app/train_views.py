@@ -13,9 +13,20 @@ from sklearn.tree import DecisionTreeClassifier
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.naive_bayes import GaussianNB
 from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
-import joblib
 from datetime import datetime
 from django.conf import settings
+from .dataset_catalog import absolute_path, dataset_path, get_dataset_file
+from .dataset_dtypes import read_dataset, load_dtype_plan
+from .prediction_cache import get_prediction_cache, input_hash
+from .progress import TrainingProgress
+from .training_summary import save_training_summary, load_training_summary
+from .utils.importance import compute_feature_importance
+from .utils.model_selection import parse_time_budget, successive_halving
+from .utils.artifacts import save_artifact, load_bundle, bundle_path, bundle_version
+from .utils.compiled_trees import try_compile, load_compiled, predict_positive
+from .utils.early_stopping import fit_with_early_stopping
+from .utils.feature_plan import FeaturePlan
+from .utils.streaming import STREAMING_LEARNERS, STREAMING_STAGES, train_out_of_core
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -25,35 +36,43 @@ def train_models(request):
         try:
             data = json.loads(request.body)
             dataset_id = data.get('dataset_id')
+            # Clients subscribe to ws/training/<job_id>/ before posting to get live progress
+            job_id = data.get('job_id')
             
             if not dataset_id:
                 return JsonResponse({'error': 'dataset_id required'}, status=400)
             
-            # First try to load from cleaned datasets
-            cleaned_dir = os.path.join(settings.BASE_DIR, 'cleaned_datasets')
-            cleaned_files = [f for f in os.listdir(cleaned_dir) if dataset_id in f] if os.path.exists(cleaned_dir) else []
+            try:
+                time_budget = parse_time_budget(data.get('time_budget'), getattr(settings, 'AUTOML_TIME_BUDGET', None))
+            except ValueError as e:
+                return JsonResponse({'error': str(e)}, status=400)
             
-            if cleaned_files:
-                file_path = os.path.join(cleaned_dir, cleaned_files[0])
-                print(f"Loading cleaned dataset: {cleaned_files[0]}")
-            else:
-                # Fallback to uploaded datasets
-                uploaded_dir = os.path.join(settings.BASE_DIR, 'uploaded_datasets')
-                dataset_files = [f for f in os.listdir(uploaded_dir) if dataset_id in f]
-                
-                if not dataset_files:
-                    return JsonResponse({'error': 'Dataset not found'}, status=404)
-                
-                file_path = os.path.join(uploaded_dir, dataset_files[0])
-                print(f"Loading uploaded dataset: {dataset_files[0]}")
+            # Cleaned copy when the dataset has been cleaned, the upload otherwise
+            file_path = dataset_path(dataset_id, prefer_cleaned=True)
+            
+            if file_path is None:
+                return JsonResponse({'error': 'Dataset not found'}, status=404)
+            print(f"Loading dataset: {os.path.basename(file_path)}")
             
-            df = pd.read_csv(file_path)
+            # Too large to load: stream it instead of reading it into one frame
+            record = get_dataset_file(dataset_id)
+            large = record is not None and (record.rows or 0) > getattr(settings, 'LARGE_DATASET_ROWS', 2000000)
+            if data.get('out_of_core', large):
+                progress = TrainingProgress(job_id, total_stages=len(STREAMING_STAGES))
+                source = absolute_path(record.columnar_path) if record and record.columnar_path else file_path
+                return train_streaming(dataset_id, source, progress, data.get('models', STREAMING_LEARNERS))
+            
+            progress = TrainingProgress(job_id, total_stages=3)
+            
+            with progress.stage('data_loading') as stage:
+                df = read_dataset(file_path, dataset_id)
+                stage['rows'] = len(df)
             print(f"Training on dataset: {len(df)} rows, {len(df.columns)} columns")
             
             # Handle telco churn dataset
             if 'Churn' in df.columns:
                 # Prepare target variable
-                y = df['Churn'].map({'Yes': 1, 'No': 0})
+                y = df['Churn'].astype(object).map({'Yes': 1, 'No': 0})
                 X = df.drop(columns=['customerID', 'Churn'] if 'customerID' in df.columns else ['Churn'])
                 target_column = 'Churn'
             elif 'Temperature' in df.columns:
@@ -66,34 +85,38 @@ def train_models(request):
             else:
                 return JsonResponse({'error': 'No valid target column found'}, status=400)
             
-            # Handle missing values
-            X = X.fillna(0)
-            
-            # Convert TotalCharges to numeric if it exists
-            if 'TotalCharges' in X.columns:
-                X['TotalCharges'] = pd.to_numeric(X['TotalCharges'], errors='coerce').fillna(0)
-            
-            # Encode categorical features
-            label_encoders = {}
-            for col in X.select_dtypes(include=['object']).columns:
-                le = LabelEncoder()
-                X[col] = le.fit_transform(X[col].astype(str))
-                label_encoders[col] = le
+            with progress.stage('preprocessing', rows=len(X)):
+                # Handle missing values; categorical gaps are encoded as their own label below
+                numeric_cols = X.select_dtypes(include=['number']).columns
+                X[numeric_cols] = X[numeric_cols].fillna(0)
+                
+                # Convert TotalCharges to numeric if it exists
+                if 'TotalCharges' in X.columns:
+                    X['TotalCharges'] = pd.to_numeric(X['TotalCharges'], errors='coerce').fillna(0)
+                
+                # Encode categorical features
+                label_encoders = {}
+                for col in X.select_dtypes(include=['object', 'category']).columns:
+                    le = LabelEncoder()
+                    X[col] = le.fit_transform(X[col].astype(str))
+                    label_encoders[col] = le
             
             print(f"Feature matrix: {X.shape}, Target: {y.shape}")
             
             # Train-test split
-            test_size = 0.3 if len(df) < 50 else 0.2
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=test_size, random_state=42, stratify=y
-            )
-            
-            print(f"Training set: {X_train.shape}, Test set: {X_test.shape}")
-            
-            # Feature scaling
-            scaler = StandardScaler()
-            X_train_scaled = scaler.fit_transform(X_train)
-            X_test_scaled = scaler.transform(X_test)
+            with progress.stage('split_and_scale', rows=len(X)) as stage:
+                test_size = 0.3 if len(df) < 50 else 0.2
+                X_train, X_test, y_train, y_test = train_test_split(
+                    X, y, test_size=test_size, random_state=42, stratify=y
+                )
+                
+                print(f"Training set: {X_train.shape}, Test set: {X_test.shape}")
+                
+                # Feature scaling
+                scaler = StandardScaler()
+                X_train_scaled = scaler.fit_transform(X_train)
+                X_test_scaled = scaler.transform(X_test)
+                stage['rows'] = len(X_train)
             
             # Train models
             models = {
@@ -107,12 +130,30 @@ def train_models(request):
                 'NaiveBayes': GaussianNB()
             }
             
+            # Large splits pick a winner on stratified samples and refit only it on all rows
+            halving = None
+            selection = data.get('selection') or (
+                'successive_halving' if len(X_train) > getattr(settings, 'AUTOML_HALVING_ROWS', 100000) else 'full'
+            )
+            if selection == 'successive_halving':
+                progress.total_stages += len(models)
+                halving = successive_halving(
+                    models, X_train_scaled, y_train, metric='f1_score',
+                    time_budget=time_budget,
+                    progress=progress
+                )
+                models = {halving['winner']: models[halving['winner']]}
+            progress.total_stages += len(models)
+            
             results = []
+            fitted = {}
             
             for model_name, model in models.items():
                 try:
                     # Train model
-                    model.fit(X_train_scaled, y_train)
+                    with progress.stage(f'fit_{model_name}', rows=len(X_train)) as fit_stage:
+                        # Ensembles grow only until validation (or out-of-bag) score stops improving
+                        model, n_estimators = fit_with_early_stopping(model, X_train_scaled, y_train)
                     y_pred = model.predict(X_test_scaled)
                     
                     # Calculate metrics
@@ -128,23 +169,27 @@ def train_models(request):
                     # Save model
                     models_dir = os.path.join(settings.BASE_DIR, 'trained_models')
                     os.makedirs(models_dir, exist_ok=True)
-                    model_path = os.path.join(models_dir, f'{dataset_id}_{model_name}.joblib')
+                    model_path = os.path.join(models_dir, f'{dataset_id}_{model_name}')
                     
-                    joblib.dump({
+                    save_artifact(model_path, {
                         'model': model,
                         'scaler': scaler,
                         'label_encoders': label_encoders,
                         'feature_names': list(X.columns),
-                        'target_column': target_column
-                    }, model_path)
+                        'target_column': target_column,
+                        'compiled': try_compile(model)
+                    }, metrics={'accuracy': float(accuracy), 'f1_score': float(f1), 'auc_score': float(auc)})
                     
                     results.append({
                         'name': model_name,
                         'accuracy': float(accuracy),
                         'f1_score': float(f1),
                         'auc_score': float(auc),
+                        'training_time': fit_stage['duration_ms'] / 1000,
+                        'n_estimators': n_estimators,
                         'model_path': model_path
                     })
+                    fitted[model_name] = model
                     
                     print(f"{model_name}: Accuracy={accuracy:.3f}, F1={f1:.3f}, AUC={auc:.3f}")
                     
@@ -153,27 +198,39 @@ def train_models(request):
                     continue
             
             if not results:
+                progress.fail('All models failed to train')
                 return JsonResponse({'error': 'All models failed to train'}, status=400)
             
             # Sort by F1 score
             results.sort(key=lambda x: x['f1_score'], reverse=True)
             
-            # Calculate feature importance from best model
-            best_model_data = joblib.load(results[0]['model_path'])
-            best_model = best_model_data['model']
-            feature_names = best_model_data['feature_names']
+            # Eliminated candidates keep their sample scores, listed after the refitted winner
+            if halving:
+                eliminated = [name for name in halving['leaderboard'] if name != halving['winner']]
+                for name in sorted(eliminated, key=lambda n: halving['leaderboard'][n]['f1_score'], reverse=True):
+                    entry = halving['leaderboard'][name]
+                    results.append({
+                        'name': name,
+                        'accuracy': entry['accuracy'],
+                        'f1_score': entry['f1_score'],
+                        'auc_score': entry['auc_score'],
+                        'training_time': entry['fit_seconds'],
+                        'model_path': None,
+                        'selection_rows': entry['rows']
+                    })
+            
+            # Global importance of the best model, computed while it is still in memory
+            progress.total_stages += 1
+            with progress.stage('feature_importance', rows=len(X_test)):
+                ranked = compute_feature_importance(
+                    fitted[results[0]['name']], X_test_scaled, y_test.to_numpy(),
+                    list(X.columns), background=X_train_scaled
+                )
+            save_training_summary(dataset_id, results, results[0]['name'], ranked, target_column)
+            feature_importance = ranked[:5]  # Top 5
             
-            feature_importance = []
-            if hasattr(best_model, 'feature_importances_'):
-                importances = best_model.feature_importances_
-                for i, importance in enumerate(importances):
-                    if i < len(feature_names):
-                        feature_importance.append({
-                            'feature': feature_names[i],
-                            'importance': float(importance)
-                        })
-                feature_importance.sort(key=lambda x: x['importance'], reverse=True)
-                feature_importance = feature_importance[:5]  # Top 5
+            progress.complete(best_model=results[0]['name'])
+            total_ms = sum(timing['duration_ms'] for timing in progress.timings)
             
             return JsonResponse({
                 'success': True,
@@ -184,8 +241,17 @@ def train_models(request):
                     'features': len(X.columns),
                     'target': target_column
                 },
-                'training_time': '2.3 minutes',
-                'feature_importance': feature_importance
+                'training_time': f'{total_ms / 60000:.1f} minutes',
+                'stage_timings': progress.timings,
+                'feature_importance': feature_importance,
+                'model_selection': {
+                    'mode': selection,
+                    'rungs': halving['rungs'] if halving else [],
+                    'seconds': halving['seconds'] if halving else None,
+                    # The budget bounds the search only; the winner's full refit runs after it
+                    'time_budget': time_budget,
+                    'refit_in_budget': False
+                }
             })
             
         except Exception as e:
@@ -194,6 +260,131 @@ def train_models(request):
     
     return JsonResponse({'message': 'Model training endpoint'})
 
+def train_streaming(dataset_id, source, progress, learners):
+    """Out-of-core variant of train_models; bundles and response keep the same shape"""
+    try:
+        outcome = train_out_of_core(
+            source, target_col='Churn', learners=learners,
+            chunksize=getattr(settings, 'OUT_OF_CORE_CHUNK_ROWS', 200000),
+            dtype_plan=load_dtype_plan(dataset_id), progress=progress
+        )
+    except ValueError as e:
+        progress.fail(e)
+        return JsonResponse({'error': f'Out-of-core training needs a Churn target: {str(e)}'}, status=400)
+    
+    plan, scaler = outcome['plan'], outcome['scaler']
+    models_dir = os.path.join(settings.BASE_DIR, 'trained_models')
+    os.makedirs(models_dir, exist_ok=True)
+    
+    results = []
+    for model_name, model in outcome['models'].items():
+        model_path = os.path.join(models_dir, f'{dataset_id}_{model_name}')
+        save_artifact(model_path, {
+            'model': model,
+            'scaler': scaler,
+            'label_encoders': {},
+            'feature_names': plan.feature_names,
+            'feature_plan': plan.to_dict(),
+            'target_column': 'Churn',
+            'compiled': try_compile(model)
+        }, metrics=outcome['metrics'][model_name])
+        results.append({'name': model_name, **outcome['metrics'][model_name],
+                        'training_time': None, 'model_path': model_path})
+    
+    if not results:
+        progress.fail('No streaming learner was available')
+        return JsonResponse({'error': 'No streaming learner was available'}, status=400)
+    results.sort(key=lambda x: x['f1_score'], reverse=True)
+    best = results[0]['name']
+    
+    X_sample, y_sample = outcome['holdout_sample']
+    try:
+        ranked = compute_feature_importance(outcome['models'][best], X_sample, y_sample, plan.feature_names)
+    except Exception as e:
+        print(f"Feature importance skipped for {best}: {str(e)}")
+        ranked = []
+    save_training_summary(dataset_id, results, best, ranked, 'Churn')
+    
+    progress.complete(best_model=best)
+    total_ms = sum(timing['duration_ms'] for timing in progress.timings)
+    
+    return JsonResponse({
+        'success': True,
+        'models': results,
+        'best_model': best,
+        'dataset_info': {
+            'rows': outcome['rows'],
+            'features': len(plan.feature_names),
+            'target': 'Churn',
+            'out_of_core': True,
+            'holdout_rows': outcome['holdout_rows']
+        },
+        'training_time': f'{total_ms / 60000:.1f} minutes',
+        'stage_timings': progress.timings,
+        'feature_importance': ranked[:5]
+    })
+
+def score_single(model_path, input_data):
+    """Score one input against a saved model; the dict predict_single returns"""
+    model_data = load_bundle(model_path)
+    
+    scaler = model_data['scaler']
+    label_encoders = model_data['label_encoders']
+    feature_names = model_data['feature_names']
+    
+    # Prepare input data
+    input_df = pd.DataFrame([input_data])
+    
+    if model_data.get('feature_plan'):
+        # Out-of-core bundles encode raw records with the plan fitted while streaming
+        input_features = FeaturePlan.from_dict(model_data['feature_plan']).transform(input_df)
+    else:
+        # Encode categorical features
+        for col in label_encoders:
+            if col in input_df.columns:
+                try:
+                    input_df[col] = label_encoders[col].transform([str(input_data[col])])
+                except:
+                    input_df[col] = 0  # Default for unknown categories
+        
+        # Ensure all features are present
+        for feature in feature_names:
+            if feature not in input_df.columns:
+                input_df[feature] = 0
+        
+        # Reorder columns to match training
+        input_features = input_df[feature_names]
+    
+    # Scale features
+    input_scaled = scaler.transform(input_features)
+    
+    # Make prediction; one row is the case the compiled trees are built for, so
+    # the estimator is only unpickled for bundles without them
+    compiled = load_compiled(model_data)
+    model = None if compiled is not None else model_data['model']
+    probability = predict_positive(model, input_scaled, compiled)[0]
+    prediction = int(probability > 0.5)
+    
+    # Risk assessment
+    if probability < 0.3:
+        risk_level = 'Low'
+        recommendations = ['Equipment operating normally', 'Continue regular maintenance']
+    elif probability < 0.7:
+        risk_level = 'Medium'
+        recommendations = ['Monitor closely', 'Schedule preventive maintenance']
+    else:
+        risk_level = 'High'
+        recommendations = ['Immediate inspection required', 'Consider equipment replacement']
+    
+    return {
+        'prediction': int(prediction),
+        'probability': float(probability),
+        'risk_level': risk_level,
+        'risk_score': float(probability * 100),
+        'recommendations': recommendations,
+        'confidence': float(max(probability, 1 - probability))
+    }
+
 @csrf_exempt
 def predict_single(request):
     if request.method == 'POST':
@@ -244,62 +435,26 @@ def predict_single(request):
                     'confidence': 0.85
                 })
             
-            model_path = os.path.join(models_dir, model_files[0])
-            model_data = joblib.load(model_path)
+            # Best model of the dataset's last training run
+            models_dir = os.path.join(settings.BASE_DIR, 'trained_models')
+            summary = load_training_summary(dataset_id)
+            model_path = bundle_path(models_dir, f"{dataset_id}_{summary['best_model']}") if summary else None
+            if model_path is None:
+                return JsonResponse({'error': 'No trained model found for this dataset'}, status=404)
             
-            model = model_data['model']
-            scaler = model_data['scaler']
-            label_encoders = model_data['label_encoders']
-            feature_names = model_data['feature_names']
-            
-            # Prepare input data
-            input_df = pd.DataFrame([input_data])
-            
-            # Encode categorical features
-            for col in label_encoders:
-                if col in input_df.columns:
-                    try:
-                        input_df[col] = label_encoders[col].transform([str(input_data[col])])
-                    except:
-                        input_df[col] = 0  # Default for unknown categories
-            
-            # Ensure all features are present
-            for feature in feature_names:
-                if feature not in input_df.columns:
-                    input_df[feature] = 0
-            
-            # Reorder columns to match training
-            input_df = input_df[feature_names]
-            
-            # Scale features
-            input_scaled = scaler.transform(input_df)
-            
-            # Make prediction
-            prediction = model.predict(input_scaled)[0]
-            probability = model.predict_proba(input_scaled)[0][1]
-            
-            # Risk assessment
-            if probability < 0.3:
-                risk_level = 'Low'
-                recommendations = ['Equipment operating normally', 'Continue regular maintenance']
-            elif probability < 0.7:
-                risk_level = 'Medium'
-                recommendations = ['Monitor closely', 'Schedule preventive maintenance']
-            else:
-                risk_level = 'High'
-                recommendations = ['Immediate inspection required', 'Consider equipment replacement']
-            
-            return JsonResponse({
-                'prediction': int(prediction),
-                'probability': float(probability),
-                'risk_level': risk_level,
-                'risk_score': float(probability * 100),
-                'recommendations': recommendations,
-                'confidence': float(max(model.predict_proba(input_scaled)[0]))
-            })
+            # Identical requests for the same model file share one computation and its cached result
+            cache_key = (f'{model_path}@{bundle_version(model_path)}', input_hash(input_data))
+            return JsonResponse(get_prediction_cache().get_or_compute(
+                cache_key, lambda: score_single(model_path, input_data)
+            ))
             
         except Exception as e:
             print(f"Prediction error: {str(e)}")
             return JsonResponse({'error': f'Prediction failed: {str(e)}'}, status=500)
     
-    return JsonResponse({'message': 'Prediction endpoint'})
\ No newline at end of file
+    return JsonResponse({'message': 'Prediction endpoint'})
+
+@csrf_exempt
+def prediction_cache_stats(request):
+    """Hit rate, coalescing and latency of this process's prediction cache"""
+    return JsonResponse(get_prediction_cache().stats())
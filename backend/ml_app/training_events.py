@@ -0,0 +1,71 @@
+import logging
+from datetime import datetime
+from django.db import transaction
+from django.utils import timezone
+from .models import TrainingLog
+
+logger = logging.getLogger(__name__)
+
+
+class TrainingEventRecorder:
+    """
+    Buffers TrainingLog rows for one training job.
+
+    Stage events are kept in memory and written with a single ``bulk_create``
+    per flush instead of one INSERT per stage. Rows are stored with
+    ``model=None`` and attached to the resulting ModelVersion by ``link``.
+    """
+
+    def __init__(self, job_id, batch_size=50):
+        self.job_id = job_id or ''
+        self.batch_size = batch_size
+        self._pending = []
+
+    def __call__(self, timing):
+        """TrainingProgress listener: record a finished stage"""
+        self.record(
+            timing['step'], timing['status'],
+            duration_ms=timing.get('duration_ms'),
+            rows=timing.get('rows'),
+            started_at=timing.get('started_at'),
+        )
+
+    def record(self, step, status, duration_ms=None, rows=None, started_at=None, details=''):
+        if isinstance(started_at, str):
+            started_at = datetime.fromisoformat(started_at)
+
+        self._pending.append(TrainingLog(
+            job_id=self.job_id,
+            step=step,
+            status=status,
+            started_at=started_at or timezone.now(),
+            duration_ms=duration_ms,
+            rows=rows,
+            details=details,
+        ))
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered events in one query; never raises"""
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, []
+        try:
+            TrainingLog.objects.bulk_create(pending)
+        except Exception as e:
+            # Losing a log batch must not fail the training job itself
+            logger.warning("Could not write %d training events for %s: %s", len(pending), self.job_id, e)
+            return 0
+        return len(pending)
+
+    def link(self, model_version):
+        """Flush and attach every row of this job to the saved ModelVersion"""
+        self.flush()
+        if not self.job_id:
+            return 0
+
+        with transaction.atomic():
+            return TrainingLog.objects.filter(job_id=self.job_id, model__isnull=True).update(model=model_version)
@@ -0,0 +1,42 @@
+import os
+import json
+from datetime import datetime
+from django.conf import settings
+
+
+def summary_path(dataset_id):
+    return os.path.join(settings.BASE_DIR, 'trained_models', f'{dataset_id}_summary.json')
+
+
+def save_training_summary(dataset_id, models, best_model, feature_importance, target_column=None):
+    """Persist the outcome of a training run next to its model files"""
+    path = summary_path(dataset_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    summary = {
+        'dataset_id': dataset_id,
+        'best_model': best_model,
+        'target_column': target_column,
+        'models': models,
+        'feature_importance': feature_importance,
+        'trained_at': datetime.now().isoformat()
+    }
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2, default=str)
+    return summary
+
+
+def load_training_summary(dataset_id):
+    """Return the stored summary for a dataset, or None if it was never trained"""
+    if not dataset_id:
+        return None
+    try:
+        with open(summary_path(dataset_id), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def stored_feature_importance(dataset_id):
+    summary = load_training_summary(dataset_id)
+    return summary.get('feature_importance', []) if summary else []
@@ -1,11 +1,12 @@
 from django.urls import path
-from .train_views import train_models, predict_single
+from .train_views import train_models, predict_single, prediction_cache_stats
 from .simple_upload import simple_upload
 from .simple_datasets import simple_datasets
 from .analytics import get_analytics
 from .ai_explanations import explain_training_results, generate_equipment_insights
 from .data_cleaning import clean_dataset, perform_eda, get_cleaned_datasets, delete_dataset, get_dataset_details
 from .chatbot_ai import chat_with_ai
+from .risk_views import get_customer_risk, get_top_risk
 from django.http import JsonResponse
 
 def ml_home(request):
@@ -17,6 +18,9 @@ def ml_home(request):
             'upload': '/api/ml/upload/',
             'train': '/api/ml/train/',
             'predict': '/api/ml/predict/',
+            'prediction_cache_stats': '/api/ml/predict/cache-stats/',
+            'customer_risk': '/api/ml/customers/<customer_id>/risk/',
+            'top_risk': '/api/ml/risk/<dataset_id>/top/',
             'analytics': '/api/ml/analytics/1/',
             'ai_explain': '/api/ml/ai-explain/',
             'equipment_insights': '/api/ml/equipment-insights/'
@@ -29,6 +33,9 @@ urlpatterns = [
     path('upload/', simple_upload, name='simple_upload'),
     path('train/', train_models, name='train_models'),
     path('predict/', predict_single, name='predict_single'),
+    path('predict/cache-stats/', prediction_cache_stats, name='prediction_cache_stats'),
+    path('customers/<str:customer_id>/risk/', get_customer_risk, name='get_customer_risk'),
+    path('risk/<str:dataset_id>/top/', get_top_risk, name='get_top_risk'),
     path('analytics/<str:dataset_id>/', get_analytics, name='get_analytics'),
     path('ai-explain/', explain_training_results, name='ai_explain'),
     path('equipment-insights/', generate_equipment_insights, name='equipment_insights'),
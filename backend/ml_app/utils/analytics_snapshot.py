@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+TENURE_COHORTS = ['0-1Y', '1-2Y', '2-3Y', '3-4Y', '4Y+']
+
+
+def churn_flags(series):
+    """Yes/No (or already 0/1) churn labels as floats; Yes/No may be object or category"""
+    if not pd.api.types.is_numeric_dtype(series):
+        return series.astype(object).map({'Yes': 1.0, 'No': 0.0}).astype(float)
+    return pd.to_numeric(series, errors='coerce').astype(float)
+
+
+def compute_snapshot(df, risk_scores, target_column='Churn', top_n=50, high_risk_threshold=0.7):
+    """
+    Dashboard analytics for one dataset scored by one model.
+
+    ``risk_scores`` are the model's churn probabilities aligned with ``df``.
+    Everything is vectorized: churn is mapped to 0/1 once and the cohort
+    table is a single grouped aggregation.
+    """
+    frame = df.reset_index(drop=True)
+    risk = pd.Series(np.asarray(risk_scores, dtype=np.float32), name='risk_score')
+    churn = churn_flags(frame[target_column]) if target_column in frame.columns else None
+    churn_rate = float(churn.mean()) if churn is not None and churn.notna().any() else 0.0
+
+    numeric = frame.select_dtypes(include=['number']).astype(np.float32)
+    numeric['risk_score'] = risk
+    if churn is not None:
+        numeric[target_column] = churn.astype(np.float32)
+    correlation = numeric.corr().round(4).fillna(0).to_dict() if len(numeric.columns) > 1 else {}
+
+    cohort_analysis = {}
+    if 'tenure' in frame.columns:
+        grouped = pd.DataFrame({
+            'tenure_bucket': pd.cut(frame['tenure'], bins=5, labels=TENURE_COHORTS),
+            'Churn': churn if churn is not None else 0.0,
+            'risk_score': risk
+        }).groupby('tenure_bucket', observed=False)
+        cohorts = grouped.agg(Churn=('Churn', 'mean'), customerID=('risk_score', 'size'),
+                              avg_risk=('risk_score', 'mean'))
+        cohort_analysis = cohorts.round(4).fillna(0).to_dict()
+
+    top = risk.nlargest(top_n)
+    rows = frame.loc[top.index]
+    high_risk_customers = [
+        {
+            'customer_id': str(row.get('customerID', f'C{index}')),
+            'risk_score': round(float(score), 4),
+            'monthly_charges': float(row.get('MonthlyCharges', 0) or 0),
+            'tenure': float(row.get('tenure', 0) or 0)
+        }
+        for (index, row), score in zip(rows.iterrows(), top.values)
+    ]
+
+    insights = []
+    if churn_rate > 0.2:
+        insights.append("High churn rate detected. Consider retention campaigns.")
+    if churn is not None and 'PaperlessBilling' in frame.columns:
+        paperless_churn = churn[frame['PaperlessBilling'] == 'Yes'].mean()
+        if paperless_churn > churn_rate * 1.2:
+            insights.append("Paperless billing customers show higher churn. Review billing experience.")
+
+    return {
+        'churn_rate': churn_rate,
+        'total_customers': len(frame),
+        'predicted_high_risk': int((risk >= high_risk_threshold).sum()),
+        'average_risk': float(risk.mean()) if len(risk) else 0.0,
+        'correlation': correlation,
+        'cohort_analysis': cohort_analysis,
+        'high_risk_customers': high_risk_customers,
+        'insights': insights
+    }
@@ -0,0 +1,267 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+import joblib
+import numpy as np
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+# Kept free of Django imports: training views, the event stream scorer and
+# scripts all read the same on-disk model format.
+
+ARTIFACT_FORMAT = 1
+MANIFEST = 'manifest.json'
+MODEL_FILE = 'model.joblib'
+OBJECTS_FILE = 'objects.joblib'
+SCALER_ATTRS = ['mean_', 'scale_', 'var_']
+
+
+def _sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _files_checksum(files):
+    return hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+
+
+def save_artifact(path, bundle, metrics=None):
+    """
+    Write a model bundle as an artifact directory.
+
+    Numeric arrays (compiled tree nodes, scaler statistics, the SHAP
+    background) become uncompressed .npy files that load with ``mmap_mode``,
+    so every worker maps the same page-cache copy instead of unpickling its
+    own. Feature names, encoders, the feature plan, target and metrics go
+    into ``manifest.json`` with a SHA-256 per file and one over all of
+    them. The estimator itself is kept in model.joblib for the code that
+    needs the object (explanations, non-tree models).
+
+    Each save writes a new hidden version directory next to ``path`` and
+    then points the ``path`` symlink at it with one atomic rename, so
+    ``path`` always resolves to a complete artifact. The previous version
+    is kept for readers that resolved it just before the swap; older ones
+    are removed.
+    """
+    path = os.path.abspath(path)
+    parent, name = os.path.split(path)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f'.{name}.v', dir=parent)
+    os.makedirs(os.path.join(staging, 'arrays'))
+
+    arrays = {}
+
+    def add_array(name, value):
+        relative = os.path.join('arrays', f'{name}.npy')
+        np.save(os.path.join(staging, relative), np.ascontiguousarray(value))
+        arrays[name] = relative
+
+    manifest = {
+        'format': ARTIFACT_FORMAT,
+        'created_at': datetime.now().isoformat(),
+        'model_type': type(bundle['model']).__name__,
+        'feature_names': list(bundle.get('feature_names') or []),
+        'target_column': bundle.get('target_column'),
+        'feature_plan': bundle.get('feature_plan'),
+        'label_encoders': {col: [str(c) for c in encoder.classes_]
+                           for col, encoder in (bundle.get('label_encoders') or {}).items()},
+        'metrics': metrics or {},
+    }
+    objects = {}
+
+    scaler = bundle.get('scaler')
+    if type(scaler) is StandardScaler:
+        for attr in SCALER_ATTRS:
+            if getattr(scaler, attr, None) is not None:
+                add_array(f'scaler.{attr}', getattr(scaler, attr))
+        manifest['scaler'] = {'n_samples_seen_': np.asarray(scaler.n_samples_seen_).tolist(),
+                              'n_features_in_': int(scaler.n_features_in_)}
+    elif scaler is not None:
+        objects['scaler'] = scaler
+
+    compiled = bundle.get('compiled')
+    if compiled:
+        for name, value in compiled['arrays'].items():
+            add_array(f'compiled.{name}', value)
+        manifest['compiled'] = {key: value for key, value in compiled.items() if key != 'arrays'}
+
+    if bundle.get('background') is not None:
+        add_array('background', np.asarray(bundle['background'], dtype=np.float32))
+
+    manifest['arrays'] = arrays
+    joblib.dump(bundle['model'], os.path.join(staging, MODEL_FILE))
+    stored = [MODEL_FILE, *arrays.values()]
+    if objects:
+        joblib.dump(objects, os.path.join(staging, OBJECTS_FILE))
+        stored.append(OBJECTS_FILE)
+
+    manifest['files'] = {relative: _sha256(os.path.join(staging, relative)) for relative in stored}
+    manifest['checksum'] = _files_checksum(manifest['files'])
+    with open(os.path.join(staging, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, default=str)
+
+    _swap_version(path, staging)
+    return manifest
+
+
+def _swap_version(path, version_dir):
+    parent, name = os.path.split(path)
+    if os.path.isdir(path) and not os.path.islink(path):
+        # Artifacts written before versioning were plain directories; this
+        # one-time move is the only moment the path is briefly missing
+        previous = os.path.join(parent, f'.{name}.vlegacy{os.getpid()}')
+        os.replace(path, previous)
+    else:
+        previous = os.path.realpath(path) if os.path.islink(path) else None
+
+    link = os.path.join(parent, f'.{name}.link{os.getpid()}-{threading.get_ident()}')
+    os.symlink(os.path.basename(version_dir), link)
+    os.replace(link, path)
+
+    if previous is None:
+        return
+    # Only versions older than the one just retired go; a concurrent save's
+    # staging directory is newer and is left alone
+    cutoff = os.path.getmtime(previous)
+    for entry in os.listdir(parent):
+        candidate = os.path.join(parent, entry)
+        if (entry.startswith(f'.{name}.v') and candidate not in (previous, version_dir)
+                and os.path.getmtime(candidate) < cutoff):
+            shutil.rmtree(candidate, ignore_errors=True)
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST), 'r') as f:
+        return json.load(f)
+
+
+def verify_artifact(path):
+    """Raise ValueError unless every file matches the checksums in the manifest"""
+    manifest = read_manifest(path)
+    if _files_checksum(manifest['files']) != manifest['checksum']:
+        raise ValueError(f'Manifest checksum mismatch in {path}')
+    for relative, expected in manifest['files'].items():
+        if _sha256(os.path.join(path, relative)) != expected:
+            raise ValueError(f'Checksum mismatch for {relative} in {path}')
+    return manifest
+
+
+class ModelArtifact(dict):
+    """
+    A loaded artifact, usable wherever a joblib bundle dict is.
+
+    The estimator is only unpickled when ``bundle['model']`` is first read,
+    so scoring through the compiled trees never pays for it.
+    """
+
+    def __init__(self, path, mmap_mode, **items):
+        super().__init__(**items)
+        self.path = path
+        self.mmap_mode = mmap_mode
+
+    def get(self, key, default=None):
+        return self[key] if key == 'model' else super().get(key, default)
+
+    def __missing__(self, key):
+        if key != 'model':
+            raise KeyError(key)
+        model = joblib.load(os.path.join(self.path, MODEL_FILE), mmap_mode=self.mmap_mode)
+        self['model'] = model
+        return model
+
+
+def load_artifact(path, mmap_mode='r', verify=False):
+    # Pin the version the link points at now, so a lazy model load after a
+    # later save still reads files from the same artifact
+    path = os.path.realpath(path)
+    manifest = verify_artifact(path) if verify else read_manifest(path)
+    if manifest.get('format') != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported artifact format in {path}")
+    arrays = {name: np.load(os.path.join(path, relative), mmap_mode=mmap_mode)
+              for name, relative in manifest['arrays'].items()}
+    objects = joblib.load(os.path.join(path, OBJECTS_FILE)) if OBJECTS_FILE in manifest['files'] else {}
+
+    scaler = objects.get('scaler')
+    if 'scaler' in manifest:
+        scaler = StandardScaler()
+        for attr in SCALER_ATTRS:
+            setattr(scaler, attr, arrays.get(f'scaler.{attr}'))
+        scaler.n_samples_seen_ = np.asarray(manifest['scaler']['n_samples_seen_'])
+        scaler.n_features_in_ = manifest['scaler']['n_features_in_']
+
+    label_encoders = {}
+    for col, classes in manifest['label_encoders'].items():
+        label_encoders[col] = LabelEncoder()
+        label_encoders[col].classes_ = np.array(classes)
+
+    compiled = None
+    if 'compiled' in manifest:
+        prefix = 'compiled.'
+        compiled = {**manifest['compiled'],
+                    'arrays': {name[len(prefix):]: value for name, value in arrays.items()
+                               if name.startswith(prefix)}}
+
+    return ModelArtifact(
+        path, mmap_mode,
+        scaler=scaler,
+        label_encoders=label_encoders,
+        feature_names=manifest['feature_names'],
+        target_column=manifest['target_column'],
+        feature_plan=manifest['feature_plan'],
+        compiled=compiled,
+        background=arrays.get('background'),
+        metrics=manifest['metrics'],
+    )
+
+
+def is_artifact(path):
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+
+def load_bundle(path, mmap_mode='r'):
+    """Load a model from an artifact directory or a legacy .joblib bundle"""
+    return load_artifact(path, mmap_mode) if is_artifact(path) else joblib.load(path)
+
+
+def bundle_version(path):
+    """Changes whenever the model at ``path`` is rewritten"""
+    return os.path.getmtime(os.path.join(path, MANIFEST) if is_artifact(path) else path)
+
+
+def list_bundles(models_dir):
+    """(model_id, path) for every saved model, artifacts and legacy .joblib files alike"""
+    if not os.path.isdir(models_dir):
+        return []
+    bundles = {}
+    for name in sorted(os.listdir(models_dir)):
+        if name.startswith('.'):
+            # Version directories and in-progress saves behind the artifact links
+            continue
+        path = os.path.join(models_dir, name)
+        if is_artifact(path):
+            bundles[name] = path
+        elif name.endswith('.joblib'):
+            # A legacy file is only listed when no artifact replaced it
+            bundles.setdefault(name[:-len('.joblib')], path)
+    return sorted(bundles.items())
+
+
+def bundle_path(models_dir, model_id):
+    """Path of a saved model by id, preferring the artifact directory; None if absent"""
+    for path in (os.path.join(models_dir, model_id), os.path.join(models_dir, f'{model_id}.joblib')):
+        if is_artifact(path) or os.path.isfile(path):
+            return path
+    return None
+
+
+def bundle_feature_names(path):
+    """Feature names without loading the model, for artifacts; legacy bundles are unpickled"""
+    if is_artifact(path):
+        return read_manifest(path)['feature_names']
+    return joblib.load(path).get('feature_names', [])
@@ -0,0 +1,240 @@
+import json
+import numpy as np
+
+# Kept free of Django imports: the inference Lambda image ships this module so a bundle
+# compiled at training time is scored the same way everywhere.
+
+COMPILED_FORMAT = 1
+# Largest batch a compiled random forest scores faster than scikit-learn's own
+# predictor; compiled boosters only beat xgboost/sklearn on single rows
+FOREST_BATCH_ROWS = 128
+
+
+class CompiledForest:
+    """
+    A binary tree ensemble flattened into NumPy node arrays.
+
+    All trees share one set of arrays; ``roots`` holds each tree's first
+    node. Leaves point to themselves and read feature 0, so traversal is a
+    fixed ``depth`` steps of gather-compare-select for every (row, tree)
+    pair at once, with no per-node Python. ``aggregate`` is 'mean' for
+    random forests (leaf values are class-1 fractions) or 'logit' for
+    boosting (leaf values are summed with ``base_margin`` then squashed).
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, depth, aggregate,
+                 base_margin=0.0, strict=False, missing_left=None, n_features=None):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.depth = int(depth)
+        self.aggregate = aggregate
+        self.base_margin = float(base_margin)
+        # sklearn goes left on x <= threshold, xgboost on x < threshold
+        self.strict = bool(strict)
+        self.missing_left = (np.asarray(missing_left, dtype=bool) if missing_left is not None
+                             else np.ones(len(self.feature), dtype=bool))
+        self.n_features = n_features
+        self.batch_rows = FOREST_BATCH_ROWS if aggregate == 'mean' else 1
+
+    def _leaves(self, X):
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.depth):
+            x = X[rows, self.feature[nodes]]
+            go_left = x < self.threshold[nodes] if self.strict else x <= self.threshold[nodes]
+            missing = np.isnan(x)
+            if missing.any():
+                go_left = np.where(missing, self.missing_left[nodes], go_left)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def _finish(self, leaf_values):
+        if self.aggregate == 'mean':
+            return leaf_values.mean(axis=-1)
+        return 1.0 / (1.0 + np.exp(-(self.base_margin + leaf_values.sum(axis=-1))))
+
+    def predict_proba(self, X):
+        """(n_rows, 2) class probabilities, like the estimator this was compiled from"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        positive = self._finish(self.value[self._leaves(X)])
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+    def predict_one(self, x):
+        """Class-1 probability of a single feature vector, without the batch bookkeeping"""
+        x = np.asarray(x, dtype=np.float32)
+        nodes = self.roots
+        for _ in range(self.depth):
+            values = x[self.feature[nodes]]
+            go_left = values < self.threshold[nodes] if self.strict else values <= self.threshold[nodes]
+            if np.isnan(values).any():
+                go_left = np.where(np.isnan(values), self.missing_left[nodes], go_left)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return float(self._finish(self.value[nodes]))
+
+    def to_dict(self):
+        return {
+            'format': COMPILED_FORMAT,
+            'arrays': {name: getattr(self, name) for name in
+                       ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'missing_left')},
+            'depth': self.depth,
+            'aggregate': self.aggregate,
+            'base_margin': self.base_margin,
+            'strict': self.strict,
+            'n_features': self.n_features,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('format') != COMPILED_FORMAT:
+            raise ValueError('Unsupported compiled model format')
+        return cls(**data['arrays'], depth=data['depth'], aggregate=data['aggregate'],
+                   base_margin=data['base_margin'], strict=data['strict'], n_features=data['n_features'])
+
+
+class _Builder:
+    """Concatenates trees into shared node arrays"""
+
+    def __init__(self):
+        self.parts = {name: [] for name in ('feature', 'threshold', 'left', 'right', 'value', 'missing_left')}
+        self.roots = []
+        self.depth = 0
+        self.size = 0
+
+    def add(self, feature, threshold, left, right, value, depth, missing_left=None):
+        n = len(feature)
+        leaf = left < 0
+        ids = np.arange(n) + self.size
+        self.parts['feature'].append(np.where(leaf, 0, feature))
+        self.parts['threshold'].append(np.where(leaf, 0.0, threshold))
+        self.parts['left'].append(np.where(leaf, ids, left + self.size))
+        self.parts['right'].append(np.where(leaf, ids, right + self.size))
+        self.parts['value'].append(np.where(leaf, value, 0.0))
+        self.parts['missing_left'].append(np.ones(n, dtype=bool) if missing_left is None else missing_left)
+        self.roots.append(self.size)
+        self.depth = max(self.depth, depth)
+        self.size += n
+
+    def build(self, **kwargs):
+        arrays = {name: np.concatenate(parts) for name, parts in self.parts.items()}
+        return CompiledForest(roots=self.roots, depth=self.depth, **arrays, **kwargs)
+
+
+def _compile_sklearn(model):
+    builder = _Builder()
+    name = type(model).__name__
+    if name in ('RandomForestClassifier', 'ExtraTreesClassifier', 'DecisionTreeClassifier'):
+        if list(model.classes_) != [0, 1]:
+            raise ValueError('Only binary 0/1 classifiers can be compiled')
+        for estimator in getattr(model, 'estimators_', [model]):
+            tree = estimator.tree_
+            counts = tree.value[:, 0, :]
+            positive = counts[:, 1] / np.maximum(counts.sum(axis=1), 1e-12)
+            builder.add(tree.feature, tree.threshold, tree.children_left, tree.children_right,
+                        positive, tree.max_depth)
+        return builder.build(aggregate='mean', n_features=model.n_features_in_)
+
+    if name == 'GradientBoostingClassifier':
+        if model.estimators_.shape[1] != 1:
+            raise ValueError('Only binary gradient boosting can be compiled')
+        for estimator in model.estimators_[:, 0]:
+            tree = estimator.tree_
+            builder.add(tree.feature, tree.threshold, tree.children_left, tree.children_right,
+                        tree.value[:, 0, 0] * model.learning_rate, tree.max_depth)
+        base = model._raw_predict_init(np.zeros((1, model.n_features_in_), dtype=np.float32))[0, 0]
+        return builder.build(aggregate='logit', base_margin=base, n_features=model.n_features_in_)
+
+    raise ValueError(f'{name} cannot be compiled')
+
+
+def _compile_xgboost(booster, n_trees=None):
+    config = json.loads(booster.save_config())
+    objective = config['learner']['objective']['name']
+    if objective != 'binary:logistic':
+        raise ValueError(f'xgboost objective {objective} cannot be compiled')
+    base_score = float(config['learner']['learner_model_param']['base_score'])
+    names = booster.feature_names
+    index = {feature: i for i, feature in enumerate(names)} if names else None
+
+    builder = _Builder()
+    dumps = booster.get_dump(dump_format='json')
+    for dump in dumps[:n_trees]:
+        nodes = {}
+        stack = [(json.loads(dump), 0)]
+        depth = 0
+        while stack:
+            node, d = stack.pop()
+            nodes[node['nodeid']] = node
+            depth = max(depth, d)
+            stack.extend((child, d + 1) for child in node.get('children', []))
+
+        n = max(nodes) + 1
+        feature = np.zeros(n, dtype=np.int32)
+        threshold = np.zeros(n)
+        left = np.full(n, -1, dtype=np.int32)
+        right = np.full(n, -1, dtype=np.int32)
+        value = np.zeros(n)
+        missing_left = np.ones(n, dtype=bool)
+        for node_id, node in nodes.items():
+            if 'leaf' in node:
+                value[node_id] = node['leaf']
+                continue
+            split = node['split']
+            feature[node_id] = index[split] if index else int(split.lstrip('f'))
+            threshold[node_id] = np.float32(node['split_condition'])
+            left[node_id], right[node_id] = node['yes'], node['no']
+            missing_left[node_id] = node['missing'] == node['yes']
+        builder.add(feature, threshold, left, right, value, depth, missing_left)
+
+    margin = float(np.log(base_score / (1 - base_score)))
+    return builder.build(aggregate='logit', base_margin=margin, strict=True,
+                         n_features=booster.num_features())
+
+
+def compile_model(model):
+    """
+    Flatten a fitted tree ensemble into a CompiledForest.
+
+    Supports scikit-learn random forests, extra trees, decision trees and
+    binary gradient boosting, XGBClassifier (honouring early stopping's
+    best iteration) and raw xgboost boosters exposed as ``model.booster``.
+    Raises ValueError for anything else.
+    """
+    if type(model).__name__ == 'XGBClassifier':
+        best = getattr(model, 'best_iteration', None)
+        return _compile_xgboost(model.get_booster(), None if best is None else best + 1)
+    if type(getattr(model, 'booster', None)).__name__ == 'Booster':
+        return _compile_xgboost(model.booster)
+    return _compile_sklearn(model)
+
+
+def load_compiled(bundle):
+    """The bundle's CompiledForest, or None when it was saved without one"""
+    compiled = bundle.get('compiled')
+    return CompiledForest.from_dict(compiled) if compiled else None
+
+
+def predict_positive(model, X, compiled=None):
+    """Class-1 probabilities, through the compiled ensemble when it is the faster path"""
+    if compiled is not None:
+        if len(X) == 1:
+            return np.array([compiled.predict_one(X[0])])
+        if len(X) <= compiled.batch_rows:
+            return compiled.predict_proba(X)[:, 1]
+    return model.predict_proba(X)[:, 1]
+
+
+def try_compile(model):
+    """compile_model, or None when the model is not a supported ensemble"""
+    try:
+        return compile_model(model).to_dict()
+    except Exception:
+        return None
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+# Kept free of Django imports like the other utils so workers and scripts can share it
+
+SAMPLE_ROWS = 10000
+INT_TYPES = ['int8', 'int16', 'int32', 'int64']
+
+
+def plan_dtypes(sample, max_categories=1000, max_category_ratio=0.5):
+    """
+    Compact dtype for every column, inferred from a sample of the file.
+
+    Low-cardinality text columns (Yes/No flags, contracts, payment methods)
+    become categories, which keeps their string values for the code that
+    maps 'Yes'/'No' while storing one small integer code per row. Floats are
+    stored as float32 and integers as the smallest type covering the sample.
+    High-cardinality text such as customer ids stays object.
+    """
+    plan = {}
+    rows = max(len(sample), 1)
+    for col in sample.columns:
+        series = sample[col]
+        if pd.api.types.is_bool_dtype(series):
+            plan[col] = 'bool'
+        elif pd.api.types.is_integer_dtype(series):
+            plan[col] = next(t for t in INT_TYPES
+                             if np.iinfo(t).min <= series.min() and series.max() <= np.iinfo(t).max)
+        elif pd.api.types.is_float_dtype(series):
+            plan[col] = 'float32'
+        else:
+            unique = series.nunique(dropna=True)
+            if unique <= max_categories and unique <= max(2, rows * max_category_ratio):
+                plan[col] = 'category'
+    return plan
+
+
+def apply_dtype_plan(df, plan):
+    """
+    Cast a frame to its plan.
+
+    Rows beyond the sample can disagree with it; numeric casts are only made
+    when the column really parsed as numbers, and an integer column that
+    outgrew the planned type is downcast as far as its actual range allows.
+    """
+    for col, dtype in plan.items():
+        if col not in df.columns or str(df[col].dtype) == dtype:
+            continue
+        series = df[col]
+        if dtype in INT_TYPES:
+            if not pd.api.types.is_integer_dtype(series):
+                continue
+            if np.iinfo(dtype).min <= series.min() and series.max() <= np.iinfo(dtype).max:
+                df[col] = series.astype(dtype)
+            else:
+                df[col] = pd.to_numeric(series, downcast='integer')
+        elif dtype == 'float32':
+            if pd.api.types.is_float_dtype(series) or pd.api.types.is_integer_dtype(series):
+                df[col] = series.astype('float32')
+        elif dtype == 'category':
+            df[col] = df[col].astype('category')
+    return df
+
+
+def read_csv_planned(source, plan=None, **kwargs):
+    """
+    pd.read_csv that applies a dtype plan while parsing.
+
+    Category columns are built by the parser chunk by chunk, so the full
+    object column never exists; numeric columns are downcast right after.
+    Without a plan this is plain pd.read_csv.
+    """
+    if not plan:
+        return pd.read_csv(source, **kwargs)
+    parse_dtypes = {col: 'category' for col, dtype in plan.items() if dtype == 'category'}
+    df = pd.read_csv(source, dtype=parse_dtypes, **kwargs)
+    return apply_dtype_plan(df, plan)
+
+
+def infer_csv_plan(source, sample_rows=SAMPLE_ROWS):
+    """Plan dtypes for a CSV file from its first rows"""
+    return plan_dtypes(pd.read_csv(source, nrows=sample_rows))
+
+
+def memory_report(df, plan=None):
+    """Deep memory usage, in the units perform_eda reports, plus the plan that produced it"""
+    per_column = df.memory_usage(deep=True, index=False)
+    return {
+        'memory_usage': f"{per_column.sum() / 1024 / 1024:.2f} MB",
+        'memory_by_column': {col: int(size) for col, size in per_column.items()},
+        'dtype_plan': plan or {}
+    }
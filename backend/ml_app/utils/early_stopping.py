@@ -0,0 +1,83 @@
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+# Kept free of Django imports like the other utils so workers and scripts can share it.
+# Boosters are matched by class name so LightGBM and CatBoost stay optional.
+
+BOOSTERS = ['XGBClassifier', 'LGBMClassifier', 'CatBoostClassifier']
+MAX_BOOSTING_ROUNDS = 1000
+MAX_FOREST_TREES = 500
+
+
+def validation_split(X, y, validation_fraction=0.1, random_state=42):
+    y = np.asarray(y)
+    stratify = y if np.unique(y, return_counts=True)[1].min() >= 2 else None
+    return train_test_split(X, y, test_size=validation_fraction, stratify=stratify, random_state=random_state)
+
+
+def fit_boosting(model, X_train, y_train, X_val, y_val, rounds=20, max_rounds=MAX_BOOSTING_ROUNDS):
+    """Fit a booster with early stopping on (X_val, y_val); returns the number of rounds kept"""
+    name = type(model).__name__
+    if name == 'XGBClassifier':
+        model.set_params(n_estimators=max_rounds, early_stopping_rounds=rounds)
+        model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+        return int(model.best_iteration) + 1
+    if name == 'LGBMClassifier':
+        import lightgbm
+        model.set_params(n_estimators=max_rounds)
+        model.fit(X_train, y_train, eval_set=[(X_val, y_val)],
+                  callbacks=[lightgbm.early_stopping(rounds, verbose=False)])
+        return int(model.best_iteration_ or max_rounds)
+    if name == 'CatBoostClassifier':
+        model.set_params(iterations=max_rounds)
+        # use_best_model shrinks the saved model to the best iteration
+        model.fit(X_train, y_train, eval_set=(X_val, y_val), early_stopping_rounds=rounds, use_best_model=True)
+        return int(model.tree_count_)
+    raise ValueError(f'{name} is not a supported booster')
+
+
+def grow_forest(model, X, y, step=25, max_trees=MAX_FOREST_TREES, tol=1e-3, patience=2):
+    """
+    Grow a random forest ``step`` trees at a time with ``warm_start`` until
+    its out-of-bag accuracy stops improving by ``tol`` for ``patience``
+    steps. Earlier trees are never refitted, so the whole sweep costs one
+    fit of the final forest.
+    """
+    model.set_params(warm_start=True, oob_score=True, bootstrap=True, n_estimators=step)
+    best, stale = -np.inf, 0
+    while True:
+        model.fit(X, y)
+        if model.oob_score_ > best + tol:
+            best, stale = model.oob_score_, 0
+        else:
+            stale += 1
+        if stale >= patience or model.n_estimators >= max_trees:
+            break
+        model.set_params(n_estimators=model.n_estimators + step)
+    model.set_params(warm_start=False)
+    return model.n_estimators
+
+
+def fit_with_early_stopping(model, X, y, rounds=20, validation_fraction=0.1, random_state=42):
+    """
+    Fit ``model`` only as large as the data supports.
+
+    Boosters (XGBoost, LightGBM, CatBoost) stop on a held-out validation
+    split, GradientBoosting uses its built-in ``n_iter_no_change`` and random
+    forests grow by warm start until out-of-bag accuracy plateaus. Any other
+    model is fitted as is. Returns the fitted model and its ensemble size
+    (None for models without one).
+    """
+    name = type(model).__name__
+    if name in BOOSTERS:
+        X_train, X_val, y_train, y_val = validation_split(X, y, validation_fraction, random_state)
+        return model, fit_boosting(model, X_train, y_train, X_val, y_val, rounds)
+    if name == 'GradientBoostingClassifier':
+        model.set_params(n_estimators=max(model.n_estimators, MAX_BOOSTING_ROUNDS // 2),
+                         n_iter_no_change=min(rounds, 10), validation_fraction=validation_fraction)
+        model.fit(X, y)
+        return model, int(model.n_estimators_)
+    if name == 'RandomForestClassifier':
+        return model, grow_forest(model, X, y)
+    model.fit(X, y)
+    return model, None
@@ -0,0 +1,112 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import shap
+
+# Kept free of Django imports so the inference Lambda image can ship it alongside pipeline code
+TREE_MODELS = (
+    'RandomForestClassifier', 'ExtraTreesClassifier', 'DecisionTreeClassifier',
+    'GradientBoostingClassifier', 'HistGradientBoostingClassifier',
+    'XGBClassifier', 'LGBMClassifier', 'CatBoostClassifier',
+)
+MAX_CACHED_EXPLAINERS = 8
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def sample_background(X, size=100, seed=42):
+    """Fixed-size random sample of training rows used as the SHAP background"""
+    X = np.asarray(X)
+    if len(X) <= size:
+        return X
+    rng = np.random.RandomState(seed)
+    return X[rng.choice(len(X), size, replace=False)]
+
+
+def _positive_class(values):
+    if isinstance(values, list):
+        values = values[-1]
+    values = np.asarray(values)
+    if values.ndim == 3:
+        values = values[:, :, -1]
+    return values
+
+
+class ExplanationService:
+    """
+    Builds the cheapest exact-enough SHAP explainer for a model once.
+
+    Tree ensembles use TreeExplainer, linear models LinearExplainer over the
+    background sample, and anything else (SVM, voting ensembles) a
+    KernelExplainer on a small k-means summary of the background.
+    """
+
+    def __init__(self, model, background=None, feature_names=None,
+                 kernel_background_size=20, kernel_nsamples=200):
+        self.model = model
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.kernel_nsamples = kernel_nsamples
+        self.kind = self._detect_kind(model)
+
+        if self.kind == 'tree':
+            self.explainer = shap.TreeExplainer(model)
+        elif background is None:
+            raise ValueError(f'{type(model).__name__} needs background data to be explained')
+        elif self.kind == 'linear':
+            self.explainer = shap.LinearExplainer(model, np.asarray(background))
+        else:
+            summary = shap.kmeans(np.asarray(background), min(kernel_background_size, len(background)))
+            self.explainer = shap.KernelExplainer(lambda X: model.predict_proba(X)[:, 1], summary)
+
+    @staticmethod
+    def _detect_kind(model):
+        if type(model).__name__ in TREE_MODELS:
+            return 'tree'
+        if hasattr(model, 'coef_') and hasattr(model, 'intercept_'):
+            return 'linear'
+        return 'kernel'
+
+    def explain(self, X):
+        """SHAP values for the positive class, one row per input row"""
+        X = np.asarray(X)
+        if self.kind == 'kernel':
+            values = self.explainer.shap_values(X, nsamples=self.kernel_nsamples, silent=True)
+        elif self.kind == 'tree':
+            values = self.explainer.shap_values(X, check_additivity=False)
+        else:
+            values = self.explainer.shap_values(X)
+        return _positive_class(values)
+
+    def top_k(self, X, k=5):
+        """Named top-k contributions per row, largest absolute value first"""
+        values = self.explain(X)
+        names = self.feature_names or [f'feature_{i}' for i in range(values.shape[1])]
+        result = []
+        for row in values:
+            top = np.argsort(-np.abs(row))[:k]
+            result.append({names[i]: float(row[i]) for i in top})
+        return result
+
+    def mean_abs(self, X):
+        """Global importance as mean |SHAP| per feature"""
+        values = self.explain(X)
+        names = self.feature_names or [f'feature_{i}' for i in range(values.shape[1])]
+        return dict(zip(names, np.abs(values).mean(0).tolist()))
+
+
+def explainer_for(version_key, model, background=None, feature_names=None):
+    """Return the cached ExplanationService for a model version, building it once"""
+    with _cache_lock:
+        service = _cache.get(version_key)
+        if service is not None:
+            _cache.move_to_end(version_key)
+            return service
+
+    service = ExplanationService(model, background=background, feature_names=feature_names)
+
+    with _cache_lock:
+        _cache[version_key] = service
+        while len(_cache) > MAX_CACHED_EXPLAINERS:
+            _cache.popitem(last=False)
+    return service
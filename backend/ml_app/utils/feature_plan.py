@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+# Kept free of Django and heavy ML imports: the inference Lambda image ships this module
+# so training, batch scoring and online inference share one transform.
+
+CATEGORICAL_COLS = ['Contract', 'InternetService', 'PaymentMethod']
+BINARY_COLS = ['gender', 'Partner', 'Dependents', 'PhoneService', 'PaperlessBilling']
+BINARY_MAP = {'Yes': 1, 'No': 0, 'Male': 1, 'Female': 0}
+TENURE_LABELS = ['Very Low', 'Low', 'Medium', 'High', 'Very High']
+ENGINEERED_COLS = ['avg_monthly_charges', 'charges_per_service']
+
+
+class FeaturePlan:
+    """
+    Fitted feature transform: tenure bin edges, one-hot vocabularies and the
+    exact output columns are learned once by ``fit`` and then replayed.
+
+    ``transform`` writes straight into a preallocated C-contiguous float32
+    matrix, so scoring a single customer gives the same columns, bins and
+    values as the training batch did. Unknown categories encode as all zeros
+    and missing inputs as 0.
+    """
+
+    def __init__(self, numeric_columns=(), binary_columns=(), tenure_edges=None, engineered=False,
+                 service_columns=(), vocabularies=None):
+        self.numeric_columns = list(numeric_columns)
+        self.binary_columns = list(binary_columns)
+        self.tenure_edges = list(tenure_edges) if tenure_edges is not None else None
+        self.engineered = engineered
+        self.service_columns = list(service_columns)
+        self.vocabularies = {col: list(values) for col, values in (vocabularies or {}).items()}
+        self._build_layout()
+
+    @classmethod
+    def fit(cls, df, target_col='Churn', id_cols=('customerID',)):
+        df = df.drop(columns=[target_col, *id_cols], errors='ignore')
+        columns = list(df.columns)
+
+        binary_columns = [col for col in columns if col in BINARY_COLS]
+        vocabularies = {}
+
+        tenure_edges = None
+        if 'tenure' in columns and pd.api.types.is_numeric_dtype(df['tenure']):
+            tenure = df['tenure'].dropna()
+            if tenure.nunique() > 1:
+                # Only the inner edges are kept; the outer bins are open-ended so
+                # scoring-time values outside the training range still land in a bin
+                _, edges = pd.cut(tenure, bins=len(TENURE_LABELS), retbins=True)
+                tenure_edges = [float(edge) for edge in edges[1:-1]]
+                vocabularies['tenure_group'] = list(TENURE_LABELS)
+
+        engineered = {'tenure', 'MonthlyCharges', 'TotalCharges'} <= set(columns)
+        if engineered:
+            df = df.assign(TotalCharges=pd.to_numeric(df['TotalCharges'], errors='coerce'))
+
+        text_columns = [col for col in columns if not pd.api.types.is_numeric_dtype(df[col])]
+        service_columns = [col for col in text_columns if df[col].astype(str).eq('Yes').any()]
+
+        for col in CATEGORICAL_COLS + [col for col in text_columns if col not in CATEGORICAL_COLS]:
+            if col in text_columns and col not in binary_columns:
+                vocabularies[col] = sorted(df[col].dropna().astype(str).unique())
+
+        numeric_columns = [col for col in columns
+                           if col not in binary_columns and col not in vocabularies
+                           and pd.api.types.is_numeric_dtype(df[col])]
+
+        return cls(numeric_columns, binary_columns, tenure_edges, engineered, service_columns, vocabularies)
+
+    @classmethod
+    def fit_chunks(cls, chunks, target_col='Churn', id_cols=('customerID',)):
+        """
+        Fit from an iterable of frames without holding them together.
+
+        Column roles come from the first chunk; vocabularies and service
+        columns are unioned and the tenure edges are taken from the global
+        range, which is what ``fit`` on the concatenated data would produce.
+        """
+        merged = None
+        low, high = np.inf, -np.inf
+        for chunk in chunks:
+            plan = cls.fit(chunk, target_col, id_cols)
+            if 'tenure' in chunk.columns and pd.api.types.is_numeric_dtype(chunk['tenure']):
+                low, high = min(low, chunk['tenure'].min()), max(high, chunk['tenure'].max())
+            if merged is None:
+                merged = plan
+                continue
+            for col, values in plan.vocabularies.items():
+                if col in merged.vocabularies and col != 'tenure_group':
+                    merged.vocabularies[col] = sorted(set(merged.vocabularies[col]) | set(values))
+            merged.service_columns += [col for col in plan.service_columns if col not in merged.service_columns]
+
+        if merged is None:
+            raise ValueError('No rows to fit a feature plan on')
+        if np.isfinite(low) and np.isfinite(high) and high > low:
+            merged.tenure_edges = [float(edge) for edge in np.linspace(low, high, len(TENURE_LABELS) + 1)[1:-1]]
+            merged.vocabularies.setdefault('tenure_group', list(TENURE_LABELS))
+        merged._build_layout()
+        return merged
+
+    def _build_layout(self):
+        names = self.numeric_columns + self.binary_columns
+        if self.engineered:
+            names += ENGINEERED_COLS
+        self._offsets = {}
+        for col, values in self.vocabularies.items():
+            self._offsets[col] = len(names)
+            names += [f'{col}_{value}' for value in values]
+        self.feature_names = names
+        self._index = {name: i for i, name in enumerate(names)}
+
+    def _numeric(self, df, col, n):
+        if col not in df.columns:
+            return np.zeros(n, dtype=np.float32)
+        return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float32, na_value=np.nan)
+
+    def transform(self, df):
+        """Encode a raw frame into an (n_rows, n_features) float32 matrix"""
+        n = len(df)
+        X = np.zeros((n, len(self.feature_names)), dtype=np.float32)
+        rows = np.arange(n)
+
+        for col in self.numeric_columns:
+            X[:, self._index[col]] = self._numeric(df, col, n)
+        for col in self.binary_columns:
+            if col in df.columns:
+                X[:, self._index[col]] = df[col].map(BINARY_MAP).to_numpy(dtype=np.float32, na_value=np.nan)
+
+        if self.engineered:
+            tenure = self._numeric(df, 'tenure', n)
+            total = np.nan_to_num(self._numeric(df, 'TotalCharges', n))
+            present = [col for col in self.service_columns if col in df.columns]
+            services = (df[present].to_numpy() == 'Yes').sum(axis=1) if present else np.zeros(n)
+            X[:, self._index['avg_monthly_charges']] = total / (tenure + 1)
+            X[:, self._index['charges_per_service']] = self._numeric(df, 'MonthlyCharges', n) / (services + 1)
+
+        for col, values in self.vocabularies.items():
+            if col == 'tenure_group':
+                if self.tenure_edges is None or 'tenure' not in df.columns:
+                    continue
+                tenure = self._numeric(df, 'tenure', n)
+                known = ~np.isnan(tenure)
+                # side='left' matches pd.cut's right-closed bins
+                codes = np.searchsorted(self.tenure_edges, tenure[known], side='left')
+                X[rows[known], self._offsets[col] + codes] = 1
+            elif col in df.columns:
+                codes = pd.Categorical(df[col].astype(str), categories=values).codes
+                hit = codes >= 0
+                X[rows[hit], self._offsets[col] + codes[hit]] = 1
+
+        np.nan_to_num(X, copy=False)
+        return X
+
+    def transform_frame(self, df):
+        return pd.DataFrame(self.transform(df), columns=self.feature_names, index=df.index)
+
+    def to_dict(self):
+        return {
+            'numeric_columns': self.numeric_columns,
+            'binary_columns': self.binary_columns,
+            'tenure_edges': self.tenure_edges,
+            'engineered': self.engineered,
+            'service_columns': self.service_columns,
+            'vocabularies': self.vocabularies,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
@@ -0,0 +1,122 @@
+import time
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import NearestNeighbors
+from sklearn.random_projection import GaussianRandomProjection
+
+# Kept free of Django imports like the other utils so workers and scripts can share it
+
+IMBALANCE_STRATEGIES = ['auto', 'none', 'class_weight', 'undersample', 'smote']
+
+
+class ImbalanceStage:
+    """
+    Class-imbalance handling for a training split.
+
+    ``none`` and ``class_weight`` leave the rows alone (the latter sets
+    ``sample_weight`` for the fits), ``undersample`` drops majority rows and
+    ``smote`` interpolates minority rows against neighbours found in a
+    random-projection KD-tree. SMOTE never grows the split past ``max_rows``:
+    when balancing would need more, the majority class is undersampled first.
+    ``auto`` picks SMOTE for small splits and class weights for large ones.
+    After ``fit_resample``, ``report`` holds the rows, class counts, time and
+    bytes the stage cost.
+    """
+
+    def __init__(self, strategy='auto', max_rows=500000, auto_smote_rows=100000, k_neighbors=5,
+                 index_rows=50000, index_dims=16, random_state=42):
+        if strategy not in IMBALANCE_STRATEGIES:
+            raise ValueError(f"Unknown imbalance strategy '{strategy}'")
+        self.strategy = strategy
+        self.max_rows = max_rows
+        self.auto_smote_rows = auto_smote_rows
+        self.k_neighbors = k_neighbors
+        self.index_rows = index_rows
+        self.index_dims = index_dims
+        self.random_state = random_state
+        self.sample_weight = None
+        self.report = {}
+
+    def choose(self, counts):
+        if self.strategy != 'auto':
+            return self.strategy
+        if counts.min() >= 0.8 * counts.max():
+            return 'none'
+        return 'smote' if counts.sum() <= self.auto_smote_rows else 'class_weight'
+
+    def fit_resample(self, X, y):
+        started = time.perf_counter()
+        X = np.asarray(X, dtype=np.float32)
+        labels = np.asarray(y)
+        classes, codes = np.unique(labels, return_inverse=True)
+        counts = np.bincount(codes)
+        strategy = self.choose(counts) if len(classes) == 2 else 'none'
+        rng = np.random.RandomState(self.random_state)
+
+        self.sample_weight = None
+        if strategy == 'class_weight':
+            weights = len(codes) / (len(classes) * counts)
+            self.sample_weight = weights[codes].astype(np.float32)
+            X_out, codes_out = X, codes
+        elif strategy == 'undersample':
+            keep = self._undersample(codes, counts, counts.min(), rng)
+            X_out, codes_out = X[keep], codes[keep]
+        elif strategy == 'smote':
+            X_out, codes_out = self._smote(X, codes, counts, rng)
+        else:
+            X_out, codes_out = X, codes
+
+        y_out = classes[codes_out]
+        if isinstance(y, pd.Series):
+            y_out = pd.Series(y_out, name=y.name)
+
+        self.report = {
+            'strategy': strategy,
+            'rows_in': int(len(X)),
+            'rows_out': int(len(X_out)),
+            'class_counts_in': {str(c): int(n) for c, n in zip(classes, counts)},
+            'class_counts_out': {str(c): int(n) for c, n in zip(classes, np.bincount(codes_out, minlength=len(classes)))},
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+            'extra_bytes': int(X_out.nbytes - X.nbytes) if X_out is not X else 0
+        }
+        return X_out, y_out
+
+    def _undersample(self, codes, counts, per_class, rng):
+        """Row indices keeping at most ``per_class`` rows of every class, in original order"""
+        keep = []
+        for label, count in enumerate(counts):
+            rows = np.flatnonzero(codes == label)
+            keep.append(rows if count <= per_class else rng.choice(rows, per_class, replace=False))
+        return np.sort(np.concatenate(keep))
+
+    def _smote(self, X, codes, counts, rng):
+        minority = int(np.argmin(counts))
+        per_class = max(min(counts.max(), self.max_rows // 2), counts[minority])
+        keep = self._undersample(codes, counts, per_class, rng)
+        X_kept, codes_kept = X[keep], codes[keep]
+
+        n_synthetic = int(per_class - counts[minority])
+        minority_rows = X[codes == minority]
+        if n_synthetic <= 0 or len(minority_rows) < 2:
+            return X_kept, codes_kept
+
+        # Neighbours come from a bounded sample of the minority class, searched
+        # in a low-dimensional random projection; approximate, but the index
+        # size no longer grows with the data
+        if len(minority_rows) > self.index_rows:
+            minority_rows = minority_rows[rng.choice(len(minority_rows), self.index_rows, replace=False)]
+        space = minority_rows
+        if minority_rows.shape[1] > self.index_dims:
+            projection = GaussianRandomProjection(self.index_dims, random_state=self.random_state)
+            space = projection.fit_transform(minority_rows)
+        k = min(self.k_neighbors, len(minority_rows) - 1)
+        index = NearestNeighbors(n_neighbors=k, algorithm='kd_tree').fit(space)
+
+        base = rng.randint(0, len(minority_rows), n_synthetic)
+        _, neighbours = index.kneighbors(space[base], n_neighbors=k + 1)
+        picked = neighbours[np.arange(n_synthetic), rng.randint(1, k + 1, n_synthetic)]
+        gap = rng.uniform(size=(n_synthetic, 1)).astype(np.float32)
+        synthetic = minority_rows[base] + gap * (minority_rows[picked] - minority_rows[base])
+
+        return (np.concatenate([X_kept, synthetic]),
+                np.concatenate([codes_kept, np.full(n_synthetic, minority, dtype=codes.dtype)]))
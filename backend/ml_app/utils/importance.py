@@ -0,0 +1,77 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from sklearn.inspection import permutation_importance
+from .explain import ExplanationService, sample_background
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('impurity', 'permutation', 'shap')
+
+
+def _cap(X, y, size, seed):
+    X, y = np.asarray(X), np.asarray(y)
+    if len(X) <= size:
+        return X, y
+    idx = np.random.RandomState(seed).choice(len(X), size, replace=False)
+    return X[idx], y[idx]
+
+
+def _impurity(model):
+    values = getattr(model, 'feature_importances_', None)
+    return np.asarray(values, dtype=float) if values is not None else None
+
+
+def _permutation(model, X, y, n_repeats, seed):
+    result = permutation_importance(model, X, y, n_repeats=n_repeats, random_state=seed, scoring='f1_weighted')
+    return np.clip(result.importances_mean, 0, None)
+
+
+def _shap(model, X, background):
+    service = ExplanationService(model, background=sample_background(background))
+    # KernelExplainer is the slow path, so it only sees a handful of rows
+    rows = X[:50] if service.kind == 'kernel' else X[:500]
+    return np.abs(service.explain(rows)).mean(0)
+
+
+def compute_feature_importance(model, X, y, feature_names, background=None,
+                               sample_size=2000, n_repeats=5, top_k=20, random_state=42):
+    """
+    Global importance from impurity, permutation and mean |SHAP|, run concurrently.
+
+    Permutation and SHAP use at most ``sample_size`` held-out rows. Each
+    method is normalised to sum to 1; ``importance`` is their mean over the
+    methods that apply to the model. Returns the top-k features, most
+    important first.
+    """
+    X_sample, y_sample = _cap(X, y, sample_size, random_state)
+    background = X if background is None else background
+
+    with ThreadPoolExecutor(max_workers=len(METHODS)) as pool:
+        futures = {
+            'impurity': pool.submit(_impurity, model),
+            'permutation': pool.submit(_permutation, model, X_sample, y_sample, n_repeats, random_state),
+            'shap': pool.submit(_shap, model, X_sample, background),
+        }
+
+    scores = {}
+    for method, future in futures.items():
+        try:
+            values = future.result()
+        except Exception as e:
+            logger.warning("%s importance error: %s", method, e)
+            continue
+        if values is not None and len(values) == len(feature_names) and values.sum() > 0:
+            scores[method] = values / values.sum()
+
+    if not scores:
+        return []
+
+    combined = np.mean(list(scores.values()), axis=0)
+    ranked = []
+    for i in np.argsort(-combined)[:top_k]:
+        entry = {'feature': str(feature_names[i]), 'importance': float(combined[i])}
+        for method in METHODS:
+            entry[method] = float(scores[method][i]) if method in scores else None
+        ranked.append(entry)
+    return ranked
@@ -0,0 +1,123 @@
+import math
+import time
+from contextlib import nullcontext
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+# Kept free of Django imports like the other utils so workers and scripts can share it
+
+
+def _stratified_rows(y, n_rows, random_state):
+    """Indices of a stratified sample of ``n_rows`` rows (all rows when n_rows covers them)"""
+    if n_rows >= len(y):
+        return np.arange(len(y))
+    rows, _ = train_test_split(np.arange(len(y)), train_size=n_rows, stratify=y, random_state=random_state)
+    return np.sort(rows)
+
+
+def score_model(model, X, y):
+    """accuracy / weighted F1 / AUC in the shape the training views report"""
+    y_pred = model.predict(X)
+    accuracy = accuracy_score(y, y_pred)
+    try:
+        auc = roc_auc_score(y, model.predict_proba(X)[:, 1])
+    except Exception:
+        auc = accuracy
+    return {
+        'accuracy': float(accuracy),
+        'f1_score': float(f1_score(y, y_pred, average='weighted')),
+        'auc_score': float(auc)
+    }
+
+
+def parse_time_budget(value, default=None):
+    """Seconds from a request's ``time_budget`` (``default`` when absent); ValueError unless positive"""
+    if value is None or value == '':
+        return default
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        budget = float(value)
+    except (TypeError, ValueError):
+        raise ValueError('time_budget must be a number of seconds')
+    if not math.isfinite(budget) or budget <= 0:
+        raise ValueError('time_budget must be a positive number of seconds')
+    return budget
+
+
+def successive_halving(candidates, X, y, metric='f1_score', min_rows=2000, eta=3, time_budget=None,
+                       validation_rows=20000, progress=None, random_state=42):
+    """
+    Pick the best of ``candidates`` (name -> unfitted estimator) without
+    fitting every one of them on all of ``X``.
+
+    Every candidate is fitted on a stratified sample of ``min_rows`` rows and
+    scored on a fixed stratified validation sample; the best 1/``eta`` go on
+    to a sample ``eta`` times larger, until one is left or the sample is the
+    whole training set. With ``time_budget`` (seconds) no rung is started
+    that the previous rung's timing says cannot finish in time, so selection
+    ends in bounded time and the best candidate so far wins. The winner is
+    returned unfitted: the caller refits it once on the full data, outside
+    the budget.
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget if time_budget else None
+    y = np.asarray(y)
+
+    search_rows, validation = train_test_split(
+        np.arange(len(y)), test_size=min(validation_rows, max(len(y) // 5, 2)),
+        stratify=y, random_state=random_state
+    )
+    X_val, y_val = X[validation], y[validation]
+    X_search, y_search = X[search_rows], y[search_rows]
+
+    alive = list(candidates)
+    leaderboard = {}
+    rungs = []
+    n_rows = min(min_rows, len(y_search))
+
+    while alive:
+        rung_started = time.perf_counter()
+        rows = _stratified_rows(y_search, n_rows, random_state)
+        scores = {}
+        for name in alive:
+            if deadline and time.perf_counter() > deadline and scores:
+                break
+            stage = progress.stage(f'halving_{name}_{n_rows}', rows=n_rows) if progress else nullcontext()
+            try:
+                with stage:
+                    fit_started = time.perf_counter()
+                    model = clone(candidates[name]).fit(X_search[rows], y_search[rows])
+                    fit_seconds = time.perf_counter() - fit_started
+                scores[name] = score_model(model, X_val, y_val)
+                leaderboard[name] = {**scores[name], 'rows': int(n_rows), 'fit_seconds': round(fit_seconds, 3)}
+            except Exception as e:
+                print(f"Halving: {name} failed on {n_rows} rows: {str(e)}")
+
+        if not scores:
+            break
+        ranked = sorted(scores, key=lambda name: scores[name][metric], reverse=True)
+        rung_seconds = time.perf_counter() - rung_started
+        rungs.append({'rows': int(n_rows), 'candidates': ranked, 'seconds': round(rung_seconds, 3)})
+
+        alive = ranked[:max(1, math.ceil(len(ranked) / eta))]
+        if len(alive) == 1 or n_rows >= len(y_search):
+            break
+        next_rows = min(n_rows * eta, len(y_search))
+        # Fit time grows at least linearly with rows; a rung that cannot finish is not started
+        projected = rung_seconds * (next_rows / n_rows) * (len(alive) / len(ranked))
+        if deadline and time.perf_counter() + projected > deadline:
+            break
+        n_rows = next_rows
+
+    if not leaderboard:
+        raise ValueError('No candidate model could be fitted')
+    winner = alive[0] if alive else max(leaderboard, key=lambda name: leaderboard[name][metric])
+    return {
+        'winner': winner,
+        'leaderboard': leaderboard,
+        'rungs': rungs,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
@@ -10,19 +10,27 @@ from sklearn.ensemble import RandomForestClassifier, VotingClassifier
 from sklearn.svm import SVC
 from sklearn.metrics import classification_report, roc_auc_score
 from xgboost import XGBClassifier
-from imblearn.over_sampling import SMOTE
-import shap
+from contextlib import nullcontext
 from django.conf import settings
+from .explain import ExplanationService, sample_background
+from .feature_plan import FeaturePlan
+from .imbalance import ImbalanceStage
+from .compiled_trees import try_compile
+from .dtypes import read_csv_planned, apply_dtype_plan
 
-def load_data(s3_key):
-    """Load data from S3"""
+# Models fitted by train_models, in order; the soft-voting Ensemble is fitted last
+CANDIDATE_MODELS = ['LogisticRegression', 'RandomForest', 'XGBoost', 'SVM']
+
+def load_data(s3_key, dtype_plan=None):
+    """Load data from S3, applying the dataset's dtype plan"""
     s3 = boto3.client('s3')
     obj = s3.get_object(Bucket=settings.AWS_S3_BUCKET, Key=s3_key)
     
     if s3_key.endswith('.csv'):
-        return pd.read_csv(BytesIO(obj['Body'].read()))
+        # Stream the body into the parser instead of holding a second copy of the file
+        return read_csv_planned(obj['Body'], dtype_plan)
     elif s3_key.endswith(('.xlsx', '.xls')):
-        return pd.read_excel(BytesIO(obj['Body'].read()))
+        return apply_dtype_plan(pd.read_excel(BytesIO(obj['Body'].read())), dtype_plan or {})
     else:
         raise ValueError("Unsupported file format")
 
@@ -35,7 +43,7 @@ def clean_data(df):
     numeric_cols = df.select_dtypes(include=[np.number]).columns
     df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].median())
     
-    categorical_cols = df.select_dtypes(include=['object']).columns
+    categorical_cols = df.select_dtypes(include=['object', 'category']).columns
     df[categorical_cols] = df[categorical_cols].fillna(df[categorical_cols].mode().iloc[0])
     
     # Remove outliers using IQR for MonthlyCharges
@@ -48,41 +56,28 @@ def clean_data(df):
     
     return df
 
-def engineer_features(df):
-    """Feature engineering"""
-    df = df.copy()
-    
-    # Tenure bins
-    if 'tenure' in df.columns:
-        df['tenure_group'] = pd.cut(df['tenure'], bins=5, labels=['Very Low', 'Low', 'Medium', 'High', 'Very High'])
-    
-    # RFM-like features
-    if 'tenure' in df.columns and 'MonthlyCharges' in df.columns and 'TotalCharges' in df.columns:
-        df['TotalCharges'] = pd.to_numeric(df['TotalCharges'], errors='coerce').fillna(0)
-        df['avg_monthly_charges'] = df['TotalCharges'] / (df['tenure'] + 1)
-        df['charges_per_service'] = df['MonthlyCharges'] / (df.select_dtypes(include=['object']).eq('Yes').sum(axis=1) + 1)
-    
-    # One-hot encoding for categorical variables
-    categorical_cols = ['Contract', 'InternetService', 'PaymentMethod']
-    for col in categorical_cols:
-        if col in df.columns:
-            dummies = pd.get_dummies(df[col], prefix=col)
-            df = pd.concat([df, dummies], axis=1)
-            df.drop(col, axis=1, inplace=True)
-    
-    # Binary encoding
-    binary_cols = ['gender', 'Partner', 'Dependents', 'PhoneService', 'PaperlessBilling']
-    for col in binary_cols:
+def engineer_features(df, plan=None, target_col='Churn'):
+    """Feature engineering; fits a FeaturePlan on df unless one is given"""
+    if plan is None:
+        plan = FeaturePlan.fit(df, target_col=target_col)
+    
+    features = plan.transform_frame(df)
+    # Label and id pass through untouched for balance_split
+    for col in (target_col, 'customerID'):
         if col in df.columns:
-            df[col] = df[col].map({'Yes': 1, 'No': 0, 'Male': 1, 'Female': 0})
-    
-    return df
+            features[col] = df[col].to_numpy()
+    return features
+
+def balance_split(df, target_col='Churn', imbalance=None):
+    """
+    Balance dataset and split.
 
-def balance_split(df, target_col='Churn'):
-    """Balance dataset and split"""
+    ``imbalance`` is an ImbalanceStage (strategy 'auto' when omitted); its
+    ``sample_weight`` and ``report`` are set for the caller to use.
+    """
     # Encode target
     if target_col in df.columns:
-        df[target_col] = df[target_col].map({'Yes': 1, 'No': 0})
+        df[target_col] = df[target_col].astype(object).map({'Yes': 1, 'No': 0})
     
     # Separate features and target
     X = df.drop([target_col, 'customerID'], axis=1, errors='ignore')
@@ -94,19 +89,19 @@ def balance_split(df, target_col='Churn'):
     # Split data
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
     
-    # Apply SMOTE
-    smote = SMOTE(random_state=42)
-    X_train_balanced, y_train_balanced = smote.fit_resample(X_train, y_train)
+    # Handle class imbalance on the training rows only
+    imbalance = imbalance or ImbalanceStage()
+    X_train_balanced, y_train_balanced = imbalance.fit_resample(X_train, y_train)
     
-    # Scale features
+    # Scale features; plain float32 arrays so serving can pass FeaturePlan output directly
     scaler = StandardScaler()
     X_train_scaled = scaler.fit_transform(X_train_balanced)
-    X_test_scaled = scaler.transform(X_test)
+    X_test_scaled = scaler.transform(np.asarray(X_test, dtype=np.float32))
     
     return X_train_scaled, X_test_scaled, y_train_balanced, y_test, scaler, X.columns
 
-def train_models(X_train, X_test, y_train, y_test):
-    """Train multiple models"""
+def train_models(X_train, X_test, y_train, y_test, progress=None, sample_weight=None):
+    """Train multiple models, reporting each fit to an optional TrainingProgress"""
     models = {
         'LogisticRegression': LogisticRegression(random_state=42),
         'RandomForest': RandomForestClassifier(n_estimators=100, random_state=42),
@@ -119,7 +114,8 @@ def train_models(X_train, X_test, y_train, y_test):
     
     for name, model in models.items():
         # Train model
-        model.fit(X_train, y_train)
+        with _track(progress, f'fit_{name}', len(X_train)):
+            model.fit(X_train, y_train, sample_weight=sample_weight)
         
         # Predictions
         y_pred = model.predict(X_test)
@@ -145,7 +141,8 @@ def train_models(X_train, X_test, y_train, y_test):
         ('xgb', models['XGBoost'])
     ], voting='soft')
     
-    ensemble.fit(X_train, y_train)
+    with _track(progress, 'fit_Ensemble', len(X_train)):
+        ensemble.fit(X_train, y_train, sample_weight=sample_weight)
     y_pred_ensemble = ensemble.predict(X_test)
     y_prob_ensemble = ensemble.predict_proba(X_test)[:, 1]
     
@@ -167,33 +164,69 @@ def train_models(X_train, X_test, y_train, y_test):
     
     return results, best_model, best_model_name
 
-def get_shap_explanation(model, X_sample, feature_names):
+def _track(progress, step, rows):
+    return progress.stage(step, rows=rows) if progress is not None else nullcontext()
+
+def get_shap_explanation(model, X_sample, feature_names, background=None):
     """Generate SHAP explanations"""
     try:
-        explainer = shap.Explainer(model)
-        shap_values = explainer(X_sample[:100])  # Limit for performance
-        
-        # Get feature importance
-        importance = np.abs(shap_values.values).mean(0)
-        feature_importance = dict(zip(feature_names, importance))
+        # Linear and kernel explainers need a background; default to the rows being explained
+        service = ExplanationService(
+            model,
+            background=sample_background(background if background is not None else X_sample),
+            feature_names=feature_names
+        )
+        importance = service.mean_abs(X_sample[:100])  # Limit for performance
         
         return {
-            'feature_importance': dict(sorted(feature_importance.items(), 
+            'feature_importance': dict(sorted(importance.items(), 
                                             key=lambda x: x[1], reverse=True)[:10])
         }
     except Exception as e:
         print(f"SHAP error: {e}")
         return {'feature_importance': {}}
 
-def save_model_to_s3(model, scaler, s3_key):
-    """Save model and scaler to S3"""
+def save_model_to_s3(model, scaler, s3_key, feature_names=None, background=None, feature_plan=None):
+    """Save model, scaler, the training feature manifest and plan, a SHAP background and the compiled trees to S3"""
     s3 = boto3.client('s3')
     
-    # Save model
+    # Save model; feature_names lets inference align columns exactly as in training
     model_buffer = BytesIO()
-    joblib.dump({'model': model, 'scaler': scaler}, model_buffer)
+    joblib.dump({
+        'model': model,
+        'scaler': scaler,
+        'feature_names': list(feature_names) if feature_names is not None else None,
+        'feature_plan': feature_plan.to_dict() if feature_plan is not None else None,
+        'background': sample_background(background) if background is not None else None,
+        # Flattened node arrays for low-latency scoring; None for non-tree models
+        'compiled': try_compile(model)
+    }, model_buffer)
     model_buffer.seek(0)
     
     s3.upload_fileobj(model_buffer, settings.AWS_S3_BUCKET, s3_key)
     
-    return s3_key
\ No newline at end of file
+    return s3_key
+def load_model_from_s3(s3_key):
+    """Load a bundle written by save_model_to_s3"""
+    s3 = boto3.client('s3')
+    obj = s3.get_object(Bucket=settings.AWS_S3_BUCKET, Key=s3_key)
+    return joblib.load(BytesIO(obj['Body'].read()))
+
+def risk_features(bundle, df, target_col='Churn'):
+    """Scaled model inputs for every row of a raw dataset"""
+    feature_names = bundle.get('feature_names')
+    if feature_names is None:
+        raise ValueError('Model bundle has no feature_names manifest; retrain to enable scoring')
+    
+    if bundle.get('feature_plan'):
+        X = FeaturePlan.from_dict(bundle['feature_plan']).transform(df)
+    else:
+        # Bundles from before feature plans were stored: fit one on this batch
+        features = engineer_features(df, target_col=target_col)
+        X = features.reindex(columns=feature_names, fill_value=0).to_numpy(dtype=np.float32)
+    
+    return bundle['scaler'].transform(X)
+
+def predict_risk(bundle, df, target_col='Churn'):
+    """Churn probability for every row of a raw dataset, scored in one batch"""
+    return bundle['model'].predict_proba(risk_features(bundle, df, target_col))[:, 1]
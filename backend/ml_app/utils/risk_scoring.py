@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+from .explain import explainer_for
+from .compiled_trees import load_compiled, predict_positive
+from .pipeline import risk_features
+
+# Same cut-offs as the single-prediction endpoints
+RISK_LEVELS = [(0.3, 'low'), (0.7, 'medium'), (np.inf, 'high')]
+
+
+def risk_levels(scores):
+    """'low' / 'medium' / 'high' for an array of churn probabilities"""
+    scores = np.asarray(scores, dtype=np.float64)
+    conditions = [scores < bound for bound, _ in RISK_LEVELS]
+    return np.select(conditions, [level for _, level in RISK_LEVELS], default='high')
+
+
+def top_reasons(service, X, k=3, chunk_rows=5000):
+    """
+    Up to ``k`` features pushing each row towards churn, strongest first.
+
+    Only positive SHAP contributions count as reasons; a customer whose
+    features all lower the risk gets an empty list.
+    """
+    names = service.feature_names or [f'feature_{i}' for i in range(X.shape[1])]
+    reasons = []
+    for start in range(0, len(X), chunk_rows):
+        values = service.explain(X[start:start + chunk_rows])
+        order = np.argsort(-values, axis=1)[:, :k]
+        for row, top in zip(values, order):
+            reasons.append([{'feature': names[i], 'impact': round(float(row[i]), 4)}
+                            for i in top if row[i] > 0])
+    return reasons
+
+
+def score_customers(bundle, df, target_col='Churn', id_col='customerID', version_key=None, k=3):
+    """
+    Risk table rows for every customer of a raw dataset.
+
+    Returns a DataFrame with customer_id, risk_score, risk_level and
+    top_reasons, one row per customer (the last row wins for duplicated
+    ids). Reasons come from tree or linear SHAP explainers; models that
+    would need a KernelExplainer are too slow to explain row by row in a
+    batch job and get empty reasons.
+    """
+    frame = df.reset_index(drop=True)
+    if id_col in frame.columns:
+        ids = frame[id_col].astype(str)
+    else:
+        ids = pd.Series([f'C{i}' for i in range(len(frame))])
+
+    X = risk_features(bundle, frame, target_col)
+    scores = predict_positive(bundle['model'], X, load_compiled(bundle))
+
+    reasons = [[] for _ in range(len(frame))]
+    try:
+        service = explainer_for(version_key or id(bundle['model']), bundle['model'],
+                                background=bundle.get('background'), feature_names=bundle.get('feature_names'))
+        if service.kind != 'kernel':
+            reasons = top_reasons(service, X, k=k)
+    except Exception as e:
+        print(f"Risk reasons error: {e}")
+
+    table = pd.DataFrame({
+        'customer_id': ids.to_numpy(),
+        'risk_score': np.round(np.asarray(scores, dtype=np.float64), 6),
+        'risk_level': risk_levels(scores),
+        'top_reasons': reasons
+    })
+    return table.drop_duplicates('customer_id', keep='last').reset_index(drop=True)
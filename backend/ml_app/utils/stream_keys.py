@@ -0,0 +1,10 @@
+# Redis stream names shared by the event producers (including the StreamGenerator
+# Lambda, which ships this module) and ml_app.event_stream's consumers. Kept free
+# of imports so it can be copied anywhere.
+
+STREAM_KEY = 'telecom_events'
+CONSUMER_GROUP = 'churn-scorers'
+# Approximate cap; XADD trims whole macro nodes so this stays O(1) per event
+STREAM_MAXLEN = 100000
+# Entries that keep failing are parked here with their original id and delivery count
+DEAD_LETTER_KEY = 'telecom_events:dead'
@@ -0,0 +1,248 @@
+import os
+import shutil
+import tempfile
+from contextlib import nullcontext
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import GaussianNB
+from sklearn.preprocessing import StandardScaler
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from .dtypes import apply_dtype_plan
+from .feature_plan import FeaturePlan
+
+try:
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+try:
+    import xgboost as xgb
+    XGBOOST_AVAILABLE = True
+except ImportError:
+    XGBOOST_AVAILABLE = False
+
+# Learners that never need the whole matrix in memory
+STREAMING_LEARNERS = ['SGDLogistic', 'NaiveBayes', 'XGBoost']
+# Progress stages train_out_of_core reports, in order
+STREAMING_STAGES = ['streaming_scan', 'streaming_encode', 'streaming_fit', 'streaming_evaluate']
+
+
+def iter_frames(path, chunksize=200000, dtype_plan=None):
+    """Yield a dataset as DataFrames of at most ``chunksize`` rows (Parquet or CSV)"""
+    if path.endswith('.parquet'):
+        if not PARQUET_AVAILABLE:
+            raise ValueError('pyarrow is required to stream Parquet files')
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+        return
+
+    parse_dtypes = {col: 'category' for col, dtype in (dtype_plan or {}).items() if dtype == 'category'}
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype=parse_dtypes or None):
+        yield apply_dtype_plan(chunk, dtype_plan or {})
+
+
+def holdout_mask(chunk, start, holdout, id_col='customerID'):
+    """Stable per-row holdout assignment, by customer id when there is one"""
+    keys = chunk[id_col] if id_col in chunk.columns else pd.Series(np.arange(start, start + len(chunk)))
+    buckets = pd.util.hash_pandas_object(keys.astype(str), index=False).to_numpy() % 1000
+    return buckets < int(holdout * 1000)
+
+
+def encode_target(series):
+    if pd.api.types.is_numeric_dtype(series):
+        return series.fillna(0).to_numpy(dtype=np.int8)
+    return series.astype(object).map({'Yes': 1, 'No': 0}).fillna(0).to_numpy(dtype=np.int8)
+
+
+class BoosterClassifier:
+    """predict/predict_proba over an xgboost Booster trained from external memory"""
+
+    def __init__(self, booster):
+        self.booster = booster
+        self.classes_ = np.array([0, 1])
+
+    def predict_proba(self, X):
+        positive = self.booster.inplace_predict(np.asarray(X, dtype=np.float32))
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] >= 0.5).astype(int)
+
+
+if XGBOOST_AVAILABLE:
+    class MemmapBatches(xgb.DataIter):
+        """Feeds training rows of the memory-mapped matrix to xgboost block by block"""
+
+        def __init__(self, X, y, train, scaler, weights, block_rows, cache_prefix):
+            self.X, self.y, self.train = X, y, train
+            self.scaler = scaler
+            self.weights = weights
+            self.block_rows = block_rows
+            self._start = 0
+            super().__init__(cache_prefix=cache_prefix)
+
+        def next(self, input_data):
+            if self._start >= len(self.X):
+                return 0
+            block = slice(self._start, self._start + self.block_rows)
+            self._start += self.block_rows
+            keep = self.train[block]
+            labels = self.y[block][keep]
+            features = self.scaler.transform(self.X[block][keep]).astype(np.float32)
+            input_data(data=features, label=labels, weight=self.weights[labels])
+            return 1
+
+        def reset(self):
+            self._start = 0
+
+
+def _stage(progress, name, rows=None):
+    return progress.stage(name, rows=rows) if progress is not None else nullcontext({})
+
+
+def train_out_of_core(path, target_col='Churn', learners=('SGDLogistic', 'NaiveBayes'), chunksize=200000,
+                      holdout=0.2, epochs=3, dtype_plan=None, workdir=None, progress=None, random_state=42,
+                      sample_size=2000):
+    """
+    Train churn models on a file larger than memory.
+
+    Pass 1 streams the file to fit the FeaturePlan and count rows and
+    classes. Pass 2 streams it again, writes the encoded float32 matrix to a
+    memory-mapped .npy and fits the scaler incrementally on training rows.
+    Learners then run over the memmap block by block (``partial_fit`` for
+    SGD and naive Bayes, xgboost's external-memory DMatrix for boosting) and
+    are evaluated on a hash-assigned holdout that is streamed the same way.
+    Peak memory is one chunk plus the model, whatever the file size.
+
+    Up to ``sample_size`` scaled holdout rows are returned for importance.
+    The memmaps live in ``workdir``; when none is given a temporary
+    directory is used and removed before returning, so ``matrix_path`` is
+    only set for a caller-owned ``workdir``.
+    """
+    if workdir is not None:
+        os.makedirs(workdir, exist_ok=True)
+        return _train_out_of_core(path, target_col, learners, chunksize, holdout, epochs, dtype_plan,
+                                  workdir, progress, random_state, sample_size)
+
+    workdir = tempfile.mkdtemp(prefix='churn_ooc_')
+    try:
+        outcome = _train_out_of_core(path, target_col, learners, chunksize, holdout, epochs, dtype_plan,
+                                     workdir, progress, random_state, sample_size)
+        outcome['matrix_path'] = None
+        return outcome
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _train_out_of_core(path, target_col, learners, chunksize, holdout, epochs, dtype_plan, workdir,
+                       progress, random_state, sample_size):
+    with _stage(progress, 'streaming_scan') as stage:
+        counts = np.zeros(2, dtype=np.int64)
+
+        def scanned():
+            for chunk in iter_frames(path, chunksize, dtype_plan):
+                if target_col not in chunk.columns:
+                    raise ValueError(f"Target column '{target_col}' not found")
+                counts[:] += np.bincount(encode_target(chunk[target_col]), minlength=2)[:2]
+                yield chunk
+
+        plan = FeaturePlan.fit_chunks(scanned(), target_col=target_col)
+        n_rows = int(counts.sum())
+        stage['rows'] = n_rows
+
+    n_features = len(plan.feature_names)
+    X = np.lib.format.open_memmap(os.path.join(workdir, 'X.npy'), mode='w+', dtype=np.float32,
+                                  shape=(n_rows, n_features))
+    y = np.lib.format.open_memmap(os.path.join(workdir, 'y.npy'), mode='w+', dtype=np.int8, shape=(n_rows,))
+    train = np.lib.format.open_memmap(os.path.join(workdir, 'train.npy'), mode='w+', dtype=bool, shape=(n_rows,))
+    scaler = StandardScaler()
+
+    with _stage(progress, 'streaming_encode', rows=n_rows):
+        start = 0
+        for chunk in iter_frames(path, chunksize, dtype_plan):
+            end = start + len(chunk)
+            X[start:end] = plan.transform(chunk)
+            y[start:end] = encode_target(chunk[target_col])
+            train[start:end] = ~holdout_mask(chunk, start, holdout)
+            if train[start:end].any():
+                scaler.partial_fit(X[start:end][train[start:end]])
+            start = end
+        X.flush()
+
+    train_counts = np.bincount(y[train], minlength=2)
+    # Balanced class weights, as SMOTE would otherwise be used in memory
+    weights = (train_counts.sum() / (2.0 * np.maximum(train_counts, 1))).astype(np.float32)
+    blocks = list(range(0, n_rows, chunksize))
+    rng = np.random.RandomState(random_state)
+
+    models = {}
+    if 'SGDLogistic' in learners:
+        models['SGDLogistic'] = SGDClassifier(loss='log_loss', alpha=1e-5, random_state=random_state)
+    if 'NaiveBayes' in learners:
+        models['NaiveBayes'] = GaussianNB()
+
+    with _stage(progress, 'streaming_fit', rows=int(train.sum())):
+        for epoch in range(epochs):
+            for start in rng.permutation(blocks):
+                block = slice(start, start + chunksize)
+                keep = train[block]
+                if not keep.any():
+                    continue
+                Xb = scaler.transform(X[block][keep])
+                yb = y[block][keep]
+                for name, model in models.items():
+                    # Naive Bayes sums sufficient statistics, so one pass is the exact fit
+                    if name == 'NaiveBayes' and epoch > 0:
+                        continue
+                    model.partial_fit(Xb, yb, classes=[0, 1], sample_weight=weights[yb])
+
+        if 'XGBoost' in learners and XGBOOST_AVAILABLE:
+            batches = MemmapBatches(X, y, train, scaler, weights, chunksize, os.path.join(workdir, 'xgb_cache'))
+            dtrain = xgb.DMatrix(batches)
+            booster = xgb.train({'objective': 'binary:logistic', 'tree_method': 'hist', 'max_depth': 6,
+                                 'eta': 0.1, 'seed': random_state}, dtrain, num_boost_round=200)
+            models['XGBoost'] = BoosterClassifier(booster)
+
+    with _stage(progress, 'streaming_evaluate', rows=int(n_rows - train.sum())):
+        y_true = []
+        scores = {name: [] for name in models}
+        sample_X, sample_y, sampled = [], [], 0
+        for start in blocks:
+            block = slice(start, start + chunksize)
+            held = ~train[block]
+            if not held.any():
+                continue
+            Xb = scaler.transform(X[block][held])
+            y_true.append(y[block][held])
+            if sampled < sample_size:
+                sample_X.append(np.asarray(Xb[:sample_size - sampled]))
+                sample_y.append(y_true[-1][:sample_size - sampled])
+                sampled += len(sample_y[-1])
+            for name, model in models.items():
+                scores[name].append(model.predict_proba(Xb)[:, 1])
+
+    y_true = np.concatenate(y_true) if y_true else np.array([], dtype=np.int8)
+    metrics = {}
+    for name in models:
+        proba = np.concatenate(scores[name]) if scores[name] else np.array([])
+        predicted = (proba >= 0.5).astype(int)
+        metrics[name] = {
+            'accuracy': float(accuracy_score(y_true, predicted)) if len(y_true) else 0.0,
+            'f1_score': float(f1_score(y_true, predicted, average='weighted')) if len(y_true) else 0.0,
+            'auc_score': float(roc_auc_score(y_true, proba)) if len(np.unique(y_true)) > 1 else 0.0
+        }
+
+    return {
+        'plan': plan,
+        'scaler': scaler,
+        'models': models,
+        'metrics': metrics,
+        'rows': n_rows,
+        'train_rows': int(train.sum()),
+        'holdout_rows': int(len(y_true)),
+        'holdout_sample': (np.concatenate(sample_X) if sample_X else np.empty((0, n_features), dtype=np.float32),
+                           np.concatenate(sample_y) if sample_y else np.array([], dtype=np.int8)),
+        'matrix_path': os.path.join(workdir, 'X.npy')
+    }
@@ -2,16 +2,19 @@ import uuid
 import json
 import boto3
 import pandas as pd
-from io import BytesIO
 from django.conf import settings
-from django.core.cache import cache
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from auth_app.views import role_required
-from .models import DatasetMeta, ModelVersion, PredictionsRisk
-from .tasks import train_pipeline
+from .models import DatasetMeta, ModelVersion
+from .pagination import DatasetCursorPagination, ModelVersionCursorPagination
+from .prediction_cache import get_prediction_cache, input_hash
+from .prediction_sink import get_prediction_sink
+from .queries import datasets_with_latest_model, model_comparison, analytics_snapshot, claim_materialization
+from .tasks import train_pipeline, materialize_analytics
+from .utils.dtypes import SAMPLE_ROWS, plan_dtypes
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -38,6 +41,7 @@ def upload_view(request):
             df = pd.read_csv(file)
         else:
             df = pd.read_excel(file)
+        dtype_plan = plan_dtypes(df.head(SAMPLE_ROWS))
         
         # Infer target column
         target_col = 'Churn'
@@ -54,7 +58,8 @@ def upload_view(request):
             filename=file.name,
             rows=len(df),
             target_col=target_col,
-            s3_key=s3_key
+            s3_key=s3_key,
+            dtype_plan=dtype_plan
         )
         
         # Trigger ETL pipeline
@@ -74,24 +79,24 @@ def upload_view(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_datasets_view(request):
-    """List user's datasets"""
-    datasets = DatasetMeta.objects.filter(user=request.user).order_by('-upload_date')
+    """List user's datasets, newest first, one page per cursor"""
+    paginator = DatasetCursorPagination()
+    page = paginator.paginate_queryset(datasets_with_latest_model(request.user), request)
     
     data = []
-    for dataset in datasets:
-        latest_model = ModelVersion.objects.filter(dataset=dataset).order_by('-created_at').first()
+    for dataset in page:
         data.append({
-            'id': dataset.id,
-            'filename': dataset.filename,
-            'rows': dataset.rows,
-            'upload_date': dataset.upload_date,
+            'id': dataset['id'],
+            'filename': dataset['filename'],
+            'rows': dataset['rows'],
+            'upload_date': dataset['upload_date'],
             'latest_model': {
-                'type': latest_model.model_type if latest_model else None,
-                'f1_score': latest_model.metrics_json.get('f1_score') if latest_model else None
-            } if latest_model else None
+                'type': dataset['latest_model_type'],
+                'f1_score': dataset['latest_f1_score']
+            } if dataset['latest_model_type'] else None
         })
     
-    return Response(data)
+    return paginator.get_paginated_response(data)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -119,36 +124,18 @@ def train_view(request):
 @permission_classes([IsAuthenticated])
 def compare_models_view(request, dataset_id):
     """Compare model performance"""
-    try:
-        dataset = DatasetMeta.objects.get(id=dataset_id, user=request.user)
-        models = ModelVersion.objects.filter(dataset=dataset).order_by('-created_at')
-        
-        comparison = []
-        for model in models:
-            comparison.append({
-                'version': model.version,
-                'model_type': model.model_type,
-                'f1_score': model.metrics_json.get('f1_score', 0),
-                'auc': model.metrics_json.get('auc', 0),
-                'precision': model.metrics_json.get('precision', 0),
-                'recall': model.metrics_json.get('recall', 0),
-                'created_at': model.created_at
-            })
-        
-        return Response(comparison)
-    except DatasetMeta.DoesNotExist:
+    if not DatasetMeta.objects.filter(id=dataset_id, user=request.user).exists():
         return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    paginator = ModelVersionCursorPagination()
+    comparison = paginator.paginate_queryset(model_comparison(dataset_id, request.user), request)
+    
+    return paginator.get_paginated_response(comparison)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def analytics_view(request, dataset_id):
     """Get analytics dashboard data"""
-    cache_key = f"analytics_{dataset_id}"
-    cached_data = cache.get(cache_key)
-    
-    if cached_data:
-        return Response(cached_data)
-    
     try:
         dataset = DatasetMeta.objects.get(id=dataset_id, user=request.user)
         latest_model = ModelVersion.objects.filter(dataset=dataset).order_by('-created_at').first()
@@ -156,65 +143,21 @@ def analytics_view(request, dataset_id):
         if not latest_model:
             return Response({'error': 'No trained models found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Load data for analysis
-        s3 = boto3.client('s3')
-        obj = s3.get_object(Bucket=settings.AWS_S3_BUCKET, Key=dataset.s3_key)
-        df = pd.read_csv(BytesIO(obj['Body'].read()))
+        # Materialized from batch predictions after training; never reads the dataset here
+        snapshot = analytics_snapshot(dataset.id, latest_model.version)
+        if snapshot is None:
+            # Dashboards poll on 202; only the first poll queues the scoring job
+            if claim_materialization(dataset.id, latest_model.version):
+                materialize_analytics.delay(dataset.id, latest_model.version)
+            return Response({'status': 'pending', 'model_version': latest_model.version},
+                            status=status.HTTP_202_ACCEPTED)
         
-        # Basic analytics
-        churn_rate = df['Churn'].map({'Yes': 1, 'No': 0}).mean() if 'Churn' in df.columns else 0
-        
-        # Correlation analysis
-        numeric_df = df.select_dtypes(include=['number'])
-        correlation = numeric_df.corr().to_dict() if len(numeric_df.columns) > 1 else {}
-        
-        # Cohort analysis by tenure
-        if 'tenure' in df.columns:
-            df['tenure_bucket'] = pd.cut(df['tenure'], bins=5, labels=['0-1Y', '1-2Y', '2-3Y', '3-4Y', '4Y+'])
-            cohort_analysis = df.groupby('tenure_bucket').agg({
-                'Churn': lambda x: (x == 'Yes').mean() if 'Churn' in df.columns else 0,
-                'customerID': 'count'
-            }).to_dict()
-        else:
-            cohort_analysis = {}
-        
-        # High-risk customers (mock prediction)
-        high_risk_customers = []
-        if len(df) > 0:
-            sample_customers = df.head(50).to_dict('records')
-            for i, customer in enumerate(sample_customers):
-                if i % 3 == 0:  # Mock high risk
-                    high_risk_customers.append({
-                        'customer_id': customer.get('customerID', f'C{i}'),
-                        'risk_score': 0.85,
-                        'monthly_charges': customer.get('MonthlyCharges', 0),
-                        'tenure': customer.get('tenure', 0)
-                    })
-        
-        # Insights
-        insights = []
-        if churn_rate > 0.2:
-            insights.append("High churn rate detected. Consider retention campaigns.")
-        if 'PaperlessBilling' in df.columns:
-            paperless_churn = df[df['PaperlessBilling'] == 'Yes']['Churn'].map({'Yes': 1, 'No': 0}).mean()
-            if paperless_churn > churn_rate * 1.2:
-                insights.append("Paperless billing customers show higher churn. Review billing experience.")
-        
-        analytics_data = {
-            'churn_rate': churn_rate,
-            'total_customers': len(df),
-            'correlation': correlation,
-            'cohort_analysis': cohort_analysis,
+        return Response({
+            **snapshot,
+            'model_version': latest_model.version,
             'model_performance': latest_model.metrics_json,
-            'high_risk_customers': high_risk_customers,
-            'insights': insights,
             'feature_importance': latest_model.metrics_json.get('feature_importance', {})
-        }
-        
-        # Cache for 5 minutes
-        cache.set(cache_key, analytics_data, 300)
-        
-        return Response(analytics_data)
+        })
         
     except DatasetMeta.DoesNotExist:
         return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -240,20 +183,30 @@ def predict_view(request):
                           status=status.HTTP_404_NOT_FOUND)
         
         # Invoke Lambda for prediction
-        lambda_client = boto3.client('lambda', region_name=settings.AWS_DEFAULT_REGION)
-        
-        payload = {
-            'model_s3_key': latest_model.s3_pkl_key,
-            'customer_data': customer_data
-        }
-        
-        response = lambda_client.invoke(
-            FunctionName='MLInference',
-            Payload=json.dumps(payload)
+        def invoke():
+            lambda_client = boto3.client('lambda', region_name=settings.AWS_DEFAULT_REGION)
+            
+            payload = {
+                'model_s3_key': latest_model.s3_pkl_key,
+                'customer_data': customer_data
+            }
+            
+            response = lambda_client.invoke(
+                FunctionName='MLInference',
+                Payload=json.dumps(payload)
+            )
+            
+            result = json.loads(response['Payload'].read())
+            if result.get('statusCode', 200) >= 500:
+                # Raised rather than returned so a failed inference is never cached
+                raise RuntimeError(result.get('body', {}).get('error', 'Inference failed'))
+            return result
+        
+        # Concurrent identical requests against the same model version share one Lambda call
+        result = get_prediction_cache().get_or_compute(
+            (latest_model.s3_pkl_key, input_hash(customer_data)), invoke
         )
         
-        result = json.loads(response['Payload'].read())
-        
         # Determine risk level
         risk_score = result.get('probability', 0)
         if risk_score < 0.3:
@@ -272,12 +225,12 @@ def predict_view(request):
             insights.append("Send retention survey")
             insights.append("Offer service upgrade")
         
-        # Save prediction
-        PredictionsRisk.objects.create(
-            user=request.user,
-            dataset=dataset,
-            risk_score=risk_score,
-            insights={'recommendations': insights, 'risk_level': risk_level}
+        # Save prediction; buffered and written in bulk off the request path
+        get_prediction_sink().add(
+            request.user.id,
+            dataset.id,
+            risk_score,
+            {'recommendations': insights, 'risk_level': risk_level}
         )
         
         return Response({
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from ml_app.models import AnalyticsSnapshot, DatasetMeta, ModelVersion
+from ml_app.queries import analytics_snapshot, claim_materialization, release_materialization
+from ml_app.utils.analytics_snapshot import compute_snapshot
+
+
+class TestAnalyticsSnapshot(TestCase):
+    def setUp(self):
+        cache.clear()
+        rng = np.random.RandomState(0)
+        self.df = pd.DataFrame({
+            'customerID': [f'C{i}' for i in range(100)],
+            'tenure': rng.randint(0, 72, 100),
+            'MonthlyCharges': rng.uniform(20, 120, 100),
+            'Churn': rng.choice(['Yes', 'No'], 100)
+        })
+        self.risk = rng.rand(100)
+
+    def test_high_risk_customers_are_the_top_predictions(self):
+        """Test that the high-risk list holds the highest scores in descending order"""
+        payload = compute_snapshot(self.df, self.risk, top_n=5)
+
+        expected = [f'C{i}' for i in np.argsort(-self.risk)[:5]]
+        self.assertEqual([c['customer_id'] for c in payload['high_risk_customers']], expected)
+        self.assertAlmostEqual(payload['churn_rate'], (self.df['Churn'] == 'Yes').mean())
+        self.assertEqual(sum(payload['cohort_analysis']['customerID'].values()), 100)
+        self.assertIn('risk_score', payload['correlation'])
+
+    def test_category_churn_matches_object_churn(self):
+        """Test that a Churn column loaded as category gives the same snapshot as Yes/No strings"""
+        self.df['PaperlessBilling'] = np.where(self.df['Churn'] == 'Yes', 'Yes', 'No')
+        categorical = self.df.astype({'Churn': 'category', 'PaperlessBilling': 'category'})
+
+        expected = compute_snapshot(self.df, self.risk)
+        payload = compute_snapshot(categorical, self.risk)
+
+        self.assertGreater(payload['churn_rate'], 0)
+        self.assertEqual(payload['churn_rate'], expected['churn_rate'])
+        self.assertEqual(payload['cohort_analysis'], expected['cohort_analysis'])
+        self.assertEqual(payload['correlation']['Churn'], expected['correlation']['Churn'])
+        self.assertIn("Paperless billing customers show higher churn. Review billing experience.", payload['insights'])
+
+    def test_snapshot_is_cached_after_first_lookup(self):
+        """Test that the view lookup hits the database once and then the cache"""
+        user = User.objects.create_user(username='analyst', password='testpass123')
+        dataset = DatasetMeta.objects.create(user=user, filename='churn.csv', rows=100, s3_key='datasets/churn.csv')
+        version = ModelVersion.objects.create(dataset=dataset, model_type='XGBoost', metrics_json={},
+                                              s3_pkl_key='models/a.pkl')
+        AnalyticsSnapshot.objects.create(dataset=dataset, model_version=version, dataset_key=dataset.s3_key,
+                                         payload=compute_snapshot(self.df, self.risk))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(analytics_snapshot(dataset.id, version.version)['total_customers'], 100)
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(analytics_snapshot(dataset.id, version.version))
+        self.assertIsNone(analytics_snapshot(dataset.id, version.version + 1))
+
+    def test_only_one_materialization_is_queued_per_version(self):
+        """Test that repeated claims fail until the running job releases its marker"""
+        self.assertTrue(claim_materialization(1, 7))
+        self.assertFalse(claim_materialization(1, 7))
+        self.assertTrue(claim_materialization(1, 8))
+
+        release_materialization(1, 7)
+        self.assertTrue(claim_materialization(1, 7))
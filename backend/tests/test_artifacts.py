@@ -0,0 +1,76 @@
+import os
+import tempfile
+import numpy as np
+from django.test import SimpleTestCase
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from ml_app.utils.artifacts import list_bundles, load_artifact, read_manifest, save_artifact, verify_artifact
+from ml_app.utils.compiled_trees import load_compiled, try_compile
+
+
+class TestModelArtifacts(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = rng.normal(size=(500, 4)).astype(np.float32)
+        y = (self.X[:, 0] > 0).astype(int)
+        self.scaler = StandardScaler().fit(self.X)
+        self.model = RandomForestClassifier(n_estimators=20, random_state=0).fit(self.scaler.transform(self.X), y)
+        encoder = LabelEncoder().fit(['Month-to-month', 'One year', 'Two year'])
+        self.bundle = {
+            'model': self.model,
+            'scaler': self.scaler,
+            'label_encoders': {'Contract': encoder},
+            'feature_names': ['a', 'b', 'c', 'd'],
+            'target_column': 'Churn',
+            'compiled': try_compile(self.model)
+        }
+        self.models_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.models_dir, 'ds1_RandomForest')
+
+    def test_round_trip_serves_from_memory_maps(self):
+        """Test that a loaded artifact scores like the original without unpickling the model"""
+        save_artifact(self.path, self.bundle, metrics={'f1_score': 0.9})
+        artifact = load_artifact(self.path)
+
+        self.assertIsInstance(artifact['scaler'].mean_, np.memmap)
+        self.assertIsInstance(artifact['compiled']['arrays']['threshold'], np.memmap)
+        self.assertNotIn('model', artifact)
+
+        X_scaled = artifact['scaler'].transform(self.X[:50])
+        np.testing.assert_allclose(X_scaled, self.scaler.transform(self.X[:50]), rtol=1e-6)
+        np.testing.assert_allclose(load_compiled(artifact).predict_proba(X_scaled),
+                                   self.model.predict_proba(X_scaled), atol=1e-6)
+        self.assertEqual(list(artifact['label_encoders']['Contract'].transform(['Two year'])), [2])
+        self.assertEqual(artifact['metrics'], {'f1_score': 0.9})
+        np.testing.assert_array_equal(artifact['model'].predict(X_scaled), self.model.predict(X_scaled))
+
+    def test_checksum_detects_corruption_and_artifacts_replace_legacy_files(self):
+        """Test that verification catches a modified array and listing prefers the artifact"""
+        save_artifact(self.path, self.bundle)
+        open(self.path + '.joblib', 'wb').close()
+        self.assertEqual(list_bundles(self.models_dir), [('ds1_RandomForest', self.path)])
+        verify_artifact(self.path)
+
+        relative = read_manifest(self.path)['arrays']['scaler.mean_']
+        np.save(os.path.join(self.path, relative), np.zeros(4))
+        with self.assertRaises(ValueError):
+            verify_artifact(self.path)
+
+    def test_resave_swaps_versions_without_a_missing_path(self):
+        """Test that saving again repoints the link and a reader keeps the version it loaded"""
+        save_artifact(self.path, self.bundle)
+        reader = load_artifact(self.path)
+        save_artifact(self.path, self.bundle, metrics={'f1_score': 0.5})
+
+        self.assertTrue(os.path.islink(self.path))
+        self.assertEqual(load_artifact(self.path)['metrics'], {'f1_score': 0.5})
+        self.assertEqual(reader['metrics'], {})
+        X_scaled = self.scaler.transform(self.X[:20])
+        np.testing.assert_array_equal(reader['model'].predict(X_scaled), self.model.predict(X_scaled))
+
+        for _ in range(3):
+            save_artifact(self.path, self.bundle)
+            self.assertTrue(os.path.isfile(os.path.join(self.path, 'manifest.json')))
+        versions = [name for name in os.listdir(self.models_dir) if name.startswith('.ds1_RandomForest.v')]
+        self.assertLessEqual(len(versions), 2)
+        self.assertEqual(list_bundles(self.models_dir), [('ds1_RandomForest', self.path)])
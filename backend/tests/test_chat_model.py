@@ -0,0 +1,131 @@
+import os
+import sys
+import json
+import time
+import subprocess
+import tempfile
+import threading
+from unittest import mock
+from django.conf import settings
+from django.test import RequestFactory, SimpleTestCase
+from ml_app import chat_model, chatbot_ai
+
+
+class EchoModel:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, prompts, max_new_tokens, num_return_sequences, batch_size):
+        self.batches.append(list(prompts))
+        return [[{'generated_text': prompt + ' AI Response: ok'}] for prompt in prompts]
+
+
+def echo_model(quantize=False):
+    return EchoModel()
+
+
+loading = threading.Event()
+
+
+def slow_model(quantize=False):
+    loading.wait(10)
+    return EchoModel()
+
+
+def broken_model(quantize=False):
+    raise OSError('weights not found')
+
+
+def start_server(variant):
+    address = os.path.join(tempfile.mkdtemp(), 'chat.sock')
+    ready = threading.Event()
+    threading.Thread(target=chat_model.serve, args=(address, variant, b'key', ready), daemon=True).start()
+    ready.wait(5)
+    return address
+
+
+class TestChatModel(SimpleTestCase):
+    def test_web_process_does_not_import_transformers(self):
+        """Test that loading the URLconf leaves transformers and torch unimported"""
+        code = (
+            "import sys, django; django.setup(); import ml_app.urls; "
+            "print('transformers' in sys.modules or 'torch' in sys.modules)"
+        )
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'core.settings'}
+        output = subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True, timeout=120)
+        self.assertEqual(output.stdout.strip().splitlines()[-1], 'False')
+
+    def test_client_round_trip_through_server(self):
+        """Test that the client gets generations from a running inference server"""
+        with mock.patch.dict(chat_model.MODEL_VARIANTS, {'echo': echo_model}):
+            address = start_server('echo')
+            client = chat_model.ChatModelClient(variant='echo', address=address, authkey=b'key', latency_budget=5)
+            self.assertTrue(client.generate('hello').endswith('AI Response: ok'))
+            self.assertFalse(chat_model.ChatModelClient(variant='disabled').enabled)
+
+    def test_concurrent_prompts_are_batched_and_cached(self):
+        """Test that concurrent prompts share one generation call and repeats hit the cache"""
+        with mock.patch.dict(chat_model.MODEL_VARIANTS, {'echo': echo_model}):
+            host = chat_model.ModelHost('echo', max_batch_size=8, batch_window_ms=200)
+            generator = host.generator()
+
+            threads = [
+                threading.Thread(target=host.generate, args=(f'question {i}',), kwargs={'cache_key': f'k{i}'})
+                for i in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(len(generator.batches), 1)
+            self.assertEqual(sorted(generator.batches[0]), [f'question {i}' for i in range(4)])
+
+            self.assertEqual(host.generate('question 0', cache_key='k0'), 'question 0 AI Response: ok')
+            self.assertEqual(len(generator.batches), 1)
+            self.assertEqual(host.stats['cache_hits'], 1)
+
+            with self.assertRaises(TimeoutError):
+                host.generate('late question', budget=-1)
+
+    def test_unready_server_is_reported_without_waiting(self):
+        """Test that a down, loading or failed model host raises ChatModelUnavailable at once"""
+        variants = {'slow': slow_model, 'broken': broken_model}
+        with mock.patch.dict(chat_model.MODEL_VARIANTS, variants):
+            missing = os.path.join(tempfile.mkdtemp(), 'missing.sock')
+            down = chat_model.ChatModelClient(variant='slow', address=missing, authkey=b'key')
+            with self.assertRaises(chat_model.ChatModelUnavailable):
+                down.generate('hello')
+
+            client = chat_model.ChatModelClient(variant='slow', address=start_server('slow'),
+                                                authkey=b'key', latency_budget=5)
+            started = time.monotonic()
+            with self.assertRaisesRegex(chat_model.ChatModelUnavailable, 'still loading'):
+                client.generate('hello')
+            self.assertLess(time.monotonic() - started, 1)
+            loading.set()
+
+            broken = chat_model.ChatModelClient(variant='broken', address=start_server('broken'), authkey=b'key')
+            for _ in range(50):
+                try:
+                    broken.generate('hello')
+                except chat_model.ChatModelUnavailable as e:
+                    if 'weights not found' in str(e):
+                        break
+                time.sleep(0.05)
+            else:
+                self.fail('Load failure was never reported')
+
+    def test_chat_view_answers_503_when_model_unavailable(self):
+        """Test that the chat endpoint returns 503 with a fallback answer while the host is down"""
+        client = chat_model.ChatModelClient(variant='full', address=os.path.join(tempfile.mkdtemp(), 'missing.sock'))
+        request = RequestFactory().post('/api/ml/chat/', json.dumps({'message': 'Which model is best?'}),
+                                        content_type='application/json')
+        with mock.patch.object(chatbot_ai, 'get_chat_client', return_value=client):
+            response = chatbot_ai.chat_with_ai(request)
+
+        body = json.loads(response.content)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(body['model_used'], 'fallback')
+        self.assertTrue(body['response'])
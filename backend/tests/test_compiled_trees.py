@@ -0,0 +1,41 @@
+import numpy as np
+from django.test import SimpleTestCase
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from xgboost import XGBClassifier
+from ml_app.utils.compiled_trees import CompiledForest, compile_model, try_compile
+
+
+class TestCompiledTrees(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = rng.normal(size=(1500, 7)).astype(np.float32)
+        self.y = (self.X[:, 0] * self.X[:, 1] + self.X[:, 2] + rng.normal(0, 0.5, 1500) > 0).astype(int)
+        self.X_new = rng.normal(size=(400, 7)).astype(np.float32)
+
+    def test_parity_with_original_models(self):
+        """Test that compiled ensembles reproduce the original probabilities and labels"""
+        models = [
+            RandomForestClassifier(n_estimators=30, max_depth=8, random_state=0),
+            GradientBoostingClassifier(n_estimators=40, random_state=0),
+            XGBClassifier(n_estimators=40, max_depth=4, random_state=0),
+        ]
+        for model in models:
+            model.fit(self.X, self.y)
+            compiled = CompiledForest.from_dict(compile_model(model).to_dict())
+
+            np.testing.assert_allclose(compiled.predict_proba(self.X_new), model.predict_proba(self.X_new),
+                                       atol=1e-5, err_msg=type(model).__name__)
+            np.testing.assert_array_equal(compiled.predict(self.X_new), model.predict(self.X_new))
+            self.assertAlmostEqual(compiled.predict_one(self.X_new[3]),
+                                   model.predict_proba(self.X_new[3:4])[0, 1], places=5)
+
+    def test_xgboost_early_stopping_and_unsupported_models(self):
+        """Test that only the best iteration is compiled and non-tree models are skipped"""
+        model = XGBClassifier(n_estimators=300, learning_rate=0.5, early_stopping_rounds=5, random_state=0)
+        model.fit(self.X[:1200], self.y[:1200], eval_set=[(self.X[1200:], self.y[1200:])], verbose=False)
+        compiled = compile_model(model)
+
+        self.assertEqual(len(compiled.roots), model.best_iteration + 1)
+        np.testing.assert_allclose(compiled.predict_proba(self.X_new), model.predict_proba(self.X_new), atol=1e-5)
+        self.assertIsNone(try_compile(LogisticRegression().fit(self.X, self.y)))
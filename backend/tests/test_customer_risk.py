@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from ml_app.models import CustomerRisk, DatasetMeta, ModelVersion
+from ml_app.risk_table import replace_risk_table
+from ml_app.risk_views import get_customer_risk, get_top_risk
+from ml_app.utils.compiled_trees import try_compile
+from ml_app.utils.feature_plan import FeaturePlan
+from ml_app.utils.risk_scoring import score_customers
+
+
+class TestCustomerRisk(TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        n = 400
+        self.df = pd.DataFrame({
+            'customerID': [f'C{i}' for i in range(n)],
+            'tenure': rng.randint(0, 72, n),
+            'MonthlyCharges': rng.uniform(20, 120, n),
+            'Contract': rng.choice(['Month-to-month', 'One year', 'Two year'], n),
+        })
+        self.df['Churn'] = np.where((self.df['Contract'] == 'Month-to-month') & (self.df['tenure'] < 24), 'Yes', 'No')
+
+        plan = FeaturePlan.fit(self.df)
+        X = plan.transform(self.df)
+        scaler = StandardScaler().fit(X)
+        model = RandomForestClassifier(n_estimators=20, random_state=0).fit(
+            scaler.transform(X), (self.df['Churn'] == 'Yes').astype(int))
+        self.bundle = {'model': model, 'scaler': scaler, 'feature_names': plan.feature_names,
+                       'feature_plan': plan.to_dict(), 'compiled': try_compile(model)}
+
+        self.user = User.objects.create_user(username='analyst', password='testpass123')
+        self.dataset = DatasetMeta.objects.create(user=self.user, filename='churn.csv', rows=n, s3_key='datasets/churn.csv')
+        self.model_version = ModelVersion.objects.create(dataset=self.dataset, model_type='RandomForest',
+                                                         metrics_json={}, s3_pkl_key='models/rf.pkl')
+
+    def test_scoring_matches_the_model_and_explains_high_risk(self):
+        """Test that batch scores equal the model's probabilities and high-risk rows have reasons"""
+        table = score_customers(self.bundle, self.df, version_key='models/rf.pkl')
+        X = self.bundle['scaler'].transform(FeaturePlan.from_dict(self.bundle['feature_plan']).transform(self.df))
+
+        self.assertEqual(list(table['customer_id']), list(self.df['customerID']))
+        np.testing.assert_allclose(table['risk_score'], self.bundle['model'].predict_proba(X)[:, 1], atol=1e-5)
+        high = table[table['risk_level'] == 'high']
+        self.assertTrue(len(high) > 0 and (high['risk_score'] >= 0.7).all())
+        self.assertTrue(all(reasons and reasons[0]['impact'] > 0 for reasons in high['top_reasons']))
+        self.assertTrue(set(table['risk_level']) <= {'low', 'medium', 'high'})
+
+    def test_lookup_and_top_n_read_the_stored_table(self):
+        """Test that the endpoints serve a customer's row and the riskiest customers in order"""
+        table = score_customers(self.bundle, self.df, version_key='models/rf.pkl')
+        replace_risk_table(self.dataset, self.model_version, table)
+        self.assertEqual(replace_risk_table(self.dataset, self.model_version, table), len(self.df))
+        self.assertEqual(CustomerRisk.objects.count(), len(self.df))
+
+        factory = APIRequestFactory()
+
+        def get(view, path, *args, **params):
+            request = factory.get(path, params)
+            force_authenticate(request, user=self.user)
+            return view(request, *args)
+
+        with self.assertNumQueries(1):
+            response = get(get_customer_risk, '/customers/C7/risk/', 'C7')
+        row = table.set_index('customer_id').loc['C7']
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['risk_level'], row['risk_level'])
+        self.assertEqual(get(get_customer_risk, '/customers/missing/risk/', 'missing').status_code, 404)
+
+        response = get(get_top_risk, '/risk/top/', self.dataset.id, limit=5)
+        scores = [customer['risk_score'] for customer in response.data['customers']]
+        self.assertEqual(scores, sorted(table['risk_score'], reverse=True)[:5])
+        for bad in (-5, 0, 'ten'):
+            self.assertEqual(get(get_top_risk, '/risk/top/', self.dataset.id, limit=bad).status_code, 400)
+
+    def test_lookups_require_the_dataset_owner(self):
+        """Test that anonymous callers are rejected and other users never see the scores"""
+        table = score_customers(self.bundle, self.df, version_key='models/rf.pkl')
+        replace_risk_table(self.dataset, self.model_version, table)
+        other = User.objects.create_user(username='other', password='testpass123')
+        factory = APIRequestFactory()
+
+        self.assertIn(get_customer_risk(factory.get('/customers/C7/risk/'), 'C7').status_code, (401, 403))
+        request = factory.get('/customers/C7/risk/')
+        force_authenticate(request, user=other)
+        self.assertEqual(get_customer_risk(request, 'C7').status_code, 404)
+        request = factory.get('/risk/top/')
+        force_authenticate(request, user=other)
+        self.assertEqual(get_top_risk(request, self.dataset.id).data['customers'], [])
@@ -0,0 +1,92 @@
+import io
+import os
+import json
+import tempfile
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from ml_app.dataset_catalog import absolute_path, get_dataset_file, save_upload
+from ml_app.models import DatasetFile
+
+CSV = b"customerID,tenure,Contract,Churn\nC1,1,Month-to-month,Yes\nC2,40,Two year,No\nC2,40,Two year,No\n"
+
+
+class TestDatasetCatalog(TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        override = override_settings(BASE_DIR=self.base_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_lookup_is_exact(self):
+        """Test that an id never resolves to a dataset whose name merely contains it"""
+        save_upload('ab12', SimpleUploadedFile('churn.csv', CSV))
+        longer = save_upload('ab123', SimpleUploadedFile('churn.csv', CSV))
+
+        self.assertEqual(get_dataset_file('ab123'), longer)
+        self.assertEqual(longer.rows, 3)
+        self.assertIsNone(get_dataset_file('ab1'))
+
+        # Files from before the catalog are registered by exact id prefix, once, by the backfill
+        with open(os.path.join(self.base_dir, 'uploaded_datasets', 'zz99_legacy.csv'), 'wb') as f:
+            f.write(CSV)
+        self.assertIsNone(get_dataset_file('zz99'))
+        call_command('backfill_datasets', stdout=io.StringIO())
+        self.assertIsNone(get_dataset_file('zz9'))
+        self.assertEqual(get_dataset_file('zz99').original_name, 'legacy.csv')
+
+    def test_clean_and_delete_keep_catalog_in_sync(self):
+        """Test that cleaning records the cleaned copy and delete removes every file"""
+        record = save_upload('cd34', SimpleUploadedFile('churn.csv', CSV))
+
+        response = self.client.post('/api/ml/clean/', json.dumps({'dataset_id': 'cd34'}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        record.refresh_from_db()
+        self.assertEqual(record.version, 2)
+        self.assertEqual(record.rows, 2)
+        self.assertEqual(len(record.cleaned_checksum), 64)
+        cleaned = absolute_path(record.cleaned_path)
+        self.assertTrue(os.path.exists(cleaned))
+
+        response = self.client.delete('/api/ml/datasets/cd34/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(os.path.exists(cleaned))
+        self.assertFalse(DatasetFile.objects.filter(dataset_id='cd34').exists())
+
+    def test_clean_fills_categories_that_already_hold_unknown(self):
+        """Test that a category column with real 'Unknown' values and gaps is cleaned, not a 500"""
+        rows = [f'C{i},{i},{"Unknown" if i % 3 == 0 else ("" if i % 3 == 1 else "DSL")},No' for i in range(60)]
+        csv = ('customerID,tenure,InternetService,Churn\n' + '\n'.join(rows) + '\n').encode()
+        save_upload('uk90', SimpleUploadedFile('churn.csv', csv))
+
+        response = self.client.post('/api/ml/clean/', json.dumps({'dataset_id': 'uk90'}),
+                                    content_type='application/json')
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['cleaning_results']['missing_values'], {'InternetService': 20})
+
+    def test_cleaned_listing_reads_only_metadata(self):
+        """Test that listing cleaned datasets never opens data files or scans directories"""
+        save_upload('ef56', SimpleUploadedFile('telco_churn.csv', CSV))
+        self.client.post('/api/ml/clean/', json.dumps({'dataset_id': 'ef56'}), content_type='application/json')
+
+        # A legacy cleaned copy is listed once the backfill has stored its metadata
+        os.makedirs(os.path.join(self.base_dir, 'uploaded_datasets'), exist_ok=True)
+        os.makedirs(os.path.join(self.base_dir, 'cleaned_datasets'), exist_ok=True)
+        for folder, name in (('uploaded_datasets', 'gh78_old.csv'), ('cleaned_datasets', 'cleaned_gh78_old.csv')):
+            with open(os.path.join(self.base_dir, folder, name), 'wb') as f:
+                f.write(CSV)
+        call_command('backfill_datasets', stdout=io.StringIO())
+
+        with mock.patch('ml_app.data_cleaning.pd.read_csv', side_effect=AssertionError('data file read')), \
+                mock.patch('os.listdir', side_effect=AssertionError('directory scanned')):
+            listing = self.client.get('/api/ml/cleaned-datasets/').json()
+        by_id = {entry['id']: entry for entry in listing}
+
+        self.assertEqual(set(by_id), {'ef56', 'gh78'})
+        self.assertEqual(by_id['ef56']['rows'], 2)
+        self.assertEqual(by_id['ef56']['dataset_type'], 'Customer Churn')
+        self.assertEqual(by_id['gh78']['rows'], 3)
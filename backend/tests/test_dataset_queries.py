@@ -0,0 +1,62 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from ml_app.models import DatasetMeta, ModelVersion
+from ml_app.pagination import DatasetCursorPagination
+from ml_app.queries import datasets_with_latest_model, model_comparison
+
+
+class TestDatasetQueries(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='analyst', password='testpass123')
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.datasets = []
+        for i in range(3):
+            dataset = DatasetMeta.objects.create(user=self.user, filename=f'churn_{i}.csv', rows=100 * (i + 1),
+                                                 s3_key=f'datasets/churn_{i}.csv')
+            self.datasets.append(dataset)
+            ModelVersion.objects.create(dataset=dataset, model_type='LogisticRegression',
+                                        metrics_json={'f1_score': 0.70}, s3_pkl_key='models/a.pkl')
+            ModelVersion.objects.create(dataset=dataset, model_type='XGBoost',
+                                        metrics_json={'f1_score': 0.80 + i / 100, 'auc': 0.9}, s3_pkl_key='models/b.pkl')
+        DatasetMeta.objects.create(user=other, filename='other.csv', rows=1, s3_key='datasets/other.csv')
+        DatasetMeta.objects.create(user=self.user, filename='untrained.csv', rows=5, s3_key='datasets/untrained.csv')
+
+    def test_listing_is_one_query_with_latest_model(self):
+        """Test that a page of datasets and their newest models costs a single query"""
+        request = Request(APIRequestFactory().get('/datasets/', {'page_size': 10}))
+        paginator = DatasetCursorPagination()
+
+        with self.assertNumQueries(1):
+            page = paginator.paginate_queryset(datasets_with_latest_model(self.user), request)
+
+        by_name = {row['filename']: row for row in page}
+        self.assertEqual(len(page), 4)
+        self.assertEqual(by_name['churn_2.csv']['latest_model_type'], 'XGBoost')
+        self.assertAlmostEqual(by_name['churn_2.csv']['latest_f1_score'], 0.82)
+        self.assertIsNone(by_name['untrained.csv']['latest_model_type'])
+
+    def test_cursor_pages_do_not_overlap(self):
+        """Test that following the next cursor continues where the last page ended"""
+        factory = APIRequestFactory()
+        paginator = DatasetCursorPagination()
+        first = paginator.paginate_queryset(datasets_with_latest_model(self.user),
+                                            Request(factory.get('/datasets/', {'page_size': 2})))
+        next_url = paginator.get_next_link()
+
+        second = DatasetCursorPagination().paginate_queryset(datasets_with_latest_model(self.user),
+                                                             Request(factory.get(next_url)))
+
+        ids = [row['id'] for row in first + second]
+        self.assertEqual(len(ids), 4)
+        self.assertEqual(len(set(ids)), 4)
+
+    def test_comparison_extracts_metrics_in_database(self):
+        """Test that missing metrics default to 0 without loading metrics_json"""
+        rows = list(model_comparison(self.datasets[0].id, self.user).order_by('version'))
+
+        self.assertEqual([row['model_type'] for row in rows], ['LogisticRegression', 'XGBoost'])
+        self.assertEqual(rows[0]['auc'], 0.0)
+        self.assertAlmostEqual(rows[1]['auc'], 0.9)
+        self.assertNotIn('metrics_json', rows[0])
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from ml_app.utils.dtypes import apply_dtype_plan, infer_csv_plan, read_csv_planned
+
+
+class TestDtypePlan(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        n = 20000
+        self.df = pd.DataFrame({
+            'customerID': [f'{i:05d}-XYZ' for i in range(n)],
+            'SeniorCitizen': rng.randint(0, 2, n),
+            'tenure': rng.randint(0, 72, n),
+            'Partner': rng.choice(['Yes', 'No'], n),
+            'Contract': rng.choice(['Month-to-month', 'One year', 'Two year'], n),
+            'MonthlyCharges': rng.uniform(20, 120, n).round(2),
+            'Churn': rng.choice(['Yes', 'No'], n)
+        })
+        self.path = os.path.join(tempfile.mkdtemp(), 'telco.csv')
+        self.df.to_csv(self.path, index=False)
+
+    def test_planned_read_is_compact_and_equivalent(self):
+        """Test that a planned read uses several times less memory with the same values"""
+        plan = infer_csv_plan(self.path, sample_rows=1000)
+        planned = read_csv_planned(self.path, plan)
+
+        self.assertEqual(plan['Contract'], 'category')
+        self.assertEqual(plan['tenure'], 'int8')
+        self.assertNotIn('customerID', plan)
+        self.assertGreater(self.df.memory_usage(deep=True).sum() / planned.memory_usage(deep=True).sum(), 2)
+        self.assertEqual((planned['Churn'] == 'Yes').sum(), (self.df['Churn'] == 'Yes').sum())
+        np.testing.assert_allclose(planned['MonthlyCharges'], self.df['MonthlyCharges'], rtol=1e-6)
+
+    def test_integers_beyond_the_sample_range_are_not_truncated(self):
+        """Test that applying a plan never overflows values the sample did not see"""
+        df = pd.DataFrame({'tenure': [1, 2, 40000]})
+        apply_dtype_plan(df, {'tenure': 'int8'})
+
+        self.assertEqual(df['tenure'].tolist(), [1, 2, 40000])
+        self.assertEqual(str(df['tenure'].dtype), 'int32')
@@ -0,0 +1,30 @@
+import numpy as np
+from django.test import SimpleTestCase
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from xgboost import XGBClassifier
+from ml_app.utils.early_stopping import MAX_BOOSTING_ROUNDS, MAX_FOREST_TREES, fit_with_early_stopping
+
+
+class TestEarlyStopping(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = rng.normal(size=(2000, 6))
+        self.y = (self.X[:, 0] - self.X[:, 1] > 0).astype(int)
+
+    def test_boosters_stop_before_round_limit(self):
+        """Test that XGBoost and GradientBoosting stop well short of their round limit"""
+        xgb, xgb_rounds = fit_with_early_stopping(XGBClassifier(random_state=42, learning_rate=0.3), self.X, self.y)
+        gb, gb_rounds = fit_with_early_stopping(GradientBoostingClassifier(random_state=42), self.X, self.y)
+
+        self.assertLess(xgb_rounds, MAX_BOOSTING_ROUNDS)
+        self.assertLess(gb_rounds, MAX_BOOSTING_ROUNDS // 2)
+        self.assertGreater((xgb.predict(self.X) == self.y).mean(), 0.9)
+        self.assertGreater((gb.predict(self.X) == self.y).mean(), 0.9)
+
+    def test_forest_grows_until_oob_plateaus(self):
+        """Test that a warm-started forest stops growing once out-of-bag accuracy plateaus"""
+        forest, n_trees = fit_with_early_stopping(RandomForestClassifier(random_state=42), self.X, self.y)
+
+        self.assertEqual(len(forest.estimators_), n_trees)
+        self.assertLess(n_trees, MAX_FOREST_TREES)
+        self.assertFalse(forest.warm_start)
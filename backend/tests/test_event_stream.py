@@ -0,0 +1,141 @@
+import time
+import threading
+import fakeredis
+from django.test import SimpleTestCase
+from ml_app.event_stream import (
+    TelecomEventConsumer, publish_events, STREAM_KEY, CONSUMER_GROUP, DEAD_LETTER_KEY
+)
+
+
+class RecordingLayer:
+    def __init__(self):
+        self.messages = []
+        self.lock = threading.Lock()
+
+    async def group_send(self, group, message):
+        with self.lock:
+            self.messages.append((group, message))
+
+
+def overdue_scorer(events):
+    return [0.9 if event.get('overdue_days', 0) > 20 else 0.1 for event in events]
+
+
+def poison_scorer(events):
+    if any(event.get('customer_id') == 'C13' for event in events):
+        raise ValueError('unscorable event')
+    return overdue_scorer(events)
+
+
+class TestTelecomEventConsumer(SimpleTestCase):
+    def setUp(self):
+        self.r = fakeredis.FakeRedis()
+        self.layer = RecordingLayer()
+        publish_events(self.r, [
+            {'type': 'billing_alert', 'customer_id': f'C{i}', 'overdue_days': i % 30}
+            for i in range(300)
+        ])
+
+    def test_concurrent_consumers_score_and_ack_every_event(self):
+        """Test that consumers split the stream, ack all entries and batch alerts"""
+        consumers = [
+            TelecomEventConsumer(self.r, overdue_scorer, consumer_name=f'w{i}',
+                                 channel_layer=self.layer, batch_size=50, block_ms=10)
+            for i in range(3)
+        ]
+
+        def drain(consumer):
+            while consumer.poll_once():
+                pass
+
+        threads = [threading.Thread(target=drain, args=(c,)) for c in consumers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sum(c.stats['processed'] for c in consumers), 300)
+        self.assertEqual(self.r.xpending(STREAM_KEY, CONSUMER_GROUP)['pending'], 0)
+
+        alerts = [a for _, message in self.layer.messages for a in message['alerts']]
+        self.assertEqual(len(alerts), 90)
+        self.assertTrue(all(group == 'customer_monitoring' for group, _ in self.layer.messages))
+        self.assertLessEqual(len(self.layer.messages), sum(c.stats['batches'] for c in consumers))
+
+    def test_unacked_entries_are_reclaimed(self):
+        """Test that entries from a crashed consumer are redelivered across XAUTOCLAIM pages"""
+        crashed = TelecomEventConsumer(self.r, overdue_scorer, consumer_name='crashed', block_ms=10)
+        self.r.xreadgroup(CONSUMER_GROUP, crashed.consumer_name, {STREAM_KEY: '>'}, count=100)
+
+        survivor = TelecomEventConsumer(self.r, overdue_scorer, consumer_name='survivor',
+                                        batch_size=30, block_ms=10, reclaim_idle_ms=0)
+        reclaimed = survivor.reclaim_stale()
+        remaining = 0
+        while batch := survivor.poll_once():
+            remaining += batch
+
+        self.assertEqual(reclaimed, 100)
+        self.assertEqual(remaining, 200)
+        self.assertEqual(self.r.xpending(STREAM_KEY, CONSUMER_GROUP)['pending'], 0)
+
+    def test_poison_events_are_dead_lettered(self):
+        """Test that an event the scorer keeps failing on moves to the dead-letter stream"""
+        consumer = TelecomEventConsumer(self.r, poison_scorer, consumer_name='w0', channel_layer=self.layer,
+                                        batch_size=50, block_ms=10, reclaim_idle_ms=0, max_deliveries=2)
+        for _ in range(6):
+            try:
+                consumer.poll_once()
+            except ValueError:
+                pass
+        self.assertEqual(consumer.stats['processed'], 250)
+        self.assertEqual(self.r.xpending(STREAM_KEY, CONSUMER_GROUP)['pending'], 50)
+
+        self.assertEqual(consumer.reclaim_stale(), 49)
+        self.assertEqual(self.r.xpending(STREAM_KEY, CONSUMER_GROUP)['pending'], 1)
+        self.assertEqual(consumer.reclaim_stale(), 0)
+
+        self.assertEqual(self.r.xpending(STREAM_KEY, CONSUMER_GROUP)['pending'], 0)
+        self.assertEqual(consumer.stats['dead_lettered'], 1)
+        (_, fields), = self.r.xrange(DEAD_LETTER_KEY)
+        self.assertIn(b'"C13"', fields[b'payload'])
+        self.assertEqual(fields[b'deliveries'], b'3')
+
+    def test_unparseable_payloads_are_dead_lettered_unscored(self):
+        """Test that malformed payloads skip the scorer and land in the dead-letter stream as sent"""
+        self.r.xadd(STREAM_KEY, {'payload': '{not json'})
+        self.r.xadd(STREAM_KEY, {'other': 'field'})
+        scored = []
+        consumer = TelecomEventConsumer(self.r, lambda events: scored.extend(events) or overdue_scorer(events),
+                                        consumer_name='w0', batch_size=500, block_ms=10)
+
+        self.assertEqual(consumer.poll_once(), 300)
+        self.assertEqual(len(scored), 300)
+        self.assertEqual(consumer.stats['dead_lettered'], 2)
+        self.assertEqual(self.r.xpending(STREAM_KEY, CONSUMER_GROUP)['pending'], 0)
+        dead = [fields for _, fields in self.r.xrange(DEAD_LETTER_KEY)]
+        self.assertEqual(dead[0][b'payload'], b'{not json')
+        self.assertEqual({fields[b'reason'] for fields in dead}, {b'unparseable'})
+
+    def test_run_reclaims_failed_batches_while_the_stream_stays_busy(self):
+        """Test that run retries and dead-letters a failed batch without waiting for the stream to go idle"""
+        consumer = TelecomEventConsumer(self.r, poison_scorer, consumer_name='w0', batch_size=50,
+                                        block_ms=10, reclaim_idle_ms=50, max_deliveries=2)
+        stop = threading.Event()
+
+        def produce():
+            while not stop.is_set():
+                publish_events(self.r, [{'type': 'usage', 'customer_id': 'busy'}])
+                time.sleep(0.002)
+
+        threads = [threading.Thread(target=produce), threading.Thread(target=consumer.run, args=(stop,))]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 10
+        while consumer.stats['dead_lettered'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(consumer.stats['dead_lettered'], 1)
+        self.assertGreaterEqual(consumer.stats['reclaimed'], 49)
@@ -0,0 +1,38 @@
+import numpy as np
+from django.test import SimpleTestCase
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.svm import SVC
+from ml_app.utils.explain import ExplanationService, explainer_for
+
+
+class TestExplanationService(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = rng.rand(120, 4)
+        self.y = (self.X[:, 1] > 0.5).astype(int)
+        self.names = ['tenure', 'MonthlyCharges', 'TotalCharges', 'SeniorCitizen']
+
+    def test_explainer_kind_and_named_top_k(self):
+        """Test that each model family gets its explainer and the driving feature ranks first"""
+        models = {
+            'tree': RandomForestClassifier(n_estimators=20, random_state=0),
+            'linear': LogisticRegression(),
+            'kernel': SVC(probability=True, random_state=0),
+        }
+        for kind, model in models.items():
+            model.fit(self.X, self.y)
+            service = ExplanationService(model, background=self.X, feature_names=self.names,
+                                         kernel_nsamples=50)
+            top = service.top_k(self.X[:3], k=2)
+
+            self.assertEqual(service.kind, kind)
+            self.assertEqual(len(top), 3)
+            self.assertEqual(next(iter(top[0])), 'MonthlyCharges')
+
+    def test_explainer_is_built_once_per_version(self):
+        """Test that the cache returns the same explainer for a model version"""
+        model = RandomForestClassifier(n_estimators=10, random_state=0).fit(self.X, self.y)
+        first = explainer_for(('models/a.pkl', '"v1"'), model, feature_names=self.names)
+        second = explainer_for(('models/a.pkl', '"v1"'), model, feature_names=self.names)
+        self.assertIs(first, second)
@@ -0,0 +1,31 @@
+import numpy as np
+from django.test import SimpleTestCase
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from ml_app.utils.importance import compute_feature_importance
+
+
+class TestFeatureImportance(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = rng.rand(400, 4)
+        self.y = (self.X[:, 0] + 0.2 * self.X[:, 3] > 0.6).astype(int)
+        self.names = ['Contract', 'tenure', 'gender', 'MonthlyCharges']
+
+    def test_tree_model_combines_all_methods(self):
+        """Test that tree models report impurity, permutation and SHAP importance"""
+        model = RandomForestClassifier(n_estimators=30, random_state=0).fit(self.X, self.y)
+        ranked = compute_feature_importance(model, self.X, self.y, self.names, sample_size=200)
+
+        self.assertEqual(ranked[0]['feature'], 'Contract')
+        self.assertTrue(all(ranked[0][method] is not None for method in ('impurity', 'permutation', 'shap')))
+        self.assertAlmostEqual(sum(entry['importance'] for entry in ranked), 1.0, places=6)
+
+    def test_linear_model_skips_impurity(self):
+        """Test that models without feature_importances_ still get a ranking"""
+        model = LogisticRegression().fit(self.X, self.y)
+        ranked = compute_feature_importance(model, self.X, self.y, self.names, top_k=2)
+
+        self.assertEqual(len(ranked), 2)
+        self.assertEqual(ranked[0]['feature'], 'Contract')
+        self.assertIsNone(ranked[0]['impurity'])
@@ -0,0 +1,46 @@
+import json
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from ml_app.utils.feature_plan import FeaturePlan
+
+
+class TestFeaturePlan(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        n = 300
+        self.df = pd.DataFrame({
+            'customerID': [f'C{i}' for i in range(n)],
+            'gender': rng.choice(['Male', 'Female'], n),
+            'tenure': rng.randint(0, 72, n),
+            'MonthlyCharges': rng.uniform(20, 120, n),
+            'TotalCharges': rng.uniform(20, 5000, n).round(2).astype(str),
+            'PhoneService': rng.choice(['Yes', 'No'], n),
+            'Contract': rng.choice(['Month-to-month', 'One year', 'Two year'], n),
+            'MultipleLines': rng.choice(['Yes', 'No', 'No phone service'], n),
+            'Churn': rng.choice(['Yes', 'No'], n)
+        })
+
+    def test_single_record_matches_training_batch(self):
+        """Test that a restored plan encodes one customer exactly as in the batch"""
+        plan = FeaturePlan.fit(self.df)
+        batch = plan.transform(self.df)
+        restored = FeaturePlan.from_dict(json.loads(json.dumps(plan.to_dict())))
+
+        single = restored.transform(self.df.iloc[[7]].drop(columns=['Churn']))
+
+        self.assertEqual(batch.dtype, np.float32)
+        self.assertTrue(batch.flags['C_CONTIGUOUS'])
+        np.testing.assert_array_equal(single[0], batch[7])
+        self.assertNotIn('Churn_Yes', plan.feature_names)
+        self.assertIn('MultipleLines_No phone service', plan.feature_names)
+
+    def test_bins_and_vocabularies_are_fixed(self):
+        """Test that unseen categories and out-of-range tenure use the training encoding"""
+        plan = FeaturePlan.fit(self.df)
+        X = plan.transform_frame(pd.DataFrame({'tenure': [500, 0], 'Contract': ['Three year', 'Two year']}))
+
+        self.assertEqual(X.loc[0, 'tenure_group_Very High'], 1)
+        self.assertEqual(X.loc[1, 'tenure_group_Very Low'], 1)
+        self.assertEqual(X.filter(like='Contract_').iloc[0].sum(), 0)
+        self.assertEqual(X.loc[1, 'Contract_Two year'], 1)
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from ml_app.utils.imbalance import ImbalanceStage
+
+
+class TestImbalanceStage(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = rng.normal(size=(1000, 30)).astype(np.float32)
+        self.y = pd.Series(np.r_[np.ones(100, dtype=int), np.zeros(900, dtype=int)], name='Churn')
+
+    def test_smote_balances_within_row_budget(self):
+        """Test that SMOTE undersamples the majority to stay inside max_rows"""
+        stage = ImbalanceStage('smote', max_rows=600)
+        X_out, y_out = stage.fit_resample(self.X, self.y)
+
+        self.assertEqual(len(X_out), 600)
+        self.assertEqual(stage.report['class_counts_out'], {'0': 300, '1': 300})
+        self.assertEqual(y_out.name, 'Churn')
+        self.assertIsNone(stage.sample_weight)
+        # Synthetic rows lie between minority rows, inside their bounding box
+        minority = self.X[:100]
+        synthetic = X_out[-200:]
+        self.assertTrue((synthetic >= minority.min(axis=0) - 1e-5).all())
+        self.assertTrue((synthetic <= minority.max(axis=0) + 1e-5).all())
+
+    def test_auto_uses_class_weights_on_large_splits(self):
+        """Test that auto keeps every row and weights the classes on large splits"""
+        stage = ImbalanceStage('auto', auto_smote_rows=500)
+        X_out, y_out = stage.fit_resample(self.X, self.y)
+
+        self.assertEqual(stage.report['strategy'], 'class_weight')
+        self.assertEqual(stage.report['extra_bytes'], 0)
+        self.assertEqual(len(X_out), len(self.X))
+        weights = stage.sample_weight
+        self.assertAlmostEqual(weights[y_out == 1].sum(), weights[y_out == 0].sum(), places=2)
@@ -0,0 +1,118 @@
+import os
+import sys
+import glob
+import shutil
+import tempfile
+import subprocess
+import importlib.util
+import joblib
+import fakeredis
+import numpy as np
+from io import BytesIO
+from unittest import mock
+from django.conf import settings
+from django.test import SimpleTestCase
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+from ml_app.event_stream import TelecomEventConsumer
+from ml_app.utils.feature_plan import FeaturePlan
+
+spec = importlib.util.spec_from_file_location('infer', os.path.join(settings.BASE_DIR, 'lambda', 'infer.py'))
+infer = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(infer)
+
+
+class LocalS3:
+    """In-memory S3 stand-in that counts downloads"""
+
+    def __init__(self):
+        self.objects = {}
+        self.downloads = 0
+
+    def put(self, key, payload, etag):
+        self.objects[key] = (payload, etag)
+
+    def head_object(self, Bucket, Key):
+        return {'ETag': self.objects[Key][1]}
+
+    def get_object(self, Bucket, Key):
+        self.downloads += 1
+        return {'Body': BytesIO(self.objects[Key][0])}
+
+
+class TestLambdaInference(SimpleTestCase):
+    def setUp(self):
+        plan = FeaturePlan(numeric_columns=['tenure', 'MonthlyCharges'],
+                           vocabularies={'Contract': ['Month-to-month', 'Two year']})
+        feature_names = plan.feature_names
+        rng = np.random.RandomState(0)
+        X = rng.rand(200, 4)
+        y = (X[:, 2] > 0.5).astype(int)
+        scaler = StandardScaler().fit(X)
+        model = LogisticRegression().fit(scaler.transform(X), y)
+
+        buffer = BytesIO()
+        joblib.dump({'model': model, 'scaler': scaler, 'feature_names': feature_names,
+                     'feature_plan': plan.to_dict(), 'background': scaler.transform(X[:50])}, buffer)
+
+        self.s3 = LocalS3()
+        self.s3.put('models/churn.pkl', buffer.getvalue(), '"v1"')
+        infer._s3 = self.s3
+        infer._models.clear()
+        infer._plans.clear()
+        infer._unexplainable.clear()
+        infer._etags.clear()
+
+    def test_warm_invocations_reuse_cached_model(self):
+        """Test that a warm container downloads each model version once and accepts batches"""
+        records = [
+            {'tenure': 0.2, 'MonthlyCharges': 0.5, 'Contract': 'Month-to-month'},
+            {'tenure': 0.9, 'MonthlyCharges': 0.5, 'Contract': 'Two year'},
+        ]
+        first = infer.handler({'model_s3_key': 'models/churn.pkl', 'customer_data': records}, None)
+        second = infer.handler({'model_s3_key': 'models/churn.pkl', 'customer_data': records[0]}, None)
+
+        self.assertEqual(first['statusCode'], 200)
+        self.assertEqual(len(first['body']['predictions']), 2)
+        self.assertEqual(first['body']['predictions'][0]['probability'], second['body']['probability'])
+        self.assertGreater(first['body']['predictions'][0]['probability'], first['body']['predictions'][1]['probability'])
+        self.assertIn('Contract_Month-to-month', second['body']['shap_values'])
+        self.assertEqual(self.s3.downloads, 1)
+
+        # A new upload changes the ETag and is picked up once the TTL has passed
+        self.s3.put('models/churn.pkl', self.s3.objects['models/churn.pkl'][0], '"v2"')
+        infer._etags.clear()
+        infer.handler({'model_s3_key': 'models/churn.pkl', 'customer_data': records[0]}, None)
+        self.assertEqual(self.s3.downloads, 2)
+        self.assertEqual(len(infer._models), 1)
+
+    def test_packaged_handler_imports_without_the_backend(self):
+        """Test that the handlers import from the bundled asset layout alone, with no Django"""
+        asset = tempfile.mkdtemp()
+        for path in glob.glob(os.path.join(settings.BASE_DIR, 'lambda', '*.py')):
+            shutil.copy(path, asset)
+        with open(os.path.join(settings.BASE_DIR, 'lambda', 'shared_modules.txt')) as f:
+            for relative in f.read().split():
+                os.makedirs(os.path.join(asset, os.path.dirname(relative)), exist_ok=True)
+                shutil.copy(os.path.join(settings.BASE_DIR, relative), os.path.join(asset, relative))
+        for package in ('ml_app', os.path.join('ml_app', 'utils')):
+            open(os.path.join(asset, package, '__init__.py'), 'w').close()
+
+        env = {key: value for key, value in os.environ.items() if key not in ('PYTHONPATH', 'DJANGO_SETTINGS_MODULE')}
+        check = subprocess.run(
+            [sys.executable, '-c', 'import sys, infer, stream; assert "django" not in sys.modules'],
+            cwd=asset, env=env, capture_output=True, text=True
+        )
+        self.assertEqual(check.returncode, 0, check.stderr)
+
+    def test_stream_generator_feeds_the_consumer_group(self):
+        """Test that events from the StreamGenerator Lambda reach the churn-scorers consumers"""
+        spec = importlib.util.spec_from_file_location('stream', os.path.join(settings.BASE_DIR, 'lambda', 'stream.py'))
+        stream = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(stream)
+
+        r = fakeredis.FakeRedis()
+        consumer = TelecomEventConsumer(r, lambda events: [0.0] * len(events), consumer_name='w0', block_ms=10)
+        with mock.patch.object(stream.redis.Redis, 'from_url', return_value=r):
+            self.assertEqual(stream.handler({}, None)['statusCode'], 200)
+        self.assertEqual(consumer.poll_once(), 1)
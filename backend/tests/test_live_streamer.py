@@ -0,0 +1,85 @@
+import asyncio
+import sqlite3
+import tempfile
+import os
+from datetime import datetime, timedelta
+from django.test import SimpleTestCase
+from channels.layers import InMemoryChannelLayer
+from ml_app.live_streamer import LiveDataStreamer, SQLiteSource
+
+
+class TestLiveDataStreamer(SimpleTestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        self.now = datetime(2024, 12, 23, 12, 0, 0)
+
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript("""
+            CREATE TABLE customers (id INTEGER PRIMARY KEY, status TEXT, created_at TEXT, updated_at TEXT,
+                                    churned_at TEXT);
+            CREATE TABLE payments (id INTEGER PRIMARY KEY, status TEXT, created_at TEXT);
+        """)
+        old = (self.now - timedelta(days=30)).isoformat()
+        recent = (self.now - timedelta(minutes=2)).isoformat()
+        self.recent = recent
+        conn.executemany("INSERT INTO customers (status, created_at, updated_at, churned_at) VALUES (?, ?, ?, ?)", [
+            ('active', old, old, None),          # outside the window
+            ('active', recent, recent, None),    # new signup
+            ('churned', old, recent, recent),    # recent churn
+            ('churned', old, recent, old),       # churned long ago, row touched recently
+        ])
+        conn.executemany("INSERT INTO payments (status, created_at) VALUES (?, ?)", [
+            ('failed', recent),
+            ('succeeded', recent),
+            ('failed', old),
+        ])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        os.remove(self.db_path)
+
+    def _insert(self, sql, params):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(sql, params)
+        conn.commit()
+        conn.close()
+
+    def test_poll_counts_window_then_only_new_rows(self):
+        """Test that ticks fold watermark deltas into rolling window totals, counting each row once"""
+        async def scenario():
+            layer = InMemoryChannelLayer()
+            channel = await layer.new_channel()
+            await layer.group_add('customer_monitoring', channel)
+
+            streamer = LiveDataStreamer(source=SQLiteSource(self.db_path), channel_layer=layer)
+            await streamer.setup_connections()
+
+            first = await streamer.poll_once(now=self.now)
+            await streamer.publish(first)
+
+            later = self.now + timedelta(seconds=30)
+            self._insert("INSERT INTO customers (status, created_at, updated_at) VALUES (?, ?, ?)",
+                         ('active', later.isoformat(), later.isoformat()))
+            self._insert("INSERT INTO payments (status, created_at) VALUES (?, ?)",
+                         ('failed', later.isoformat()))
+            # Committed after the first tick with the same timestamp as its watermark
+            self._insert("INSERT INTO customers (status, created_at, updated_at) VALUES (?, ?, ?)",
+                         ('active', self.recent, self.recent))
+            second = await streamer.poll_once(now=later + timedelta(seconds=1))
+
+            # Past the window every earlier delta expires
+            third = await streamer.poll_once(now=later + timedelta(minutes=10))
+
+            message = await layer.receive(channel)
+            await streamer.source.close()
+            return first, second, third, message
+
+        first, second, third, message = asyncio.run(scenario())
+
+        self.assertEqual((first['new_customers'], first['recent_churns'], first['payment_failures']), (1, 1, 1))
+        self.assertEqual((second['new_customers'], second['recent_churns'], second['payment_failures']), (3, 1, 2))
+        self.assertEqual((third['new_customers'], third['recent_churns'], third['payment_failures']), (0, 0, 0))
+        self.assertEqual(message['type'], 'live_metrics')
+        self.assertEqual(message['data']['new_customers'], 1)
@@ -0,0 +1,52 @@
+import json
+import numpy as np
+from django.test import RequestFactory, SimpleTestCase
+from sklearn.dummy import DummyClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from ml_app.train_views import train_models
+from ml_app.utils.model_selection import parse_time_budget, successive_halving
+
+
+class TestSuccessiveHalving(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = rng.normal(size=(6000, 8))
+        self.y = (self.X[:, 0] + 0.5 * self.X[:, 1] + rng.normal(0, 0.3, 6000) > 0).astype(int)
+        self.candidates = {
+            'logistic': LogisticRegression(),
+            'tree': DecisionTreeClassifier(max_depth=3, random_state=0),
+            'dummy': DummyClassifier(strategy='most_frequent'),
+            'stump': DecisionTreeClassifier(max_depth=1, random_state=0)
+        }
+
+    def test_promotes_best_candidate_on_growing_samples(self):
+        """Test that halving promotes on larger samples and the strongest model wins"""
+        outcome = successive_halving(self.candidates, self.X, self.y, min_rows=500, eta=2)
+
+        self.assertEqual(outcome['winner'], 'logistic')
+        rows = [rung['rows'] for rung in outcome['rungs']]
+        self.assertEqual(rows, sorted(rows))
+        self.assertEqual(len(outcome['rungs'][0]['candidates']), 4)
+        self.assertEqual(outcome['leaderboard']['dummy']['rows'], 500)
+
+    def test_time_budget_stops_promotion(self):
+        """Test that an exhausted budget ends selection with the best candidate so far"""
+        outcome = successive_halving(self.candidates, self.X, self.y, min_rows=500, eta=2, time_budget=1e-9)
+
+        self.assertEqual(len(outcome['rungs']), 1)
+        self.assertIn(outcome['winner'], self.candidates)
+
+    def test_time_budget_is_validated(self):
+        """Test that time_budget is cast to seconds and bad values are rejected with 400"""
+        self.assertEqual(parse_time_budget('2.5'), 2.5)
+        self.assertEqual(parse_time_budget(None, default=30.0), 30.0)
+        for bad in ('soon', -1, 0, float('nan'), True, [5]):
+            with self.assertRaises(ValueError):
+                parse_time_budget(bad)
+
+        request = RequestFactory().post('/api/ml/train/', json.dumps({'dataset_id': 'x', 'time_budget': 'soon'}),
+                                        content_type='application/json')
+        response = train_models(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('time_budget', json.loads(response.content)['error'])
@@ -0,0 +1,56 @@
+import time
+import threading
+from django.test import SimpleTestCase
+from ml_app.prediction_cache import PredictionCache, input_hash
+
+
+class TestPredictionCache(SimpleTestCase):
+    def test_concurrent_identical_requests_compute_once(self):
+        """Test that simultaneous requests for one key share a single computation"""
+        cache = PredictionCache(ttl=60)
+        calls = []
+        start = threading.Barrier(8)
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'probability': 0.42}
+
+        def request():
+            start.wait()
+            results.append(cache.get_or_compute(('v1', input_hash({'tenure': 3})), compute))
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'probability': 0.42}] * 8)
+        stats = cache.stats()
+        self.assertEqual(stats['miss'], 1)
+        self.assertEqual(stats['coalesced'], 7)
+        self.assertEqual(stats['hit_rate'], 0.875)
+
+    def test_ttl_key_canonicalization_and_errors(self):
+        """Test that equivalent inputs hit, entries expire, and failures are not cached"""
+        cache = PredictionCache(ttl=0.05)
+        key = ('v1', input_hash({'tenure': 3, 'Contract': 'One year'}))
+        cache.get_or_compute(key, lambda: 1)
+
+        same = ('v1', input_hash({'Contract': 'One year', 'tenure': 3.0}))
+        self.assertEqual(cache.get_or_compute(same, lambda: 2), 1)
+        time.sleep(0.06)
+        self.assertEqual(cache.get_or_compute(same, lambda: 3), 3)
+
+        def fail():
+            raise RuntimeError('inference failed')
+
+        other = ('v2', input_hash({'tenure': 3}))
+        with self.assertRaises(RuntimeError):
+            cache.get_or_compute(other, fail)
+        self.assertEqual(cache.get_or_compute(other, lambda: 4), 4)
+        self.assertEqual(cache.stats()['hit'], 1)
+        self.assertEqual(cache.stats()['errors'], 1)
@@ -0,0 +1,65 @@
+from datetime import timedelta
+from unittest import mock
+from django.db import OperationalError
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from ml_app.models import DatasetMeta, PredictionsRisk
+from ml_app.prediction_sink import PredictionSink, purge_expired_predictions
+
+
+class TestPredictionSink(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='analyst', password='testpass123')
+        self.dataset = DatasetMeta.objects.create(user=self.user, filename='churn.csv', rows=100,
+                                                  s3_key='datasets/churn.csv')
+
+    def test_buffered_rows_are_written_in_one_insert(self):
+        """Test that adding predictions does not hit the database until flush"""
+        sink = PredictionSink(batch_size=1000)
+        with self.assertNumQueries(0):
+            for i in range(150):
+                sink.add(self.user.id, self.dataset.id, i / 150, {'risk_level': 'Low'})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(sink.flush(), 150)
+        self.assertEqual(PredictionsRisk.objects.filter(dataset=self.dataset).count(), 150)
+
+    def test_failed_write_keeps_rows_for_the_next_flush(self):
+        """Test that a database error requeues the batch, bounded by max_pending, instead of dropping it"""
+        sink = PredictionSink(batch_size=1000, max_pending=100)
+        sink.add_many([(self.user.id, self.dataset.id, i / 150, {}) for i in range(150)])
+
+        with mock.patch.object(PredictionsRisk.objects, 'bulk_create', side_effect=OperationalError('down')):
+            self.assertEqual(sink.flush(), 0)
+        self.assertEqual(sink.dropped, 50)
+        self.assertEqual(PredictionsRisk.objects.count(), 0)
+
+        sink.add(self.user.id, self.dataset.id, 1.0, {})
+        self.assertEqual(sink.flush(), 101)
+        scores = sorted(PredictionsRisk.objects.values_list('risk_score', flat=True))
+        self.assertAlmostEqual(scores[0], 50 / 150)
+        self.assertAlmostEqual(scores[-1], 1.0)
+
+    def test_delayed_flush_keeps_the_enqueue_time(self):
+        """Test that rows written after a failed flush keep the time they were buffered"""
+        queued_at = timezone.now() - timedelta(hours=1)
+        sink = PredictionSink(batch_size=1000)
+        with mock.patch('ml_app.prediction_sink.timezone.now', return_value=queued_at):
+            sink.add_many([(self.user.id, self.dataset.id, 0.5, {})] * 3)
+
+        with mock.patch.object(PredictionsRisk.objects, 'bulk_create', side_effect=OperationalError('down')):
+            sink.flush()
+        self.assertEqual(sink.flush(), 3)
+        self.assertEqual(set(PredictionsRisk.objects.values_list('created_at', flat=True)), {queued_at})
+
+    def test_purge_removes_only_expired_predictions(self):
+        """Test that predictions older than the retention window are deleted"""
+        sink = PredictionSink()
+        sink.add_many([(self.user.id, self.dataset.id, 0.5, {})] * 5)
+        sink.flush()
+        PredictionsRisk.objects.filter(id__in=list(PredictionsRisk.objects.values_list('id', flat=True)[:3])) \
+            .update(created_at=timezone.now() - timedelta(days=120))
+
+        self.assertEqual(purge_expired_predictions(retention_days=90, chunk_size=2), 3)
+        self.assertEqual(PredictionsRisk.objects.count(), 2)
@@ -0,0 +1,94 @@
+import os
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from ml_app.dataset_catalog import save_upload
+from ml_app.predict import predict_view
+from ml_app.train_views import predict_single, train_models
+from ml_app.utils.feature_plan import FeaturePlan
+from ml_app.utils.streaming import iter_frames, train_out_of_core
+
+
+def churn_frame():
+    rng = np.random.RandomState(0)
+    n = 3000
+    tenure = rng.randint(0, 72, n)
+    contract = rng.choice(['Month-to-month', 'One year', 'Two year'], n)
+    churn_score = (contract == 'Month-to-month') * 1.5 - tenure / 30 + rng.normal(0, 0.5, n)
+    return pd.DataFrame({
+        'customerID': [f'C{i}' for i in range(n)],
+        'gender': rng.choice(['Male', 'Female'], n),
+        'tenure': tenure,
+        'MonthlyCharges': rng.uniform(20, 120, n),
+        'TotalCharges': rng.uniform(20, 5000, n).round(2).astype(str),
+        'PhoneService': rng.choice(['Yes', 'No'], n),
+        'Contract': contract,
+        'Churn': np.where(churn_score > 0, 'Yes', 'No')
+    })
+
+
+class TestOutOfCoreTraining(SimpleTestCase):
+    def setUp(self):
+        self.df = churn_frame()
+        self.workdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.workdir, 'churn.csv')
+        self.df.to_csv(self.path, index=False)
+
+    def test_chunked_plan_matches_full_fit(self):
+        """Test that fitting the plan chunk by chunk gives the same encoding as one fit"""
+        full = FeaturePlan.fit(self.df)
+        chunked = FeaturePlan.fit_chunks(iter_frames(self.path, chunksize=700))
+
+        self.assertEqual(chunked.feature_names, full.feature_names)
+        np.testing.assert_allclose(chunked.tenure_edges, full.tenure_edges, rtol=1e-3)
+        np.testing.assert_array_equal(chunked.transform(self.df), full.transform(self.df))
+
+    def test_streaming_training_learns_from_holdout(self):
+        """Test that streamed learners beat chance on the hash-assigned holdout"""
+        outcome = train_out_of_core(self.path, chunksize=500, learners=('SGDLogistic', 'NaiveBayes'),
+                                    workdir=os.path.join(self.workdir, 'ooc'))
+
+        self.assertEqual(outcome['rows'], len(self.df))
+        self.assertEqual(outcome['train_rows'] + outcome['holdout_rows'], len(self.df))
+        self.assertGreater(outcome['holdout_rows'], 400)
+        for name in ('SGDLogistic', 'NaiveBayes'):
+            self.assertGreater(outcome['metrics'][name]['auc_score'], 0.8)
+        self.assertTrue(os.path.exists(outcome['matrix_path']))
+
+    def test_temporary_workdir_is_removed(self):
+        """Test that memmaps in a workdir the caller did not provide are deleted after training"""
+        before = set(os.listdir(tempfile.gettempdir()))
+        outcome = train_out_of_core(self.path, chunksize=500, learners=('NaiveBayes',))
+
+        self.assertIsNone(outcome['matrix_path'])
+        self.assertFalse([name for name in set(os.listdir(tempfile.gettempdir())) - before
+                          if name.startswith('churn_ooc_')])
+
+
+class TestOutOfCoreEndToEnd(TestCase):
+    def test_streamed_models_score_raw_records(self):
+        """Test that a model trained out of core predicts from a raw customer record"""
+        with override_settings(BASE_DIR=tempfile.mkdtemp()):
+            save_upload('ooc1', SimpleUploadedFile('churn.csv', churn_frame().to_csv(index=False).encode()))
+            factory = RequestFactory()
+            response = train_models(factory.post('/train/', json.dumps({
+                'dataset_id': 'ooc1', 'out_of_core': True, 'models': ['SGDLogistic', 'NaiveBayes']
+            }), content_type='application/json'))
+            self.assertEqual(response.status_code, 200, response.content)
+
+            record = {'gender': 'Female', 'tenure': 2, 'MonthlyCharges': 95.0, 'TotalCharges': '190.0',
+                      'PhoneService': 'Yes', 'Contract': 'Month-to-month'}
+            response = predict_single(factory.post('/predict/', json.dumps({
+                'dataset_id': 'ooc1', 'input_data': record
+            }), content_type='application/json'))
+            by_model_id = predict_view(factory.post('/predict/', json.dumps({
+                'model_id': 'ooc1_SGDLogistic', 'input_data': record
+            }), content_type='application/json'))
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertGreater(json.loads(response.content)['probability'], 0.5)
+        self.assertEqual(by_model_id.status_code, 200, by_model_id.content)
+        self.assertGreater(json.loads(by_model_id.content)['risk_score'], 0.5)
@@ -0,0 +1,98 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from ml_app.models import DatasetMeta, ModelVersion, TrainingLog
+from ml_app.progress import TrainingProgress
+from ml_app.training_events import TrainingEventRecorder
+
+
+class TestTrainingEventRecorder(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='trainer', password='testpass123')
+        self.dataset = DatasetMeta.objects.create(
+            user=self.user,
+            filename='telecom_churn.csv',
+            rows=7043,
+            s3_key='datasets/telecom_churn.csv'
+        )
+
+    def test_stage_events_are_buffered_until_flush(self):
+        """Test that stage events are written in one batch, not per stage"""
+        recorder = TrainingEventRecorder('job-1')
+        progress = TrainingProgress(None, total_stages=3, listeners=[recorder])
+
+        for step in ('data_loading', 'data_cleaning', 'feature_engineering'):
+            with progress.stage(step, rows=100):
+                pass
+
+        self.assertEqual(TrainingLog.objects.count(), 0)
+
+        with self.assertNumQueries(1):
+            written = recorder.flush()
+
+        self.assertEqual(written, 3)
+        durations = TrainingLog.objects.filter(job_id='job-1').values_list('step', 'duration_ms', 'rows')
+        self.assertEqual({step for step, _, _ in durations}, {'data_loading', 'data_cleaning', 'feature_engineering'})
+        self.assertTrue(all(duration is not None and rows == 100 for _, duration, rows in durations))
+
+    def test_link_attaches_rows_to_model_version(self):
+        """Test that buffered rows are linked to the saved ModelVersion"""
+        recorder = TrainingEventRecorder('job-2')
+        recorder.record('data_loading', 'completed', duration_ms=12.5, rows=7043)
+        recorder.flush()
+        recorder.record('training_complete', 'success')
+
+        model_version = ModelVersion.objects.create(
+            dataset=self.dataset,
+            model_type='RandomForest',
+            metrics_json={'f1_score': 0.85},
+            s3_pkl_key='models/test_model.pkl'
+        )
+        linked = recorder.link(model_version)
+
+        self.assertEqual(linked, 2)
+        self.assertEqual(TrainingLog.objects.filter(model=model_version).count(), 2)
+
+    def test_failed_stage_is_recorded(self):
+        """Test that a failing stage is still recorded with its duration"""
+        recorder = TrainingEventRecorder('job-3')
+        progress = TrainingProgress(None, total_stages=1, listeners=[recorder])
+
+        with self.assertRaises(ValueError):
+            with progress.stage('data_balancing'):
+                raise ValueError('not enough rows')
+        recorder.flush()
+
+        log = TrainingLog.objects.get(job_id='job-3')
+        self.assertEqual(log.status, 'failed')
+        self.assertIsNone(log.model)
+        self.assertIsNotNone(log.duration_ms)
+
+    @override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+    def test_stage_updates_reach_the_job_group(self):
+        """Test that stage progress and a failing stage are published to training_{job_id}"""
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)('training_job-4', channel)
+        progress = TrainingProgress('job-4', total_stages=2)
+
+        with progress.stage('data_loading', rows=100):
+            pass
+        with self.assertRaises(ValueError):
+            with progress.stage('model_training'):
+                raise ValueError('diverged')
+        progress.fail('diverged')
+
+        messages = [async_to_sync(layer.receive)(channel) for _ in range(5)]
+        self.assertTrue(all(m['type'] == 'training_update' and m['job_id'] == 'job-4' for m in messages))
+        self.assertEqual([(m['step'], m['status'], m['progress']) for m in messages], [
+            ('data_loading', 'started', 0),
+            ('data_loading', 'completed', 50),
+            ('model_training', 'started', 50),
+            ('model_training', 'failed', 50),
+            ('training_failed', 'failed', 50),
+        ])
+        self.assertEqual(messages[1]['rows'], 100)
+        self.assertEqual(messages[3]['error'], 'diverged')
+        self.assertEqual([t['status'] for t in messages[4]['stage_timings']], ['completed', 'failed'])
@@ -0,0 +1,81 @@
+import asyncio
+from django.test import SimpleTestCase, override_settings
+from channels.testing import WebsocketCommunicator
+from ml_app.backpressure import BoundedOutbox, CONNECTION_METRICS
+from ml_app.equipment_consumer import EquipmentMonitoringConsumer
+
+IN_MEMORY_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+class TestBoundedOutbox(SimpleTestCase):
+    def test_drops_oldest_when_full(self):
+        """Test that a full outbox drops the oldest frame instead of growing"""
+        async def scenario():
+            outbox = BoundedOutbox(maxsize=3)
+            for i in range(10):
+                outbox.put(f'frame-{i}')
+            self.assertEqual(len(outbox), 3)
+            return [await outbox.get() for _ in range(3)], outbox.metrics()
+
+        frames, metrics = asyncio.run(scenario())
+
+        self.assertEqual(frames, ['frame-7', 'frame-8', 'frame-9'])
+        self.assertEqual(metrics['dropped'], 7)
+        self.assertEqual(metrics['max_depth'], 3)
+
+    def test_overflow_spares_critical_frames(self):
+        """Test that a full outbox evicts ordinary frames first and only then the oldest alert"""
+        async def scenario():
+            outbox = BoundedOutbox(maxsize=3)
+            outbox.put('alert-0', critical=True)
+            for i in range(5):
+                outbox.put(f'frame-{i}')
+            first = [await outbox.get() for _ in range(len(outbox))]
+            for i in range(1, 5):
+                outbox.put(f'alert-{i}', critical=True)
+            return first, [await outbox.get() for _ in range(len(outbox))], outbox.metrics()
+
+        first, second, metrics = asyncio.run(scenario())
+
+        self.assertEqual(first, ['alert-0', 'frame-3', 'frame-4'])
+        self.assertEqual(second, ['alert-2', 'alert-3', 'alert-4'])
+        self.assertEqual(metrics['dropped'], 4)
+
+    def test_keyed_frames_are_latest_wins(self):
+        """Test that keyed snapshots coalesce to the newest value"""
+        async def scenario():
+            outbox = BoundedOutbox(maxsize=10)
+            outbox.put('alert')
+            for i in range(5):
+                outbox.put(f'snapshot-{i}', key='customer_data')
+            return [await outbox.get() for _ in range(len(outbox))], outbox.metrics()
+
+        frames, metrics = asyncio.run(scenario())
+
+        self.assertEqual(frames, ['alert', 'snapshot-4'])
+        self.assertEqual(metrics['coalesced'], 4)
+        self.assertEqual(metrics['dropped'], 0)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYERS)
+class TestBackpressureConsumer(SimpleTestCase):
+    def test_disconnect_cancels_producer_tasks(self):
+        """Test that producer and writer tasks stop when the client leaves"""
+        async def scenario():
+            communicator = WebsocketCommunicator(EquipmentMonitoringConsumer.as_asgi(), '/ws/equipment-monitoring/')
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+            message = await communicator.receive_json_from(timeout=2)
+            self.assertIn(message['type'], ('equipment_data', 'equipment_alert'))
+
+            before = {t for t in asyncio.all_tasks() if not t.done()}
+            await communicator.disconnect()
+            await asyncio.sleep(0)
+            after = {t for t in asyncio.all_tasks() if not t.done()}
+            return before, after
+
+        before, after = asyncio.run(scenario())
+
+        self.assertLess(len(after), len(before))
+        self.assertEqual(CONNECTION_METRICS, {})
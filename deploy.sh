@@ -20,6 +20,7 @@ cd ..
 echo "🗄️ Setting up database..."
 cd backend
 python manage.py migrate
+python manage.py backfill_datasets
 python manage.py seed --create-admin --train-models
 echo "✅ Database ready with real telecom data"
 
@@ -1,5 +1,5 @@
 from aws_cdk import (
-    Stack, Duration, RemovalPolicy,
+    Stack, Duration, RemovalPolicy, BundlingOptions,
     aws_rds as rds,
     aws_elasticache as elasticache,
     aws_s3 as s3,
@@ -16,6 +16,12 @@ from aws_cdk import (
 )
 from constructs import Construct
 
+# The MLInference image (backend/lambda/Dockerfile) and the StreamGenerator
+# bundle copy the Django-free ml_app modules listed in lambda/shared_modules.txt
+# next to their handlers
+ML_INFERENCE_DOCKERFILE = "lambda/Dockerfile"
+LAMBDA_SHARED_MODULES = "lambda/shared_modules.txt"
+
 class ChurnGuardStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
@@ -104,24 +110,18 @@ class ChurnGuardStack(Stack):
             ]
         )
 
-        # Lambda Layer for ML libraries
-        ml_layer = _lambda.LayerVersion(self, "MLLayer",
-            code=_lambda.Code.from_asset("../backend/lambda_layer"),
-            compatible_runtimes=[_lambda.Runtime.PYTHON_3_12],
-            description="ML libraries layer"
-        )
-
-        # ML Inference Lambda
-        ml_lambda = _lambda.Function(self, "MLInference",
-            runtime=_lambda.Runtime.PYTHON_3_12,
-            handler="infer.handler",
-            code=_lambda.Code.from_asset("../backend/lambda"),
+        # ML Inference Lambda; a container image because the ML stack exceeds the layer size limit
+        ml_lambda = _lambda.DockerImageFunction(self, "MLInference",
+            code=_lambda.DockerImageCode.from_image_asset("../backend",
+                file=ML_INFERENCE_DOCKERFILE,
+                exclude=["*", "!lambda", "!lambda/**", "!ml_app", "!ml_app/utils", "!ml_app/utils/**"]
+            ),
             role=lambda_role,
-            layers=[ml_layer],
             timeout=Duration.seconds(30),
             memory_size=1024,
             environment={
-                "S3_BUCKET": bucket.bucket_name
+                "S3_BUCKET": bucket.bucket_name,
+                "MODEL_BUCKET": bucket.bucket_name
             }
         )
 
@@ -174,7 +174,18 @@ class ChurnGuardStack(Stack):
         stream_lambda = _lambda.Function(self, "StreamGenerator",
             runtime=_lambda.Runtime.PYTHON_3_12,
             handler="stream.handler",
-            code=_lambda.Code.from_asset("../backend/lambda"),
+            # Ships the shared modules too, so the producer uses the consumers' stream key and cap
+            code=_lambda.Code.from_asset("../backend",
+                exclude=["*", "!lambda", "!lambda/**", "!ml_app", "!ml_app/utils", "!ml_app/utils/**"],
+                bundling=BundlingOptions(
+                    image=_lambda.Runtime.PYTHON_3_12.bundling_image,
+                    command=["bash", "-c",
+                             "pip install --no-cache-dir redis==5.0.1 -t /asset-output && "
+                             "cp lambda/*.py /asset-output/ && "
+                             f"xargs -a {LAMBDA_SHARED_MODULES} cp --parents -t /asset-output && "
+                             "touch /asset-output/ml_app/__init__.py /asset-output/ml_app/utils/__init__.py"]
+                )
+            ),
             timeout=Duration.seconds(10),
             environment={
                 "REDIS_URL": f"redis://{redis_cluster.attr_redis_endpoint_address}:6379"